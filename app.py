@@ -11,11 +11,16 @@ warnings.filterwarnings('ignore')
 import settings
 DASHBOARD_CONFIG = settings.DASHBOARD_CONFIG
 MODEL_CONFIG = settings.MODEL_CONFIG
-from data_loader import load_and_validate_data, calcular_estatisticas_gerais
-from data_processor import aplicar_filtros, calcular_estatisticas_filtradas
+from data_loader import carregar_dados, calcular_estatisticas_gerais
+from data_processor import aplicar_filtros, calcular_estatisticas_filtradas, calcular_ranking_segmentos
 from formatters import formatar_moeda, formatar_numero, formatar_percentual
 from sidebar import criar_sidebar
+from data_catalog import obter_catalogo
 from questions import render_questions
+from cache_warmer import aquecer_caches
+from feature_store import feature_store_necessaria, preparar_feature_store
+from exporter import FORMATOS_EXPORTACAO, formato_disponivel, preparar_download
+from instrumentation import iniciar_execucao, exibir_painel_perfil
 
 # ===========================
 # CONFIGURAÇÃO DA PÁGINA
@@ -27,6 +32,9 @@ st.set_page_config(
     page_icon=DASHBOARD_CONFIG.PAGE_ICON
 )
 
+# Perfil por etapa desta execução (DASHBOARD_CONFIG.PROFILING_ENABLED)
+iniciar_execucao()
+
 # ===========================
 # CSS CUSTOMIZADO
 # ===========================
@@ -73,7 +81,7 @@ st.markdown("**Análise interativa do dataset Customer Shopping Behavior**")
 # CARREGAMENTO DE DADOS
 # ===========================
 try:
-    df = load_and_validate_data(
+    df = carregar_dados(
         DASHBOARD_CONFIG.CSV_PATH,
         DASHBOARD_CONFIG.REQUIRED_COLUMNS
     )
@@ -81,6 +89,23 @@ except (FileNotFoundError, ValueError) as e:
     st.error(str(e))
     st.stop()
 
+# Agregados por cliente (clustering e modelo): atualizados de forma
+# incremental, uma vez por versão do dataset, só quando a configuração usa
+# features da store
+if feature_store_necessaria(df):
+    try:
+        preparar_feature_store(DASHBOARD_CONFIG.CSV_PATH, df)
+    except ValueError as e:
+        st.warning(str(e))
+
+def encerrar_pagina():
+    """Fim da renderização: painel de perfil e aquecimento dos caches"""
+    exibir_painel_perfil()
+    # Só com a página já servida: pré-calcula em segundo plano as combinações
+    # de filtros mais comuns (uma vez por versão do dataset), sem disputar a
+    # primeira renderização
+    aquecer_caches(DASHBOARD_CONFIG.CSV_PATH, df)
+
 # ===========================
 # ESTATÍSTICAS GERAIS
 # ===========================
@@ -117,10 +142,65 @@ with col4:
         help="Número de categorias de produtos"
     )
 
+# ===========================
+# EXPLORADOR DE SEGMENTOS
+# ===========================
+# Só calculado quando aberto: o ranking percorre o dataset inteiro
+if st.toggle(" Explorador de Segmentos (Categoria × Gênero × Estação × Faixa Etária)", key="segmentos_aberto"):
+    with st.container(border=True):
+        colunas_ranking = {
+            "Valor Total": "valor_total",
+            "Clientes": "clientes",
+            "Ticket Médio": "ticket_medio",
+            "Δ Ticket": "delta_ticket",
+            "Compra Máxima": "valor_maximo"
+        }
+        
+        col1, col2, col3 = st.columns([2, 1, 1])
+        
+        with col1:
+            ordenar_por = st.selectbox("Ordenar por", list(colunas_ranking), key="segmentos_ordem")
+        
+        with col2:
+            min_clientes = st.number_input(
+                "Mínimo de clientes",
+                min_value=1,
+                value=DASHBOARD_CONFIG.SEGMENT_MIN_CLIENTS,
+                key="segmentos_min",
+                help="Segmentos menores ficam de fora (médias instáveis)"
+            )
+        
+        with col3:
+            crescente = st.toggle("Crescente", key="segmentos_crescente")
+        
+        # Todos os segmentos em um único groupby (em cache)
+        ranking = calcular_ranking_segmentos(df, DASHBOARD_CONFIG.SEGMENT_AGE_BINS, int(min_clientes))
+        ranking = ranking.sort_values(colunas_ranking[ordenar_por], ascending=crescente)
+        
+        st.caption(f"{formatar_numero(len(ranking))} segmentos comparados")
+        st.dataframe(
+            ranking,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Category": "Categoria",
+                "Gender": "Gênero",
+                "Season": "Estação",
+                "faixa_etaria": "Faixa Etária",
+                "clientes": st.column_config.NumberColumn("Clientes", format="%d"),
+                "delta_clientes_pct": st.column_config.NumberColumn("Δ Clientes", format="%.1f%%"),
+                "ticket_medio": st.column_config.NumberColumn("Ticket Médio", format="$%.2f"),
+                "delta_ticket": st.column_config.NumberColumn("Δ Ticket", format="$%.2f"),
+                "valor_total": st.column_config.NumberColumn("Valor Total", format="$%.0f"),
+                "valor_maximo": st.column_config.NumberColumn("Compra Máxima", format="$%.2f")
+            }
+        )
+
 # ===========================
 # SIDEBAR COM FILTROS
 # ===========================
-filtros = criar_sidebar(df)
+# Opções e contagens dos filtros a partir do catálogo (uma vez por versão do dataset)
+filtros = criar_sidebar(df, obter_catalogo(DASHBOARD_CONFIG.CSV_PATH, df))
 
 # Validação de ação
 if 'aplicar_filtro' not in st.session_state:
@@ -131,6 +211,7 @@ if not st.session_state.aplicar_filtro:
         " **Dica:** Selecione os filtros desejados na barra lateral "
         "e clique em **'Aplicar'** para visualizar as análises."
     )
+    encerrar_pagina()
     st.stop()
 
 # ===========================
@@ -150,6 +231,7 @@ if len(df_filtrado) == 0:
         " Nenhum dado encontrado com os filtros selecionados. "
         "Por favor, ajuste os filtros na barra lateral."
     )
+    encerrar_pagina()
     st.stop()
 
 # ===========================
@@ -207,7 +289,7 @@ render_questions(df_filtrado)
 st.markdown("---")
 st.subheader(" Exportar Dados Filtrados")
 
-col1, col2 = st.columns([3, 1])
+col1, col2, col3 = st.columns([2, 1, 1])
 
 with col1:
     st.info(
@@ -215,15 +297,22 @@ with col1:
     )
 
 with col2:
-    csv = df_filtrado.to_csv(index=False).encode('utf-8')
+    formatos = [f for f in FORMATOS_EXPORTACAO if formato_disponivel(f)]
+    formato_exportacao = st.selectbox("Formato", formatos, label_visibility="collapsed")
+
+with col3:
+    # Arquivo gerado só no clique, em blocos (nada é serializado a cada rerun)
     st.download_button(
-        label=" Download CSV",
-        data=csv,
-        file_name="dados_filtrados.csv",
-        mime="text/csv",
+        label=" Download",
+        data=preparar_download(df_filtrado, formato_exportacao),
+        file_name=f"dados_filtrados.{FORMATOS_EXPORTACAO[formato_exportacao]['extensao']}",
+        mime=FORMATOS_EXPORTACAO[formato_exportacao]['mime'],
         use_container_width=True
     )
 
+# Painel de perfil (só com DASHBOARD_CONFIG.PROFILING_ENABLED) e aquecimento
+encerrar_pagina()
+
 # ===========================
 # RODAPÉ
 # ===========================
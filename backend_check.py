@@ -0,0 +1,253 @@
+"""Paridade e desempenho dos backends de consulta (pandas, duckdb, polars)
+
+Uso:
+    python backend_check.py --dados shopping_behavior_updated.csv \\
+        [--filtros filtros.json] [--backends duckdb polars] \\
+        [--percentil 0.9] [--repeticoes 3]
+
+Executa as funções de data_processor com cada backend de
+DASHBOARD_CONFIG.QUERY_BACKEND, sem os caches, e compara os resultados com o
+caminho pandas (igualdade exata, incluindo tipos, índices e ordem). Em seguida
+mede o tempo de cada função por backend. O arquivo de filtros usa os campos de
+criar_sidebar; com uma lista, cada especificação é verificada. Para medir em
+volume, gere a amostra de 1,17M linhas com python gerar_amostra.py e use
+--dados amostra_grande.parquet.
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+if __name__ == "__main__":
+    import warnings
+    from streamlit.logger import set_log_level
+    
+    warnings.filterwarnings('ignore')
+    set_log_level("error")
+
+from settings import DASHBOARD_CONFIG
+from data_loader import ler_e_validar, marcar_consulta
+from engine import completar_filtros
+import data_processor
+
+BACKENDS = ["pandas", "duckdb", "polars"]
+
+# Funções comparadas, sem @cache_memoria/@cache_compartilhado
+FUNCOES = {
+    nome: inspect.unwrap(getattr(data_processor, nome))
+    for nome in (
+        "aplicar_filtros",
+        "calcular_estatisticas_filtradas",
+        "calcular_big_spenders",
+        "calcular_vendas_por_dimensao",
+        "preparar_dados_top_gastadores"
+    )
+}
+
+@contextmanager
+def _backend(nome: str):
+    """Ativa um backend de consulta durante o bloco"""
+    anterior = DASHBOARD_CONFIG.QUERY_BACKEND
+    DASHBOARD_CONFIG.QUERY_BACKEND = nome
+    try:
+        yield
+    finally:
+        DASHBOARD_CONFIG.QUERY_BACKEND = anterior
+
+def executar(
+    df: pd.DataFrame,
+    filtros: dict,
+    percentil: float,
+    tempos: Optional[dict] = None
+) -> dict:
+    """
+    Executa as funções de data_processor com o backend ativo.
+    
+    Args:
+        df: Dataset completo (marcado com a consulta do arquivo)
+        filtros: Especificação completa (campos de criar_sidebar)
+        percentil: Percentil dos big spenders e da persona
+        tempos: Dicionário que acumula os segundos de cada função (opcional)
+    
+    Returns:
+        Dicionário {função: resultado}
+    """
+    def medir(nome, *args):
+        inicio = time.perf_counter()
+        resultado = FUNCOES[nome](*args)
+        if tempos is not None:
+            tempos.setdefault(nome, []).append(time.perf_counter() - inicio)
+        return resultado
+    
+    filtrado = medir(
+        "aplicar_filtros", df,
+        filtros['categorias'], filtros['generos'], filtros['faixa_etaria'], filtros['estacoes']
+    )
+    return {
+        'aplicar_filtros': filtrado,
+        'calcular_estatisticas_filtradas': medir("calcular_estatisticas_filtradas", df, filtrado),
+        'calcular_big_spenders': medir("calcular_big_spenders", filtrado, percentil),
+        'calcular_vendas_por_dimensao': medir("calcular_vendas_por_dimensao", filtrado),
+        'preparar_dados_top_gastadores': medir("preparar_dados_top_gastadores", filtrado, percentil)
+    }
+
+def comparar(esperado, obtido, caminho: str = "") -> List[str]:
+    """
+    Compara dois resultados exatamente (valores, tipos, índices e ordem).
+    
+    Args:
+        esperado: Resultado do caminho pandas
+        obtido: Resultado de outro backend
+        caminho: Prefixo usado nas mensagens
+    
+    Returns:
+        Lista de diferenças (vazia se idênticos)
+    """
+    if isinstance(esperado, (dict, tuple)):
+        if type(esperado) is not type(obtido) or len(esperado) != len(obtido):
+            return [f"{caminho}: estrutura diferente"]
+        
+        chaves = esperado.keys() if isinstance(esperado, dict) else range(len(esperado))
+        if isinstance(esperado, dict) and set(esperado) != set(obtido):
+            return [f"{caminho}: chaves {sorted(esperado)} != {sorted(obtido)}"]
+        return [d for k in chaves for d in comparar(esperado[k], obtido[k], f"{caminho}.{k}")]
+    
+    try:
+        if isinstance(esperado, pd.DataFrame):
+            pd.testing.assert_frame_equal(esperado, obtido, check_exact=True)
+        elif isinstance(esperado, pd.Series):
+            pd.testing.assert_series_equal(esperado, obtido, check_exact=True)
+        elif esperado is None or obtido is None:
+            assert esperado is obtido, f"{esperado!r} != {obtido!r}"
+        elif isinstance(esperado, float) and np.isnan(esperado):
+            assert isinstance(obtido, float) and np.isnan(obtido), f"NaN != {obtido!r}"
+        else:
+            assert esperado == obtido, f"{esperado!r} != {obtido!r}"
+    except AssertionError as e:
+        return [f"{caminho}: {str(e).strip().splitlines()[0]}"]
+    
+    return []
+
+def verificar_paridade(
+    caminho: str,
+    especificacoes: List[Optional[dict]],
+    backends: List[str],
+    percentil: float = 0.9
+) -> dict:
+    """
+    Verifica se os backends reproduzem o caminho pandas.
+    
+    Args:
+        caminho: CSV ou Parquet de origem
+        especificacoes: Filtros (campos de criar_sidebar; ausentes = sem filtro)
+        backends: Backends comparados com o pandas
+        percentil: Percentil dos big spenders e da persona
+    
+    Returns:
+        Dicionário {backend: lista de diferenças}
+    """
+    df = ler_e_validar(caminho, DASHBOARD_CONFIG.REQUIRED_COLUMNS)
+    marcar_consulta(df, caminho, None)
+    especificacoes = [completar_filtros(df, filtros) for filtros in especificacoes]
+    
+    with _backend("pandas"):
+        esperados = [executar(df, filtros, percentil) for filtros in especificacoes]
+    
+    diferencas = {}
+    for backend in backends:
+        with _backend(backend):
+            diferencas[backend] = [
+                diferenca
+                for i, (filtros, esperado) in enumerate(zip(especificacoes, esperados))
+                for diferenca in comparar(esperado, executar(df, filtros, percentil), f"filtro_{i}")
+            ]
+    return diferencas
+
+def medir_backends(
+    caminho: str,
+    filtros: Optional[dict],
+    backends: List[str],
+    percentil: float = 0.9,
+    repeticoes: int = 3
+) -> dict:
+    """
+    Mede o tempo de cada função por backend (mediana das repetições).
+    
+    O pandas trabalha sobre o DataFrame já em memória; a leitura do arquivo
+    é medida à parte em 'carregar'. Os outros backends leem o arquivo a cada
+    chamada.
+    
+    Args:
+        caminho: CSV ou Parquet de origem
+        filtros: Especificação (campos de criar_sidebar)
+        backends: Backends medidos (incluindo "pandas" para referência)
+        percentil: Percentil dos big spenders e da persona
+        repeticoes: Execuções por backend
+    
+    Returns:
+        Dicionário {backend: {função: segundos}}
+    """
+    inicio = time.perf_counter()
+    df = ler_e_validar(caminho, DASHBOARD_CONFIG.REQUIRED_COLUMNS)
+    carregar = time.perf_counter() - inicio
+    
+    marcar_consulta(df, caminho, None)
+    filtros = completar_filtros(df, filtros)
+    
+    resultado = {}
+    for backend in backends:
+        tempos = {}
+        with _backend(backend):
+            for _ in range(repeticoes):
+                executar(df, filtros, percentil, tempos)
+        
+        resultado[backend] = {nome: float(np.median(t)) for nome, t in tempos.items()}
+        resultado[backend]['total'] = sum(resultado[backend].values())
+        if backend == "pandas":
+            resultado[backend]['carregar'] = carregar
+    
+    return resultado
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dados", default=DASHBOARD_CONFIG.CSV_PATH)
+    parser.add_argument("--filtros", help="JSON com uma especificação ou uma lista delas")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS[1:], default=BACKENDS[1:])
+    parser.add_argument("--percentil", type=float, default=0.9)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+    
+    especificacoes = [None]
+    if args.filtros:
+        with open(args.filtros, encoding="utf-8") as f:
+            especificacoes = json.load(f)
+        if not isinstance(especificacoes, list):
+            especificacoes = [especificacoes]
+    
+    try:
+        diferencas = verificar_paridade(args.dados, especificacoes, args.backends, args.percentil)
+        tempos = medir_backends(
+            args.dados, especificacoes[0], ["pandas"] + args.backends,
+            args.percentil, args.repeticoes
+        )
+    except (FileNotFoundError, ValueError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    
+    print(json.dumps({
+        'cpus': os.cpu_count(),
+        'especificacoes': len(especificacoes),
+        'paridade': {b: d or "idêntico" for b, d in diferencas.items()},
+        'segundos': tempos
+    }, ensure_ascii=False, indent=2))
+    return 1 if any(diferencas.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Cache em memória com orçamento global de bytes
+
+Substitui o @st.cache_data (que não limita tamanho) nas funções do projeto:
+cada resultado é guardado serializado, o que dá o tamanho exato de cada
+entrada e devolve uma cópia a cada leitura, como o st.cache_data. Quando o
+total passa de CACHE_CONFIG.MEMORY_CACHE_MAX_BYTES, as entradas são
+despejadas por LRU ou LFU.
+"""
+import functools
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from settings import CACHE_CONFIG
+from fingerprint import calcular_fingerprint, marcar_resultado
+from shared_cache import versao_funcao
+
+POLITICAS = ["lru", "lfu"]
+
+class _Entrada:
+    """Resultado serializado e seus metadados de uso"""
+    
+    __slots__ = ('dados', 'funcao', 'expira', 'acessos')
+    
+    def __init__(self, dados: bytes, funcao: str, expira: Optional[float]):
+        self.dados = dados
+        self.funcao = funcao
+        self.expira = expira
+        self.acessos = 1
+
+class GerenciadorCache:
+    """Cache LRU/LFU de resultados com orçamento global em bytes"""
+    
+    def __init__(self, max_bytes: int, politica: str = "lru"):
+        if politica not in POLITICAS:
+            raise ValueError(f"❌ Política de cache desconhecida: {politica}")
+        
+        self.max_bytes = max_bytes
+        self.politica = politica
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_usados = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def obter(self, chave: str) -> tuple:
+        """
+        Busca um resultado.
+        
+        Args:
+            chave: Chave da chamada
+        
+        Returns:
+            Tupla (encontrado, valor); o valor é uma cópia nova a cada leitura
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada.expira is not None and entrada.expira <= time.time():
+                self._remover(chave)
+                entrada = None
+            
+            if entrada is None:
+                self.misses += 1
+                return False, None
+            
+            self._entradas.move_to_end(chave)
+            entrada.acessos += 1
+            self.hits += 1
+            dados = entrada.dados
+        
+        return True, pickle.loads(dados)
+    
+    def guardar(self, chave: str, funcao: str, valor, ttl: float = None) -> None:
+        """
+        Guarda um resultado, despejando entradas se o orçamento estourar.
+        
+        Resultados que não podem ser serializados (ou maiores que o
+        orçamento inteiro) simplesmente não são guardados.
+        
+        Args:
+            chave: Chave da chamada
+            funcao: Nome da função (para as estatísticas)
+            valor: Resultado da função
+            ttl: Validade em segundos
+        """
+        try:
+            dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        
+        if len(dados) > self.max_bytes:
+            return
+        
+        with self._lock:
+            if chave in self._entradas:
+                self._remover(chave)
+            
+            self._entradas[chave] = _Entrada(dados, funcao, time.time() + ttl if ttl else None)
+            self.bytes_usados += len(dados)
+            
+            while self.bytes_usados > self.max_bytes:
+                self._remover(self._escolher_vitima(ignorar=chave))
+                self.evictions += 1
+    
+    def _escolher_vitima(self, ignorar: str) -> str:
+        """Entrada a despejar: a menos recente (LRU) ou a menos acessada (LFU)"""
+        candidatas = (c for c in self._entradas if c != ignorar)
+        if self.politica == "lru":
+            return next(candidatas)
+        # Empates no LFU ficam com a menos recente (ordem do OrderedDict)
+        return min(candidatas, key=lambda c: self._entradas[c].acessos)
+    
+    def _remover(self, chave: str) -> None:
+        entrada = self._entradas.pop(chave)
+        self.bytes_usados -= len(entrada.dados)
+    
+    def limpar(self) -> None:
+        """Remove todas as entradas"""
+        with self._lock:
+            self._entradas.clear()
+            self.bytes_usados = 0
+    
+    def estatisticas(self) -> dict:
+        """
+        Retorna uso, contadores e ocupação por função.
+        
+        Returns:
+            Dicionário com itens, bytes_usados, max_bytes, politica, hits,
+            misses, evictions e por_funcao ({função: {'itens', 'bytes'}})
+        """
+        with self._lock:
+            por_funcao = {}
+            for entrada in self._entradas.values():
+                uso = por_funcao.setdefault(entrada.funcao, {'itens': 0, 'bytes': 0})
+                uso['itens'] += 1
+                uso['bytes'] += len(entrada.dados)
+            
+            return {
+                'itens': len(self._entradas),
+                'bytes_usados': self.bytes_usados,
+                'max_bytes': self.max_bytes,
+                'politica': self.politica,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'por_funcao': por_funcao
+            }
+
+# Instância global (compartilhada entre sessões do mesmo processo)
+GERENCIADOR_CACHE = GerenciadorCache(
+    CACHE_CONFIG.MEMORY_CACHE_MAX_BYTES,
+    CACHE_CONFIG.MEMORY_CACHE_POLICY
+)
+
+def cache_memoria(funcao: Callable = None, *, ttl: float = None):
+    """
+    Guarda os resultados da função no GERENCIADOR_CACHE.
+    
+    DataFrames nos argumentos entram na chave pela versão, quando marcados
+    (ver fingerprint); DataFrames devolvidos são marcados com a chave da
+    chamada, então passá-los a outra função em cache também não percorre
+    as linhas.
+    
+    Args:
+        funcao: Função decorada (uso como @cache_memoria)
+        ttl: Validade em segundos (uso como @cache_memoria(ttl=...))
+    
+    Returns:
+        Função decorada
+    """
+    if funcao is None:
+        return lambda f: cache_memoria(f, ttl=ttl)
+    
+    nome = f"{funcao.__module__}.{funcao.__qualname__}"
+    # A versão do código entra na chave: editar a função (hot reload do
+    # Streamlit) não reaproveita resultados antigos
+    prefixo = f"{nome}:{versao_funcao(funcao)}"
+    
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        chave = f"{prefixo}:{calcular_fingerprint(*args, **kwargs)}"
+        
+        encontrado, valor = GERENCIADOR_CACHE.obter(chave)
+        if encontrado:
+            return marcar_resultado(valor, chave)
+        
+        valor = funcao(*args, **kwargs)
+        GERENCIADOR_CACHE.guardar(chave, nome, valor, ttl)
+        return marcar_resultado(valor, chave)
+    
+    return wrapper
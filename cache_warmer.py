@@ -0,0 +1,156 @@
+"""Aquecimento dos caches na subida do servidor ou na troca do dataset"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import pandas as pd
+
+from settings import DASHBOARD_CONFIG
+from data_loader import calcular_estatisticas_gerais
+from data_processor import aplicar_filtros
+from shared_cache import versao_arquivo
+from engine import (
+    PARAMETROS_PADRAO,
+    completar_filtros,
+    responder_pergunta_1,
+    responder_pergunta_2,
+    responder_pergunta_3,
+    responder_pergunta_5,
+    responder_pergunta_6,
+    treinar_big_spender
+)
+
+logger = logging.getLogger(__name__)
+
+class _FiltroAvisoContexto(logging.Filter):
+    """Descarta o aviso "missing ScriptRunContext" vindo das threads de aquecimento"""
+    
+    def filter(self, registro: logging.LogRecord) -> bool:
+        return not registro.threadName.startswith("aquecimento")
+
+# As threads não pertencem a nenhuma sessão (não devem desenhar na página de
+# ninguém), então o Streamlit avisa a cada chamada st.* feita por elas
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+    _FiltroAvisoContexto()
+)
+
+# Versões do dataset já aquecidas (ou em aquecimento) neste processo
+_aquecimentos = {}
+_lock = threading.Lock()
+
+def gerar_especificacoes_padrao(df: pd.DataFrame) -> List[dict]:
+    """
+    Gera as combinações de filtros mais comuns.
+    
+    Args:
+        df: DataFrame completo
+    
+    Returns:
+        Lista com o estado padrão da sidebar (tudo selecionado), cada estação
+        isolada e cada categoria isolada
+    """
+    return (
+        [{}] +
+        [{'estacoes': [estacao]} for estacao in sorted(df["Season"].unique())] +
+        [{'categorias': [categoria]} for categoria in sorted(df["Category"].unique())]
+    )
+
+def aquecer_especificacao(df: pd.DataFrame, filtros: dict) -> None:
+    """
+    Executa, para uma especificação, as mesmas chamadas em cache da página.
+    
+    Os parâmetros são os padrões dos widgets das perguntas, de modo que a
+    primeira visita com esses filtros encontre tudo pronto.
+    
+    Args:
+        df: DataFrame completo
+        filtros: Campos de criar_sidebar (ausentes = sem filtro)
+    """
+    filtros = completar_filtros(df, filtros)
+    df_filtrado = aplicar_filtros(
+        df,
+        filtros['categorias'],
+        filtros['generos'],
+        filtros['faixa_etaria'],
+        filtros['estacoes']
+    )
+    if len(df_filtrado) == 0:
+        return
+    
+    calcular_estatisticas_gerais(df_filtrado)
+    responder_pergunta_1(
+        df_filtrado,
+        PARAMETROS_PADRAO['percentil_big_spender'],
+        PARAMETROS_PADRAO['bins_histograma']
+    )
+    responder_pergunta_2(df_filtrado, PARAMETROS_PADRAO['n_clusters'])
+    responder_pergunta_3(df_filtrado)  # também cobre a pergunta 4
+    responder_pergunta_5(df_filtrado, PARAMETROS_PADRAO['percentil_persona'])
+    responder_pergunta_6(df_filtrado)
+    treinar_big_spender(df_filtrado, df)
+
+def _executar(versao: str, df: pd.DataFrame, especificacoes: List[dict], workers: int) -> None:
+    """Aquece todas as especificações com paralelismo limitado"""
+    def tarefa(filtros):
+        try:
+            aquecer_especificacao(df, filtros)
+        except Exception:
+            # Falha no aquecimento não pode derrubar o servidor; a página
+            # simplesmente calcula sob demanda
+            logger.exception("Falha ao aquecer caches para %s", filtros)
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aquecimento") as pool:
+        list(pool.map(tarefa, especificacoes))
+    
+    logger.info("Caches aquecidos: %d especificações (%s)", len(especificacoes), versao)
+
+def aquecer_caches(
+    caminho: str,
+    df: pd.DataFrame,
+    especificacoes: Optional[List[dict]] = None,
+    workers: int = None
+) -> Optional[threading.Thread]:
+    """
+    Dispara o aquecimento em segundo plano, uma vez por versão do dataset.
+    
+    Deve ser chamado depois que a página foi renderizada: o aquecimento
+    importa o scikit-learn e o LightGBM e treina modelos, o que disputaria
+    CPU e memória com a primeira renderização.
+    
+    Usa threads (e não processos) porque o cache em memória (cache_manager)
+    vive no processo do servidor: é ali que a página vai procurá-lo.
+    
+    Args:
+        caminho: Caminho do CSV (identifica a versão do dataset)
+        df: DataFrame completo já carregado
+        especificacoes: Filtros a aquecer (padrão: DASHBOARD_CONFIG.WARMUP_FILTERS
+            ou gerar_especificacoes_padrao)
+        workers: Threads simultâneas (padrão: DASHBOARD_CONFIG.WARMUP_WORKERS)
+    
+    Returns:
+        Thread do aquecimento, ou None se esta versão já foi aquecida ou o
+        aquecimento está desligado
+    """
+    if not DASHBOARD_CONFIG.WARMUP_ENABLED:
+        return None
+    
+    versao = versao_arquivo(caminho)
+    
+    with _lock:
+        if versao in _aquecimentos:
+            return None
+        
+        if especificacoes is None:
+            especificacoes = DASHBOARD_CONFIG.WARMUP_FILTERS or gerar_especificacoes_padrao(df)
+        
+        thread = threading.Thread(
+            target=_executar,
+            args=(versao, df, especificacoes, workers or DASHBOARD_CONFIG.WARMUP_WORKERS),
+            name="aquecimento-caches",
+            daemon=True
+        )
+        _aquecimentos[versao] = thread
+    
+    thread.start()
+    return thread
@@ -0,0 +1,132 @@
+"""Cancelamento cooperativo de cálculos longos
+
+Quando um widget muda no meio de uma execução, o Streamlit pede um rerun, mas
+o pedido só é atendido no próximo comando st.*: um treino do LightGBM ou um
+KMeans em andamento iria até o fim antes do rerun começar. Os cálculos longos
+(clustering.py, prediction.py) chamam verificar_cancelamento entre etapas
+(inicializações do KMeans, iterações do k-prototypes, rodadas de boosting).
+
+Dentro de acompanhar_progresso, cada verificação atualiza uma barra
+st.progress. A atualização é um ponto de interrupção do Streamlit: se a sessão
+já pediu um rerun, a exceção de controle do Streamlit interrompe o cálculo ali
+mesmo e nada é guardado em cache. Fora de uma sessão (motor headless,
+aquecimento de caches) as verificações só respeitam tokens cancelados
+explicitamente (TokenCancelamento.cancelar).
+"""
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+class OperacaoCancelada(Exception):
+    """Cálculo abandonado por um TokenCancelamento cancelado"""
+
+class TokenCancelamento:
+    """Sinal de cancelamento verificado entre as etapas de um cálculo"""
+    
+    def __init__(self, progresso=None, texto: str = ""):
+        """
+        Args:
+            progresso: Barra st.progress atualizada a cada verificação (opcional)
+            texto: Texto exibido na barra
+        """
+        self._cancelado = threading.Event()
+        self._progresso = progresso
+        self._texto = texto
+        self._fracao = 0.0
+    
+    def cancelar(self) -> None:
+        """Pede o cancelamento (seguro entre threads)"""
+        self._cancelado.set()
+    
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado.is_set()
+    
+    def verificar(self, fracao: Optional[float] = None) -> None:
+        """
+        Ponto de cancelamento.
+        
+        Args:
+            fracao: Progresso do cálculo (0.0 a 1.0); None mantém o anterior
+        
+        Raises:
+            OperacaoCancelada: Se o token foi cancelado
+        """
+        if self._cancelado.is_set():
+            raise OperacaoCancelada()
+        
+        if fracao is not None:
+            self._fracao = min(max(fracao, 0.0), 1.0)
+        if self._progresso is not None:
+            # Com um rerun pendente, o Streamlit interrompe a execução aqui
+            self._progresso.progress(self._fracao, text=self._texto)
+
+_local = threading.local()
+
+@contextmanager
+def escopo_cancelamento(token: TokenCancelamento):
+    """
+    Torna o token o alvo de verificar_cancelamento na thread atual.
+    
+    Args:
+        token: Token verificado pelos cálculos dentro do bloco
+    """
+    anterior = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = anterior
+
+def verificar_cancelamento(fracao: Optional[float] = None) -> None:
+    """
+    Ponto de cancelamento dos cálculos longos (não faz nada sem token ativo).
+    
+    Args:
+        fracao: Progresso do cálculo (0.0 a 1.0)
+    
+    Raises:
+        OperacaoCancelada: Se o token ativo foi cancelado
+    """
+    token = getattr(_local, "token", None)
+    if token is not None:
+        token.verificar(fracao)
+
+def callback_lightgbm(inicio: float = 0.0, fim: float = 1.0) -> Callable:
+    """
+    Callback do LightGBM que verifica o cancelamento a cada rodada de boosting.
+    
+    Args:
+        inicio: Fração do progresso no início do treino
+        fim: Fração do progresso ao fim do treino
+    
+    Returns:
+        Callback para fit(callbacks=[...]) / lgb.train(callbacks=[...])
+    """
+    def _callback(env) -> None:
+        rodadas = max(env.end_iteration - env.begin_iteration, 1)
+        feitas = env.iteration - env.begin_iteration + 1
+        verificar_cancelamento(inicio + (fim - inicio) * feitas / rodadas)
+    
+    return _callback
+
+@contextmanager
+def acompanhar_progresso(texto: str):
+    """
+    Barra de progresso da execução atual do script; os cálculos do bloco
+    verificam o cancelamento nela.
+    
+    Args:
+        texto: Texto exibido na barra
+    
+    Yields:
+        TokenCancelamento ativo no bloco
+    """
+    import streamlit as st
+    
+    barra = st.progress(0.0, text=texto)
+    try:
+        with escopo_cancelamento(TokenCancelamento(barra, texto)) as token:
+            yield token
+    finally:
+        barra.empty()
@@ -1,36 +1,185 @@
-"""Funções para criar gráficos"""
-import matplotlib.pyplot as plt
+"""Funções para criar gráficos
+
+Os gráficos usam a API orientada a objetos do matplotlib (Figure/Axes, sem
+pyplot), então podem ser renderizados em paralelo em processos separados.
+Recebem dados já resumidos no processo do servidor (histogramas, resumos de
+boxplot, pontos ou grades de calcular_pontos_dispersao), nunca o DataFrame
+completo, de modo que o custo de enviá-los ao pool não cresce com o dataset.
+"""
+import matplotlib
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+import numpy as np
 import seaborn as sns
 import pandas as pd
-from typing import Tuple
+from typing import List, Tuple
 
 def configurar_estilo_plots():
     """Configura estilo global dos plots"""
     sns.set_style("whitegrid")
-    plt.rcParams['figure.facecolor'] = 'white'
-    plt.rcParams['axes.facecolor'] = 'white'
+    matplotlib.rcParams['figure.facecolor'] = 'white'
+    matplotlib.rcParams['axes.facecolor'] = 'white'
+
+def desenhar_densidade(
+    ax: Axes,
+    grade: dict,
+    palette: str = None,
+    titulo_legenda: str = None,
+    tamanho_max: float = 300
+) -> None:
+    """
+    Desenha uma grade de densidade como pontos ponderados.
+    
+    Cada célula não vazia vira um ponto no seu centro, com área proporcional à
+    contagem; o custo depende do tamanho da grade, não do número de linhas.
+    
+    Args:
+        ax: Eixo matplotlib
+        grade: Resultado de calcular_grade_densidade
+        palette: Paleta seaborn para os grupos
+        titulo_legenda: Título da legenda (None = sem legenda)
+        tamanho_max: Área do ponto da célula mais densa
+    """
+    contagens = grade['contagens']
+    x_centros = (grade['x_edges'][:-1] + grade['x_edges'][1:]) / 2
+    y_centros = (grade['y_edges'][:-1] + grade['y_edges'][1:]) / 2
+    cores = sns.color_palette(palette, len(grade['grupos']))
+    # Com hue e sem linhas a grade não tem grupos (0 × bins × bins)
+    maximo = max(contagens.max() if contagens.size else 0, 1)
+    
+    for g, (grupo, cor) in enumerate(zip(grade['grupos'], cores)):
+        ix, iy = np.nonzero(contagens[g])
+        ax.scatter(
+            x_centros[ix],
+            y_centros[iy],
+            s=tamanho_max * np.sqrt(contagens[g, ix, iy] / maximo),
+            color=cor,
+            alpha=0.6,
+            edgecolors='none',
+            label=str(grupo)
+        )
+    
+    if titulo_legenda and grade['grupos']:
+        ax.legend(title=titulo_legenda)
+
+def desenhar_dispersao(
+    ax: Axes,
+    dispersao: dict,
+    palette: str = None,
+    tamanho: float = 80,
+    tamanho_max: float = 300
+) -> None:
+    """
+    Desenha um gráfico de dispersão: os pontos ou, para muitas linhas, a grade.
+    
+    Args:
+        ax: Eixo matplotlib
+        dispersao: Resultado de calcular_pontos_dispersao
+        palette: Paleta seaborn para os grupos
+        tamanho: Área de cada ponto
+        tamanho_max: Área do ponto da célula mais densa (grade)
+    """
+    if 'grade' in dispersao:
+        desenhar_densidade(
+            ax, dispersao['grade'], 
+            palette=palette, 
+            titulo_legenda=dispersao['hue'], 
+            tamanho_max=tamanho_max
+        )
+        return
+    
+    sns.scatterplot(
+        data=dispersao['pontos'],
+        x=dispersao['x'],
+        y=dispersao['y'],
+        hue=dispersao['hue'],
+        palette=palette,
+        s=tamanho,
+        alpha=0.6,
+        ax=ax
+    )
+
+def dispersao_vazia(dispersao: dict) -> bool:
+    """Indica se o resultado de calcular_pontos_dispersao não tem nenhum ponto"""
+    if 'grade' in dispersao:
+        return dispersao['grade']['contagens'].sum() == 0
+    return dispersao['pontos'].empty
+
+def desenhar_histograma(ax: Axes, histograma: dict, **kwargs) -> None:
+    """
+    Desenha um histograma a partir de contagens pré-calculadas.
+    
+    Args:
+        ax: Eixo matplotlib
+        histograma: Dicionário com 'contagens' e 'edges'
+        **kwargs: Estilo repassado para ax.bar
+    """
+    edges = histograma['edges']
+    ax.bar(
+        edges[:-1], 
+        histograma['contagens'], 
+        width=np.diff(edges), 
+        align='edge', 
+        **kwargs
+    )
+
+def desenhar_boxplots(
+    ax: Axes,
+    resumo: List[dict],
+    posicoes: list,
+    cores: list,
+    largura: float = 0.8
+) -> dict:
+    """
+    Desenha boxplots a partir de resumos de cinco números.
+    
+    Args:
+        ax: Eixo matplotlib
+        resumo: Resumos no formato Axes.bxp (calcular_resumo_boxplot)
+        posicoes: Posição de cada caixa no eixo X
+        cores: Cor de cada caixa
+        largura: Largura das caixas
+        
+    Returns:
+        Artistas criados por Axes.bxp
+    """
+    artistas = ax.bxp(
+        resumo,
+        positions=posicoes,
+        widths=largura,
+        patch_artist=True,
+        medianprops={'color': '0.25'},
+        flierprops={'marker': 'd', 'markerfacecolor': '0.25', 'markersize': 5}
+    )
+    
+    for caixa, cor in zip(artistas['boxes'], cores):
+        caixa.set_facecolor(cor)
+    
+    return artistas
 
 def criar_grafico_distribuicao(
-    df: pd.DataFrame, 
+    histograma: dict, 
     threshold: float,
     figsize: Tuple[int, int] = (10, 4)
-) -> plt.Figure:
+) -> Figure:
     """
     Cria gráfico de distribuição de valores de compra.
     
     Args:
-        df: DataFrame com os dados
+        histograma: Contagens pré-calculadas (calcular_histograma)
         threshold: Linha de corte
         figsize: Tamanho da figura
         
     Returns:
         Figura matplotlib
     """
-    fig, ax = plt.subplots(figsize=figsize)
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
     
-    ax.hist(
-        df["Purchase Amount (USD)"], 
-        bins=50, 
+    desenhar_histograma(
+        ax,
+        histograma,
         color='skyblue', 
         edgecolor='black', 
         alpha=0.7
@@ -49,45 +198,36 @@ def criar_grafico_distribuicao(
     ax.set_title('Distribuição de Valores de Compra', fontsize=13, fontweight='bold')
     ax.legend()
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 def criar_grafico_clusters(
-    df: pd.DataFrame,
+    dispersao: dict,
     figsize: Tuple[int, int] = (10, 6)
-) -> plt.Figure:
+) -> Figure:
     """
     Cria gráfico de segmentação por clusters.
     
     Args:
-        df: DataFrame com coluna 'Cluster'
+        dispersao: Idade × valor por 'Cluster', sem o cluster -1
+            (calcular_pontos_dispersao)
         figsize: Tamanho da figura
         
     Returns:
         Figura matplotlib
     """
-    # Filtrar clusters válidos
-    df_plot = df[df["Cluster"] != -1]
-    
-    if df_plot.empty:
-        fig, ax = plt.subplots(figsize=figsize)
+    if dispersao_vazia(dispersao):
+        fig = Figure(figsize=figsize)
+        ax = fig.subplots()
         ax.text(0.5, 0.5, "Dados insuficientes para visualização de clusters", 
                 ha='center', va='center', fontsize=12)
         ax.axis('off')
         return fig
     
-    fig, ax = plt.subplots(figsize=figsize)
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
     
-    sns.scatterplot(
-        data=df_plot,
-        x="Age",
-        y="Purchase Amount (USD)",
-        hue="Cluster",
-        palette="Set2",
-        s=100,
-        alpha=0.6,
-        ax=ax
-    )
+    desenhar_dispersao(ax, dispersao, palette="Set2", tamanho=100)
     
     ax.set_title(
         'Segmentação de Clientes: Idade × Valor de Compra', 
@@ -97,7 +237,7 @@ def criar_grafico_clusters(
     ax.set_xlabel('Idade', fontsize=11)
     ax.set_ylabel('Valor da Compra (USD)', fontsize=11)
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 def criar_grafico_barras_horizontal(
@@ -106,7 +246,7 @@ def criar_grafico_barras_horizontal(
     xlabel: str = 'Valor',
     color: str = 'coral',
     figsize: Tuple[int, int] = (8, 5)
-) -> plt.Figure:
+) -> Figure:
     """
     Cria gráfico de barras horizontal.
     
@@ -120,9 +260,11 @@ def criar_grafico_barras_horizontal(
     Returns:
         Figura matplotlib
     """
-    fig, ax = plt.subplots(figsize=figsize)
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
     
-    series.plot(kind='barh', color=color, ax=ax)
+    ax.barh(series.index.astype(str), series.to_numpy(), color=color)
+    ax.set_ylabel(series.index.name or '')
     ax.set_xlabel(xlabel, fontsize=11)
     ax.set_title(titulo, fontsize=13, fontweight='bold')
     
@@ -130,7 +272,7 @@ def criar_grafico_barras_horizontal(
     for i, v in enumerate(series):
         ax.text(v, i, f' {v:,.0f}', va='center', fontsize=9)
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 def criar_grafico_pizza(
@@ -138,7 +280,7 @@ def criar_grafico_pizza(
     titulo: str,
     colors: list = None,
     figsize: Tuple[int, int] = (6, 4)
-) -> plt.Figure:
+) -> Figure:
     """
     Cria gráfico de pizza.
     
@@ -154,12 +296,13 @@ def criar_grafico_pizza(
     if colors is None:
         colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99']
     
-    fig, ax = plt.subplots(figsize=figsize)
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
     
-    series.plot(
-        kind='pie', 
+    ax.pie(
+        series.to_numpy(), 
+        labels=series.index.astype(str), 
         autopct='%1.1f%%', 
-        ax=ax, 
         colors=colors,
         startangle=90
     )
@@ -167,70 +310,61 @@ def criar_grafico_pizza(
     ax.set_ylabel('')
     ax.set_title(titulo, fontsize=12, fontweight='bold')
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 def criar_scatter_idade_valor(
-    df: pd.DataFrame,
-    hue_col: str = "Gender",
+    dispersao: dict,
     figsize: Tuple[int, int] = (8, 6)
-) -> plt.Figure:
+) -> Figure:
     """
     Cria scatter plot de idade vs valor.
     
     Args:
-        df: DataFrame com os dados
-        hue_col: Coluna para colorir pontos
+        dispersao: Idade × valor, colorido por 'hue' (calcular_pontos_dispersao)
         figsize: Tamanho da figura
         
     Returns:
         Figura matplotlib
     """
-    fig, ax = plt.subplots(figsize=figsize)
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
     
-    sns.scatterplot(
-        data=df,
-        x="Age",
-        y="Purchase Amount (USD)",
-        hue=hue_col,
-        alpha=0.6,
-        s=80,
-        ax=ax
-    )
+    desenhar_dispersao(ax, dispersao, tamanho=80, tamanho_max=240)
     
     ax.set_title(
-        f'Idade × Valor × {hue_col}', 
+        f'Idade × Valor × {dispersao["hue"]}', 
         fontsize=13, 
         fontweight='bold'
     )
     ax.set_xlabel('Idade', fontsize=11)
     ax.set_ylabel('Valor da Compra (USD)', fontsize=11)
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 def criar_boxplot_genero(
-    df: pd.DataFrame,
+    resumo: List[dict],
     figsize: Tuple[int, int] = (8, 6)
-) -> plt.Figure:
+) -> Figure:
     """
     Cria boxplot de valores por gênero.
     
     Args:
-        df: DataFrame com os dados
+        resumo: Resumos por gênero (calcular_resumo_boxplot)
         figsize: Tamanho da figura
         
     Returns:
         Figura matplotlib
     """
-    fig, ax = plt.subplots(figsize=figsize)
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
     
-    sns.boxplot(
-        data=df,
-        x="Gender",
-        y="Purchase Amount (USD)",
-        palette="Set3",
-        ax=ax
+    desenhar_boxplots(
+        ax,
+        resumo,
+        posicoes=list(range(len(resumo))),
+        cores=sns.color_palette("Set3", len(resumo))
     )
     
     ax.set_title(
@@ -241,7 +375,88 @@ def criar_boxplot_genero(
     ax.set_xlabel('Gênero', fontsize=11)
     ax.set_ylabel('Valor da Compra (USD)', fontsize=11)
     
-    plt.tight_layout()
+    fig.tight_layout()
+    return fig
+
+def criar_histograma_idade(
+    histograma: dict,
+    figsize: Tuple[int, int] = (6, 4)
+) -> Figure:
+    """
+    Cria histograma de idades.
+    
+    Args:
+        histograma: Contagens pré-calculadas (calcular_histograma)
+        figsize: Tamanho da figura
+        
+    Returns:
+        Figura matplotlib
+    """
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    
+    desenhar_histograma(
+        ax,
+        histograma,
+        color='lightgreen', 
+        edgecolor='black'
+    )
+    
+    ax.set_xlabel('Idade')
+    ax.set_ylabel('Frequência')
+    ax.set_title('Distribuição de Idade', fontweight='bold')
+    
+    fig.tight_layout()
+    return fig
+
+def criar_boxplot_categoria_genero(
+    resumo: List[dict],
+    figsize: Tuple[int, int] = (12, 6)
+) -> Figure:
+    """
+    Cria boxplot de valores por categoria e gênero.
+    
+    Args:
+        resumo: Resumos por (categoria, gênero) (calcular_resumo_boxplot)
+        figsize: Tamanho da figura
+        
+    Returns:
+        Figura matplotlib
+    """
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    
+    categorias = list(dict.fromkeys(item['grupo'][0] for item in resumo))
+    generos = sorted({item['grupo'][1] for item in resumo})
+    paleta = dict(zip(generos, sns.color_palette("pastel", len(generos))))
+    largura = 0.8 / max(len(generos), 1)
+    
+    # Caixas lado a lado dentro de cada categoria (como o hue do seaborn)
+    posicoes = [
+        categorias.index(item['grupo'][0]) 
+        + (generos.index(item['grupo'][1]) - (len(generos) - 1) / 2) * largura
+        for item in resumo
+    ]
+    desenhar_boxplots(
+        ax,
+        resumo,
+        posicoes=posicoes,
+        cores=[paleta[item['grupo'][1]] for item in resumo],
+        largura=largura * 0.9
+    )
+    
+    ax.set_xticks(range(len(categorias)))
+    ax.set_xticklabels(categorias, rotation=45, ha='right')
+    ax.legend(
+        handles=[Rectangle((0, 0), 1, 1, color=cor) for cor in paleta.values()],
+        labels=list(paleta.keys()),
+        title='Gender'
+    )
+    ax.set_title('Valor de Compra por Categoria e Gênero', fontweight='bold')
+    ax.set_xlabel('Categoria')
+    ax.set_ylabel('Valor da Compra (USD)')
+    
+    fig.tight_layout()
     return fig
 
 # Configurar estilo ao importar
@@ -3,8 +3,13 @@ import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans
 import streamlit as st
+from cache_manager import cache_memoria
+from shared_cache import cache_compartilhado
+from settings import MODEL_CONFIG
+from cancelamento import verificar_cancelamento
+from instrumentation import instrumentar
 
-@st.cache_data
+@instrumentar
 def realizar_clustering(
     df: pd.DataFrame, 
     n_clusters: int,
@@ -13,17 +18,197 @@ def realizar_clustering(
     """
     Realiza clustering KMeans nos dados.
     
+    Features que não são colunas de df vêm da feature store de clientes
+    (ex.: "gasto_total", "frequencia_anual") e são anexadas antes do cache,
+    então os agregados não são recalculados a cada página.
+    
     Args:
         df: DataFrame com os dados
         n_clusters: Número de clusters
         features: Lista de features para clustering
+            (padrão: MODEL_CONFIG.CLUSTER_FEATURES)
         
     Returns:
         DataFrame com coluna 'Cluster' adicionada
     """
     if features is None:
-        features = ["Age", "Purchase Amount (USD)"]
+        features = list(MODEL_CONFIG.CLUSTER_FEATURES)
+    
+    da_store = [f for f in features if f not in df.columns]
+    if da_store:
+        from feature_store import anexar_features
+        df = anexar_features(df, da_store)
+    
+    return _agrupar(df, n_clusters, list(features))
+
+def codificar_mistas(df_cluster: pd.DataFrame, categoricas: list) -> np.ndarray:
+    """
+    Codifica colunas categóricas como inteiros (uma coluna por feature).
+    
+    Args:
+        df_cluster: Linhas sem nulos
+        categoricas: Colunas categóricas
+    
+    Returns:
+        Matriz int32 (linhas × colunas) com os códigos de cada categoria
+    """
+    codigos = np.empty((len(df_cluster), len(categoricas)), dtype=np.int32)
+    for j, coluna in enumerate(categoricas):
+        codigos[:, j] = pd.factorize(df_cluster[coluna])[0]
+    return codigos
+
+def _distancias(
+    X: np.ndarray,
+    normas: np.ndarray,
+    C: np.ndarray,
+    centros: np.ndarray,
+    modas: np.ndarray,
+    peso: float
+) -> np.ndarray:
+    """Distância de cada linha a cada protótipo (linhas × clusters)"""
+    # Categorias diferentes da moda: uma comparação de inteiros por coluna
+    # (sem one-hot), acumulada em uint8
+    diferentes = np.zeros((len(C), len(modas)), dtype=np.uint8)
+    for j in range(C.shape[1]):
+        diferentes += C[:, j][:, None] != modas[:, j][None, :]
+    
+    d = diferentes * peso
+    if X.shape[1]:
+        d += normas[:, None] - 2 * X @ centros.T + (centros ** 2).sum(axis=1)[None, :]
+    return d
+
+def _atualizar_prototipos(
+    X: np.ndarray,
+    C: np.ndarray,
+    rotulos: np.ndarray,
+    n_clusters: int,
+    cardinalidades: list
+) -> tuple:
+    """Médias das numéricas e modas das categóricas de cada cluster"""
+    tamanhos = np.bincount(rotulos, minlength=n_clusters)
+    centros = np.stack([
+        np.bincount(rotulos, weights=X[:, j], minlength=n_clusters) / np.maximum(tamanhos, 1)
+        for j in range(X.shape[1])
+    ], axis=1) if X.shape[1] else np.empty((n_clusters, 0))
+    
+    # Contagens cluster × categoria via bincount do código combinado
+    modas = np.empty((n_clusters, C.shape[1]), dtype=np.int32)
+    for j, cardinalidade in enumerate(cardinalidades):
+        contagens = np.bincount(
+            rotulos * cardinalidade + C[:, j],
+            minlength=n_clusters * cardinalidade
+        ).reshape(n_clusters, cardinalidade)
+        modas[:, j] = contagens.argmax(axis=1)
+    
+    return centros, modas, tamanhos
+
+def _iterar_prototipos(
+    X: np.ndarray,
+    C: np.ndarray,
+    centros: np.ndarray,
+    modas: np.ndarray,
+    peso: float,
+    max_iter: int,
+    tol: float,
+    progresso: tuple = (0.0, 1.0)
+) -> tuple:
+    """Iterações de Lloyd a partir de protótipos iniciais: (rótulos, custo, centros, modas)"""
+    normas = (X ** 2).sum(axis=1)
+    cardinalidades = [int(C[:, j].max()) + 1 for j in range(C.shape[1])]
+    n_clusters = len(modas)
+    
+    # Rótulos e custo sempre em relação aos protótipos devolvidos (também
+    # com max_iter=0, quando são os iniciais)
+    d = _distancias(X, normas, C, centros, modas, peso)
+    rotulos = d.argmin(axis=1)
     
+    inicio, fim = progresso
+    for iteracao in range(max_iter):
+        verificar_cancelamento(inicio + (fim - inicio) * iteracao / max_iter)
+        centros, modas, tamanhos = _atualizar_prototipos(X, C, rotulos, n_clusters, cardinalidades)
+        # Cluster vazio: reinicia nos pontos mais distantes dos seus protótipos
+        vazios = np.flatnonzero(tamanhos == 0)
+        if len(vazios):
+            distantes = np.argsort(d[np.arange(len(C)), rotulos])[::-1][:len(vazios)]
+            centros[vazios], modas[vazios] = X[distantes], C[distantes]
+        
+        d = _distancias(X, normas, C, centros, modas, peso)
+        novos = d.argmin(axis=1)
+        mudaram = np.count_nonzero(novos != rotulos)
+        rotulos = novos
+        # Convergiu: quase nenhuma linha mudou de cluster
+        if mudaram <= tol * len(C):
+            break
+    
+    custo = d[np.arange(len(C)), rotulos].sum()
+    return rotulos, custo, centros, modas
+
+def k_prototypes(
+    X: np.ndarray,
+    C: np.ndarray,
+    n_clusters: int,
+    peso: float,
+    n_init: int = 10,
+    max_iter: int = 100,
+    tol: float = 1e-4,
+    amostra: int = 50_000,
+    random_state: int = 42
+) -> np.ndarray:
+    """
+    Clustering k-prototypes (Huang): médias nas features numéricas e modas
+    nas categóricas.
+    
+    A distância é a euclidiana ao quadrado nas numéricas mais peso × número
+    de categorias diferentes da moda. Memória e tempo crescem com
+    linhas × features × clusters, não com a largura de um one-hot. Acima de
+    `amostra` linhas, as inicializações competem em uma amostra e só a
+    melhor é refinada no conjunto completo.
+    
+    Args:
+        X: Features numéricas padronizadas (linhas × p)
+        C: Códigos inteiros das categóricas (linhas × q), de codificar_mistas
+        n_clusters: Número de clusters
+        peso: Peso de cada categoria diferente
+        n_init: Inicializações (fica a de menor custo, como no KMeans)
+        max_iter: Iterações máximas por inicialização
+        tol: Fração de linhas que mudam de cluster abaixo da qual para
+        amostra: Linhas usadas para comparar as inicializações
+        random_state: Seed para reprodutibilidade
+    
+    Returns:
+        Rótulo (0 a n_clusters - 1) de cada linha
+    """
+    rng = np.random.default_rng(random_state)
+    linhas = np.arange(len(C))
+    if len(C) > amostra:
+        linhas = np.sort(rng.choice(len(C), amostra, replace=False))
+    X_inicio, C_inicio = X[linhas], C[linhas]
+    
+    refinar = len(linhas) < len(C)
+    etapas = n_init + refinar
+    
+    melhor = None
+    for i in range(n_init):
+        sementes = rng.choice(len(C_inicio), n_clusters, replace=False)
+        resultado = _iterar_prototipos(
+            X_inicio, C_inicio, X_inicio[sementes], C_inicio[sementes], peso, max_iter, tol,
+            progresso=(i / etapas, (i + 1) / etapas)
+        )
+        if melhor is None or resultado[1] < melhor[1]:
+            melhor = resultado
+    
+    rotulos, _, centros, modas = melhor
+    if refinar:
+        rotulos = _iterar_prototipos(
+            X, C, centros, modas, peso, max_iter, tol,
+            progresso=(n_init / etapas, 1.0)
+        )[0]
+    return rotulos
+
+@cache_memoria
+@cache_compartilhado
+def _agrupar(df: pd.DataFrame, n_clusters: int, features: list) -> pd.DataFrame:
+    """Clustering (em cache) sobre as features já presentes em df"""
     # Pré-processamento: Selecionar features e remover NaNs
     df_cluster = df[features].dropna().copy()
     
@@ -32,14 +217,37 @@ def realizar_clustering(
         df['Cluster'] = -1
         return df
     
+    numericas = [f for f in features if pd.api.types.is_numeric_dtype(df_cluster[f])]
+    categoricas = [f for f in features if f not in numericas]
+    
     # Normalização (opcional, mas recomendado para KMeans)
     from sklearn.preprocessing import StandardScaler
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(df_cluster)
+    X_scaled = (
+        StandardScaler().fit_transform(df_cluster[numericas])
+        if numericas else np.empty((len(df_cluster), 0))
+    )
     
-    # Aplicação do KMeans
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    df_cluster['Cluster'] = kmeans.fit_predict(X_scaled)
+    if categoricas:
+        # Tipos mistos: k-prototypes sobre os códigos inteiros
+        df_cluster['Cluster'] = k_prototypes(
+            X_scaled,
+            codificar_mistas(df_cluster, categoricas),
+            n_clusters,
+            MODEL_CONFIG.CLUSTER_CATEGORICAL_WEIGHT,
+            max_iter=MODEL_CONFIG.CLUSTER_MAX_ITER,
+            random_state=42
+        )
+    else:
+        # Aplicação do KMeans: as 10 inicializações rodam uma a uma (mesma
+        # sequência aleatória de n_init=10) para verificar o cancelamento entre elas
+        sementes = np.random.RandomState(42)
+        melhor = None
+        for i in range(10):
+            verificar_cancelamento(i / 10)
+            kmeans = KMeans(n_clusters=n_clusters, random_state=sementes, n_init=1).fit(X_scaled)
+            if melhor is None or kmeans.inertia_ < melhor.inertia_:
+                melhor = kmeans
+        df_cluster['Cluster'] = melhor.labels_
     
     # Mapear clusters de volta ao DataFrame original
     df = df.merge(
@@ -52,7 +260,8 @@ def realizar_clustering(
     
     return df
 
-@st.cache_data
+@cache_memoria
+@cache_compartilhado
 def calcular_estatisticas_clusters(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calcula estatísticas descritivas para cada cluster.
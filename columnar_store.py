@@ -0,0 +1,150 @@
+"""Armazenamento colunar mapeado em memória (uma cópia por máquina)
+
+Cada coluna do dataset é gravada como um .npy: numéricas com o próprio tipo,
+texto como códigos inteiros de um Categorical (categorias no manifesto). Os
+processos do servidor abrem os arquivos com mmap somente leitura, então o
+cache de páginas do sistema guarda uma única cópia, não importa quantos
+workers estejam rodando.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import List
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from settings import DASHBOARD_CONFIG
+from shared_cache import versao_arquivo
+
+ARQUIVO_MANIFESTO = "manifesto.json"
+
+def _tipo_codigos(n_categorias: int) -> np.dtype:
+    """Menor inteiro com sinal que comporta os códigos (-1 = ausente)"""
+    for tipo in (np.int8, np.int16, np.int32):
+        if n_categorias <= np.iinfo(tipo).max:
+            return np.dtype(tipo)
+    return np.dtype(np.int64)
+
+def diretorio_store(csv_path: str, diretorio: str = None) -> str:
+    """
+    Diretório do armazenamento de uma versão do CSV.
+    
+    Args:
+        csv_path: Caminho do CSV de origem
+        diretorio: Diretório base (padrão: DASHBOARD_CONFIG.COLUMNAR_DIR)
+    
+    Returns:
+        Caminho do diretório (muda quando o CSV é substituído)
+    """
+    versao = hashlib.sha1(versao_arquivo(csv_path).encode()).hexdigest()[:16]
+    return os.path.join(diretorio or DASHBOARD_CONFIG.COLUMNAR_DIR, versao)
+
+def gravar_colunas(df: pd.DataFrame, destino: str) -> None:
+    """
+    Grava o DataFrame como colunas .npy + manifesto.
+    
+    O conteúdo é escrito em um diretório temporário e renomeado de uma vez;
+    se outro processo terminar antes, a cópia dele é mantida.
+    
+    Args:
+        df: DataFrame validado
+        destino: Diretório final do armazenamento
+    """
+    base = os.path.dirname(os.path.abspath(destino))
+    os.makedirs(base, exist_ok=True)
+    temporario = tempfile.mkdtemp(dir=base, prefix=".tmp-")
+    
+    try:
+        colunas = []
+        for i, nome in enumerate(df.columns):
+            serie = df[nome]
+            arquivo = f"{i:03d}.npy"
+            spec = {'nome': nome, 'arquivo': arquivo}
+            
+            if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+                spec['tipo'] = 'numerica'
+                valores = serie.to_numpy()
+            else:
+                categorico = pd.Categorical(serie.astype(object).where(serie.notna(), None))
+                spec['tipo'] = 'categorica'
+                spec['categorias'] = [str(c) for c in categorico.categories]
+                valores = categorico.codes.astype(_tipo_codigos(len(categorico.categories)))
+            
+            np.save(os.path.join(temporario, arquivo), np.ascontiguousarray(valores))
+            colunas.append(spec)
+        
+        with open(os.path.join(temporario, ARQUIVO_MANIFESTO), "w", encoding="utf-8") as f:
+            json.dump({'linhas': len(df), 'colunas': colunas}, f, ensure_ascii=False)
+        
+        try:
+            os.rename(temporario, destino)
+        except OSError:
+            # Outro processo publicou esta versão primeiro
+            if not os.path.exists(os.path.join(destino, ARQUIVO_MANIFESTO)):
+                raise
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+
+def mapear_colunas(diretorio: str) -> pd.DataFrame:
+    """
+    Abre o armazenamento como DataFrame sobre os buffers mapeados (sem cópia).
+    
+    Os arrays são somente leitura: operações que criam colunas ou filtram
+    funcionam normalmente; escrever no DataFrame original levanta erro.
+    
+    Args:
+        diretorio: Diretório gravado por gravar_colunas
+    
+    Returns:
+        DataFrame com colunas numéricas e categóricas mapeadas
+    """
+    with open(os.path.join(diretorio, ARQUIVO_MANIFESTO), encoding="utf-8") as f:
+        manifesto = json.load(f)
+    
+    dados = {}
+    for spec in manifesto['colunas']:
+        valores = np.load(os.path.join(diretorio, spec['arquivo']), mmap_mode="r")
+        if spec['tipo'] == 'categorica':
+            valores = pd.Categorical.from_codes(valores, categories=spec['categorias'])
+        dados[spec['nome']] = valores
+    
+    return pd.DataFrame(dados, copy=False)
+
+def _remover_versoes_antigas(destino: str) -> None:
+    """Apaga as versões anteriores (processos que ainda as mapeiam não são afetados)"""
+    base = os.path.dirname(os.path.abspath(destino))
+    for entrada in os.scandir(base):
+        if entrada.is_dir() and not entrada.name.startswith(".") and entrada.path != os.path.abspath(destino):
+            shutil.rmtree(entrada.path, ignore_errors=True)
+
+@st.cache_resource(show_spinner=False)
+def _abrir(csv_path: str, required_cols: tuple, versao: str) -> pd.DataFrame:
+    """Uma instância mapeada por processo e versão do CSV (sem cópia por sessão)"""
+    from data_loader import ler_e_validar
+    
+    destino = diretorio_store(csv_path)
+    if not os.path.exists(os.path.join(destino, ARQUIVO_MANIFESTO)):
+        gravar_colunas(ler_e_validar(csv_path, list(required_cols)), destino)
+        _remover_versoes_antigas(destino)
+    return mapear_colunas(destino)
+
+def abrir_colunar(csv_path: str, required_cols: List[str]) -> pd.DataFrame:
+    """
+    Carrega o dataset pelo armazenamento colunar, criando-o na primeira vez.
+    
+    Args:
+        csv_path: Caminho do CSV de origem
+        required_cols: Lista de colunas obrigatórias
+    
+    Returns:
+        DataFrame compartilhado (somente leitura) sobre as colunas mapeadas
+    
+    Raises:
+        FileNotFoundError: Se o arquivo não existir
+        ValueError: Se colunas obrigatórias estiverem ausentes
+    """
+    return _abrir(csv_path, tuple(required_cols), versao_arquivo(csv_path))
@@ -0,0 +1,117 @@
+"""Catálogo de metadados do dataset e contagens por faceta
+
+O catálogo é calculado uma vez por versão do dataset: valores distintos de
+cada faceta da sidebar, faixa de idades, total de linhas e um cubo de
+contagens Categoria × Gênero × Estação × Idade. As contagens de cada opção
+sob a seleção atual saem do cubo (tamanho = produto das cardinalidades), sem
+percorrer as linhas do dataset.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from shared_cache import versao_arquivo
+
+# Facetas da sidebar: coluna -> campo de criar_sidebar
+FACETAS = {"Category": "categorias", "Gender": "generos", "Season": "estacoes"}
+COLUNA_IDADE = "Age"
+
+def montar_catalogo(df: pd.DataFrame) -> dict:
+    """
+    Calcula os metadados e o cubo de contagens do dataset.
+    
+    Args:
+        df: Dataset completo
+    
+    Returns:
+        Dicionário com 'linhas', 'valores' ({coluna: valores ordenados}),
+        'contagens' ({coluna: {valor: linhas}}), 'idades' (idades distintas),
+        'idade_min', 'idade_max' e 'cubo' (contagens por combinação)
+    """
+    valores, codigos = {}, []
+    for coluna in list(FACETAS) + [COLUNA_IDADE]:
+        distintos = sorted(df[coluna].dropna().unique())
+        valores[coluna] = distintos
+        # Código de cada linha no eixo da coluna (-1 = ausente)
+        codigos.append(pd.Categorical(df[coluna], categories=distintos).codes.astype(np.int64))
+    
+    forma = tuple(len(valores[coluna]) for coluna in list(FACETAS) + [COLUNA_IDADE])
+    validas = np.logical_and.reduce([c >= 0 for c in codigos])
+    cubo = np.bincount(
+        np.ravel_multi_index([c[validas] for c in codigos], forma),
+        minlength=int(np.prod(forma))
+    ).reshape(forma)
+    
+    idades = np.asarray(valores.pop(COLUNA_IDADE))
+    eixos = tuple(range(cubo.ndim))
+    return {
+        'linhas': len(df),
+        'valores': valores,
+        'contagens': {
+            coluna: dict(zip(valores[coluna], cubo.sum(axis=eixos[:i] + eixos[i + 1:]).tolist()))
+            for i, coluna in enumerate(FACETAS)
+        },
+        'idades': idades,
+        'idade_min': int(idades[0]) if len(idades) else 0,
+        'idade_max': int(idades[-1]) if len(idades) else 0,
+        'cubo': cubo
+    }
+
+@st.cache_resource(show_spinner=False)
+def _catalogo_versao(csv_path: str, versao: str, _df: pd.DataFrame) -> dict:
+    """Catálogo de uma versão do arquivo (um por processo)"""
+    return montar_catalogo(_df)
+
+def obter_catalogo(csv_path: str, df: pd.DataFrame) -> dict:
+    """
+    Catálogo do dataset carregado, calculado uma vez por versão do arquivo.
+    
+    Args:
+        csv_path: Caminho do dataset
+        df: Dataset completo
+    
+    Returns:
+        Catálogo (ver montar_catalogo)
+    """
+    return _catalogo_versao(csv_path, versao_arquivo(csv_path), df)
+
+def contar_facetas(catalogo: dict, filtros: dict) -> dict:
+    """
+    Conta as linhas de cada opção das facetas sob a seleção atual.
+    
+    A contagem de uma faceta usa a seleção das outras (a própria faceta fica
+    livre), então cada número é quantas linhas a opção traria se escolhida.
+    
+    Args:
+        catalogo: Catálogo do dataset (ver montar_catalogo)
+        filtros: Campos de criar_sidebar ('categorias', 'generos',
+            'faixa_etaria', 'estacoes')
+    
+    Returns:
+        Dicionário com 'facetas' ({coluna: {valor: linhas}}) e 'linhas'
+        (total da seleção)
+    """
+    cubo = catalogo['cubo']
+    idades = catalogo['idades']
+    minimo, maximo = filtros['faixa_etaria']
+    mascaras = [
+        np.isin(catalogo['valores'][coluna], list(filtros[campo]))
+        for coluna, campo in FACETAS.items()
+    ] + [(idades >= minimo) & (idades <= maximo)]
+    
+    def somar_livre(eixo_livre: Optional[int]) -> np.ndarray:
+        parcial = cubo
+        for eixo, mascara in enumerate(mascaras):
+            if eixo != eixo_livre:
+                parcial = np.compress(mascara, parcial, axis=eixo)
+        return parcial.sum(axis=tuple(e for e in range(cubo.ndim) if e != eixo_livre))
+    
+    return {
+        'facetas': {
+            coluna: dict(zip(catalogo['valores'][coluna], somar_livre(eixo).tolist()))
+            for eixo, coluna in enumerate(FACETAS)
+        },
+        'linhas': int(somar_livre(None))
+    }
@@ -2,15 +2,45 @@
 import os
 import pandas as pd
 import streamlit as st
-from typing import List
+from typing import List, Optional
+from settings import DASHBOARD_CONFIG
+from cache_manager import cache_memoria
+from shared_cache import cache_compartilhado, versao_arquivo
+from fingerprint import marcar_versao
+from instrumentation import instrumentar
 
-@st.cache_data(ttl=3600)  # Cache por 1 hora
+@instrumentar
+@cache_memoria(ttl=3600)  # Cache por 1 hora
+@cache_compartilhado(ttl=3600, arquivos=("csv_path",))
 def load_and_validate_data(
     csv_path: str, 
     required_cols: List[str]
 ) -> pd.DataFrame:
     """
-    Carrega e valida o dataset.
+    Carrega e valida o dataset (em cache; ver ler_e_validar).
+    
+    Args:
+        csv_path: Caminho para o arquivo CSV
+        required_cols: Lista de colunas obrigatórias
+        
+    Returns:
+        DataFrame validado
+        
+    Raises:
+        FileNotFoundError: Se arquivo não existir
+        ValueError: Se colunas obrigatórias estiverem ausentes
+    """
+    return ler_e_validar(csv_path, required_cols)
+
+def ler_e_validar(
+    csv_path: str, 
+    required_cols: List[str]
+) -> pd.DataFrame:
+    """
+    Lê e valida o dataset, sem cache.
+    
+    Para quem grava o resultado em outro formato (ex.: columnar_store) e não
+    deve deixar uma cópia no cache em memória nem no compartilhado.
     
     Args:
         csv_path: Caminho para o arquivo CSV
@@ -60,7 +90,10 @@ def load_and_validate_data(
         raise FileNotFoundError(f"❌ Arquivo não encontrado: {csv_path}")
     
     try:
-        df = pd.read_csv(csv_path)
+        if csv_path.endswith(".parquet"):
+            df = pd.read_parquet(csv_path)
+        else:
+            df = pd.read_csv(csv_path)
     except Exception as e:
         raise ValueError(f"❌ Erro ao ler CSV: {str(e)}")
     
@@ -74,7 +107,74 @@ def load_and_validate_data(
     
     return df
 
-@st.cache_data
+def marcar_consulta(
+    df: pd.DataFrame, 
+    caminho: str, 
+    filtros: Optional[dict]
+) -> pd.DataFrame:
+    """
+    Registra no DataFrame a consulta que o reproduz no arquivo de origem.
+    
+    As funções de data_processor só usam o backend de consulta quando o
+    DataFrame recebido tem a mesma quantidade de linhas da consulta.
+    
+    Args:
+        df: Dataset completo (filtros=None) ou linhas já filtradas
+        caminho: Arquivo de origem
+        filtros: Especificação aplicada (campos de criar_sidebar)
+        
+    Returns:
+        O próprio DataFrame
+    """
+    df.attrs['consulta'] = {'fonte': caminho, 'filtros': filtros, 'linhas': len(df)}
+    return df
+
+@instrumentar
+def carregar_dados(
+    csv_path: str, 
+    required_cols: List[str]
+) -> pd.DataFrame:
+    """
+    Carrega o dataset pelo backend configurado em DASHBOARD_CONFIG.DATA_BACKEND.
+    
+    Com "mmap" o DataFrame é compartilhado por todas as sessões do processo
+    e aponta para as colunas mapeadas em disco: não deve ser alterado. Com
+    QUERY_BACKEND = "duckdb" ou "polars" o DataFrame leva a consulta que o
+    reproduz no arquivo, e filtros e agregações passam a ser executados lá.
+    
+    Args:
+        csv_path: Caminho para o arquivo CSV
+        required_cols: Lista de colunas obrigatórias
+        
+    Returns:
+        DataFrame validado
+        
+    Raises:
+        FileNotFoundError: Se arquivo não existir
+        ValueError: Se colunas obrigatórias estiverem ausentes
+    """
+    if DASHBOARD_CONFIG.DATA_BACKEND == "mmap" and os.path.exists(csv_path):
+        from columnar_store import abrir_colunar
+        df = abrir_colunar(csv_path, required_cols)
+    else:
+        df = load_and_validate_data(csv_path, required_cols)
+    
+    if DASHBOARD_CONFIG.QUERY_BACKEND != "pandas" and os.path.exists(csv_path):
+        marcar_consulta(df, csv_path, None)
+    
+    if os.path.exists(csv_path):
+        # Funções em cache identificam o dataset pela versão do arquivo, sem
+        # percorrer as linhas a cada chamada (ver fingerprint)
+        marcar_versao(df, ":".join([
+            versao_arquivo(csv_path),
+            DASHBOARD_CONFIG.DATA_BACKEND,
+            DASHBOARD_CONFIG.QUERY_BACKEND
+        ]))
+    
+    return df
+
+@cache_memoria
+@cache_compartilhado
 def calcular_estatisticas_gerais(df: pd.DataFrame) -> dict:
     """
     Calcula estatísticas gerais do dataset.
@@ -1,9 +1,133 @@
 """Processamento e transformação de dados"""
+import importlib
+import numpy as np
 import pandas as pd
-import streamlit as st
-from typing import Tuple, List
+from typing import Callable, Tuple, List, Optional
+from settings import DASHBOARD_CONFIG
 from data_loader import calcular_estatisticas_gerais
+from cache_manager import cache_memoria
+from shared_cache import cache_compartilhado
+from instrumentation import instrumentar
+from fingerprint import marcar_versao, versao_dados
 
+# Backends que executam filtros e agregações no arquivo de origem
+BACKENDS_CONSULTA = {"duckdb": "duckdb_backend", "polars": "polars_backend"}
+
+def _backend_consulta(df: pd.DataFrame) -> tuple:
+    """
+    Backend de consulta configurado e a consulta que reproduz o DataFrame
+    no arquivo de origem (ver data_loader.marcar_consulta).
+    
+    DataFrames derivados herdam os attrs do pandas; a contagem de linhas
+    descarta os que já não correspondem à consulta.
+    
+    Returns:
+        Tupla (módulo do backend, consulta), ou (None, None) no pandas
+    """
+    modulo = BACKENDS_CONSULTA.get(DASHBOARD_CONFIG.QUERY_BACKEND)
+    consulta = df.attrs.get('consulta')
+    if modulo is None or not consulta or consulta['linhas'] != len(df):
+        return None, None
+    return importlib.import_module(modulo), consulta
+
+def quantil_linear(n: int, percentil: float, buscar_vizinhos: Callable) -> float:
+    """
+    Quantil linear igual ao Series.quantile sem ter a coluna em memória.
+    
+    Args:
+        n: Quantidade de valores não nulos
+        percentil: Percentil (0.0 a 1.0)
+        buscar_vizinhos: Função (posição) -> array com até dois valores da
+            coluna ordenada a partir dessa posição
+        
+    Returns:
+        Quantil (NaN sem valores)
+    """
+    if n == 0:
+        return np.nan
+    
+    # Mesma conta do numpy: posição (n - 1) * q, interpolada entre vizinhos
+    posicao = (n - 1) * np.float64(percentil)
+    anterior = min(int(np.floor(posicao)), n - 1)
+    vizinhos = np.asarray(buscar_vizinhos(anterior))
+    
+    if len(vizinhos) < 2 or posicao >= n - 1:
+        return np.quantile(vizinhos[-1:], 0.5)
+    # np.quantile em [a, b] com a fração da posição interpola exatamente
+    # como a chamada sobre a coluna inteira
+    return np.quantile(vizinhos, posicao - np.floor(posicao))
+
+def montar_vendas_por_dimensao(
+    estacao_local: pd.DataFrame,
+    estacao: pd.DataFrame,
+    categoria: pd.DataFrame
+) -> dict:
+    """
+    Monta o resultado de calcular_vendas_por_dimensao a partir de somas e
+    contagens já agregadas por um backend de consulta.
+    
+    Args:
+        estacao_local: Colunas Season, Location, sum e count
+        estacao: Colunas Season e sum
+        categoria: Colunas Category, sum e count
+        (todas sem chaves nulas e ordenadas pelas chaves, como no groupby)
+        
+    Returns:
+        Dicionário com agregações, no mesmo formato do caminho em pandas
+    """
+    coluna = "Purchase Amount (USD)"
+    media = categoria['sum'].to_numpy() / categoria['count'].to_numpy()
+    
+    return {
+        'por_estacao_local': pd.DataFrame({
+            'Season': estacao_local['Season'].astype("str").to_numpy(),
+            'Location': estacao_local['Location'].astype("str").to_numpy(),
+            'sum': estacao_local['sum'].to_numpy(),
+            'count': estacao_local['count'].to_numpy()
+        }).sort_values('sum', ascending=False),
+        
+        'por_estacao': pd.Series(
+            estacao['sum'].to_numpy(),
+            index=pd.Index(estacao['Season'].astype("str"), name="Season"),
+            name=coluna
+        ).sort_values(ascending=True),
+        
+        'por_categoria': pd.DataFrame(
+            {
+                (coluna, 'mean'): media,
+                (coluna, 'sum'): categoria['sum'].to_numpy(),
+                (coluna, 'count'): categoria['count'].to_numpy()
+            },
+            index=pd.Index(categoria['Category'].astype("str"), name="Category")
+        ).round(2)
+    }
+
+def resumir_persona(persona: pd.DataFrame, threshold: float) -> Optional[dict]:
+    """
+    Resume os top gastadores (acima do corte) para a análise de persona.
+    
+    Args:
+        persona: Linhas acima do corte
+        threshold: Valor de corte
+        
+    Returns:
+        Dicionário com análise de persona, ou None se não houver linhas
+    """
+    if len(persona) == 0:
+        return None
+    
+    return {
+        'df': persona,
+        'threshold': threshold,
+        'total': len(persona),
+        'idade_media': persona['Age'].mean(),
+        'ticket_medio': persona['Purchase Amount (USD)'].mean(),
+        # Colunas categóricas contam também os valores ausentes (contagem 0)
+        'genero_dist': persona["Gender"].value_counts().loc[lambda s: s > 0].to_dict(),
+        'top_categorias': persona["Category"].value_counts().loc[lambda s: s > 0].head(3).to_dict()
+    }
+
+@instrumentar
 def aplicar_filtros(
     df: pd.DataFrame,
     categorias: List[str],
@@ -24,14 +148,36 @@ def aplicar_filtros(
     Returns:
         DataFrame filtrado
     """
-    return df[
-        (df["Category"].isin(categorias)) &
-        (df["Gender"].isin(generos)) &
-        (df["Age"].between(faixa_etaria[0], faixa_etaria[1])) &
-        (df["Season"].isin(estacoes))
-    ].copy()
+    backend, consulta = _backend_consulta(df)
+    if backend and consulta['filtros'] is None:
+        df_filtrado = backend.filtrar(consulta['fonte'], {
+            'categorias': list(categorias),
+            'generos': list(generos),
+            'faixa_etaria': tuple(faixa_etaria),
+            'estacoes': list(estacoes)
+        })
+    else:
+        df_filtrado = df[
+            (df["Category"].isin(categorias)) &
+            (df["Gender"].isin(generos)) &
+            (df["Age"].between(faixa_etaria[0], faixa_etaria[1])) &
+            (df["Season"].isin(estacoes))
+        ].copy()
+    
+    # Versão do filtrado = versão do dataset + filtros (ver fingerprint)
+    versao = versao_dados(df)
+    if versao is not None:
+        marcar_versao(df_filtrado, f"{versao}|filtros:" + repr((
+            sorted(map(str, categorias)),
+            sorted(map(str, generos)),
+            tuple(faixa_etaria),
+            sorted(map(str, estacoes))
+        )))
+    
+    return df_filtrado
 
-@st.cache_data
+@cache_memoria
+@cache_compartilhado
 def calcular_big_spenders(
     df: pd.DataFrame, 
     percentile: float
@@ -46,10 +192,15 @@ def calcular_big_spenders(
     Returns:
         Tuple de (dataframe de big spenders, threshold usado)
     """
+    backend, consulta = _backend_consulta(df)
+    if backend:
+        return backend.big_spenders(consulta['fonte'], consulta['filtros'], percentile)
+    
     threshold = df["Purchase Amount (USD)"].quantile(percentile)
     big_spenders = df[df["Purchase Amount (USD)"] > threshold].copy()
     return big_spenders, threshold
 
+@instrumentar
 def calcular_estatisticas_filtradas(
     df_original: pd.DataFrame,
     df_filtrado: pd.DataFrame
@@ -64,6 +215,14 @@ def calcular_estatisticas_filtradas(
     Returns:
         Dicionário com estatísticas e deltas
     """
+    backend, original = _backend_consulta(df_original)
+    _, filtrado = _backend_consulta(df_filtrado)
+    if (
+        backend and filtrado and original['filtros'] is None 
+        and filtrado['filtros'] is not None and original['fonte'] == filtrado['fonte']
+    ):
+        return backend.estatisticas_filtradas(filtrado['fonte'], filtrado['filtros'])
+    
     stats_original = calcular_estatisticas_gerais(df_original)
     stats_filtrado = calcular_estatisticas_gerais(df_filtrado)
     
@@ -81,7 +240,79 @@ def calcular_estatisticas_filtradas(
         'valor_maximo': stats_filtrado['valor_maximo']
     }
 
-@st.cache_data
+def rotular_faixas_etarias(limites: Tuple[int, ...]) -> List[str]:
+    """
+    Rótulos das faixas etárias a partir do início de cada uma.
+    
+    Args:
+        limites: Idade inicial de cada faixa, crescente (a última é aberta)
+    
+    Returns:
+        Lista de rótulos (ex.: ["18-24", ..., "65+"])
+    """
+    return [f"{a}-{b - 1}" for a, b in zip(limites, limites[1:])] + [f"{limites[-1]}+"]
+
+@cache_memoria
+@cache_compartilhado
+def calcular_ranking_segmentos(
+    df: pd.DataFrame,
+    limites_idade: Tuple[int, ...],
+    min_clientes: int = 1
+) -> pd.DataFrame:
+    """
+    Calcula os indicadores de calcular_estatisticas_filtradas para cada
+    segmento Categoria × Gênero × Estação × faixa etária.
+    
+    Todos os segmentos saem de um único groupby (uma leitura dos dados), em
+    vez de um filtro por combinação. Os deltas são em relação ao df inteiro.
+    
+    Args:
+        df: DataFrame com os dados
+        limites_idade: Idade inicial de cada faixa (ver rotular_faixas_etarias)
+        min_clientes: Segmentos com menos clientes ficam de fora
+        
+    Returns:
+        DataFrame com um segmento por linha (Category, Gender, Season,
+        faixa_etaria, clientes, delta_clientes_pct, ticket_medio,
+        delta_ticket, valor_total, valor_maximo), por valor total decrescente
+    """
+    # Referências de calcular_estatisticas_gerais (sem o nunique de categorias)
+    total_clientes = len(df) if len(df) > 0 else 1
+    ticket_geral = df["Purchase Amount (USD)"].mean()
+    
+    faixa = pd.cut(
+        df["Age"],
+        bins=list(limites_idade) + [np.inf],
+        right=False,
+        labels=rotular_faixas_etarias(limites_idade)
+    ).rename("faixa_etaria")
+    
+    ranking = df["Purchase Amount (USD)"].groupby(
+        [df["Category"], df["Gender"], df["Season"], faixa],
+        observed=True
+    ).agg(
+        clientes='size',
+        contagem='count',
+        valor_total='sum',
+        valor_maximo='max'
+    )
+    ranking = ranking[ranking['clientes'] >= min_clientes]
+    
+    # Média como no pandas: soma / valores não nulos
+    ticket = ranking['valor_total'] / ranking['contagem'].where(ranking['contagem'] > 0)
+    ranking = ranking.assign(
+        delta_clientes_pct=(ranking['clientes'] / total_clientes - 1) * 100,
+        ticket_medio=ticket,
+        delta_ticket=ticket - ticket_geral
+    )
+    
+    return ranking[[
+        'clientes', 'delta_clientes_pct', 'ticket_medio',
+        'delta_ticket', 'valor_total', 'valor_maximo'
+    ]].sort_values('valor_total', ascending=False).reset_index()
+
+@cache_memoria
+@cache_compartilhado
 def preparar_dados_top_gastadores(
     df: pd.DataFrame,
     percentil: float
@@ -96,23 +327,15 @@ def preparar_dados_top_gastadores(
     Returns:
         Dicionário com análise de persona
     """
-    threshold = df["Purchase Amount (USD)"].quantile(percentil)
-    persona = df[df["Purchase Amount (USD)"] > threshold].copy()
+    backend, consulta = _backend_consulta(df)
+    if backend:
+        return backend.dados_top_gastadores(consulta['fonte'], consulta['filtros'], percentil)
     
-    if len(persona) == 0:
-        return None
-    
-    return {
-        'df': persona,
-        'threshold': threshold,
-        'total': len(persona),
-        'idade_media': persona['Age'].mean(),
-        'ticket_medio': persona['Purchase Amount (USD)'].mean(),
-        'genero_dist': persona["Gender"].value_counts().to_dict(),
-        'top_categorias': persona["Category"].value_counts().head(3).to_dict()
-    }
+    threshold = df["Purchase Amount (USD)"].quantile(percentil)
+    return resumir_persona(df[df["Purchase Amount (USD)"] > threshold].copy(), threshold)
 
-@st.cache_data
+@cache_memoria
+@cache_compartilhado
 def calcular_vendas_por_dimensao(df: pd.DataFrame) -> dict:
     """
     Calcula vendas agregadas por diferentes dimensões.
@@ -123,15 +346,194 @@ def calcular_vendas_por_dimensao(df: pd.DataFrame) -> dict:
     Returns:
         Dicionário com agregações
     """
+    backend, consulta = _backend_consulta(df)
+    if backend:
+        return backend.vendas_por_dimensao(consulta['fonte'], consulta['filtros'])
+    
     return {
-        'por_estacao_local': df.groupby(["Season", "Location"])["Purchase Amount (USD)"]
+        'por_estacao_local': df.groupby(["Season", "Location"], observed=True)["Purchase Amount (USD)"]
             .agg(['sum', 'count']).reset_index()
             .sort_values('sum', ascending=False),
         
-        'por_estacao': df.groupby("Season")["Purchase Amount (USD)"]
+        'por_estacao': df.groupby("Season", observed=True)["Purchase Amount (USD)"]
             .sum().sort_values(ascending=True),
         
-        'por_categoria': df.groupby("Category").agg({
+        'por_categoria': df.groupby("Category", observed=True).agg({
             "Purchase Amount (USD)": ["mean", "sum", "count"]
         }).round(2)
     }
+
+def _limites(valores: np.ndarray) -> tuple:
+    """Mínimo e máximo dos valores, ou (0, 1) sem valores"""
+    if len(valores) == 0:
+        return 0.0, 1.0
+    return valores.min(), valores.max()
+
+def calcular_grade_densidade(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    hue: str = None,
+    bins: int = 60
+) -> dict:
+    """
+    Pré-agrega pontos em uma grade 2D (por grupo) de forma vetorizada.
+    
+    Args:
+        df: DataFrame com os dados
+        x: Coluna do eixo X
+        y: Coluna do eixo Y
+        hue: Coluna de agrupamento (opcional)
+        bins: Número de faixas por eixo
+        
+    Returns:
+        Dicionário com 'contagens' (grupos × bins × bins), 'x_edges',
+        'y_edges' e 'grupos'
+    """
+    dados = df[[x, y] + ([hue] if hue else [])].dropna()
+    valores_x = dados[x].to_numpy(dtype=float)
+    valores_y = dados[y].to_numpy(dtype=float)
+    
+    # Sem linhas: grade vazia no intervalo (0, 1), como o np.histogram
+    x_edges = np.linspace(*_limites(valores_x), bins + 1)
+    y_edges = np.linspace(*_limites(valores_y), bins + 1)
+    ix = np.clip(np.searchsorted(x_edges, valores_x, side='right') - 1, 0, bins - 1)
+    iy = np.clip(np.searchsorted(y_edges, valores_y, side='right') - 1, 0, bins - 1)
+    
+    if hue:
+        codigos, grupos = pd.factorize(dados[hue], sort=True)
+    else:
+        codigos, grupos = np.zeros(len(dados), dtype=np.int64), pd.Index([None])
+    
+    celula = (codigos * bins + ix) * bins + iy
+    contagens = np.bincount(
+        celula, 
+        minlength=len(grupos) * bins * bins
+    ).reshape(len(grupos), bins, bins)
+    
+    return {
+        'contagens': contagens,
+        'x_edges': x_edges,
+        'y_edges': y_edges,
+        'grupos': list(grupos)
+    }
+
+@cache_memoria
+@cache_compartilhado
+def calcular_pontos_dispersao(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    hue: str = None,
+    limite: int = 200_000,
+    bins: int = 60,
+    excluir: Optional[list] = None
+) -> dict:
+    """
+    Prepara os dados de um gráfico de dispersão sem o DataFrame completo.
+    
+    Até `limite` linhas ficam só as colunas usadas; acima disso, a grade de
+    densidade, cujo tamanho não depende do número de linhas.
+    
+    Args:
+        df: DataFrame com os dados
+        x: Coluna do eixo X
+        y: Coluna do eixo Y
+        hue: Coluna de agrupamento (opcional)
+        limite: Número de linhas acima do qual os pontos viram grade
+        bins: Número de faixas por eixo da grade
+        excluir: Valores de hue descartados (ex.: [-1] = sem cluster)
+        
+    Returns:
+        Dicionário com 'x', 'y', 'hue' e 'pontos' (DataFrame) ou 'grade'
+        (calcular_grade_densidade)
+    """
+    colunas = [x, y] + ([hue] if hue else [])
+    dados = df[~df[hue].isin(excluir)] if hue and excluir else df
+    
+    if len(dados) > limite:
+        return {
+            'x': x, 'y': y, 'hue': hue,
+            'grade': calcular_grade_densidade(dados, x, y, hue, bins)
+        }
+    
+    pontos = dados[colunas].copy()
+    versao = versao_dados(df)
+    if versao is not None:
+        marcar_versao(pontos, f"{versao}|dispersao:{colunas}:{excluir}")
+    return {'x': x, 'y': y, 'hue': hue, 'pontos': pontos}
+
+@cache_memoria
+@cache_compartilhado
+def calcular_histograma(serie: pd.Series, bins: int) -> dict:
+    """
+    Calcula as contagens de um histograma.
+    
+    Args:
+        serie: Valores a distribuir
+        bins: Número de faixas
+        
+    Returns:
+        Dicionário com 'contagens' e 'edges' (limites das faixas)
+    """
+    contagens, edges = np.histogram(serie.dropna().to_numpy(dtype=float), bins=bins)
+    return {'contagens': contagens, 'edges': edges}
+
+@cache_memoria
+@cache_compartilhado
+def calcular_resumo_boxplot(
+    df: pd.DataFrame,
+    coluna_valor: str,
+    grupos: List[str]
+) -> List[dict]:
+    """
+    Calcula o resumo de cinco números (formato Axes.bxp) por grupo.
+    
+    Bigodes seguem a regra de 1,5 × IQR do boxplot do matplotlib/seaborn; os
+    outliers são guardados como valores distintos, o que preserva o desenho.
+    
+    Args:
+        df: DataFrame com os dados
+        coluna_valor: Coluna numérica resumida
+        grupos: Colunas de agrupamento
+        
+    Returns:
+        Lista de dicionários (um por grupo) com 'grupo', 'label', 'q1', 'med',
+        'q3', 'whislo', 'whishi' e 'fliers'
+    """
+    dados = df[grupos + [coluna_valor]].dropna()
+    valores = dados[coluna_valor]
+    por_grupo = valores.groupby([dados[g] for g in grupos], observed=True)
+    
+    q1 = por_grupo.transform('quantile', 0.25)
+    q3 = por_grupo.transform('quantile', 0.75)
+    dentro = valores.between(q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1))
+    chaves = [dados[g] for g in grupos]
+    
+    resumo = pd.DataFrame({
+        'q1': por_grupo.quantile(0.25),
+        'med': por_grupo.median(),
+        'q3': por_grupo.quantile(0.75),
+        'whislo': valores.where(dentro).groupby(chaves, observed=True).min(),
+        'whishi': valores.where(dentro).groupby(chaves, observed=True).max()
+    })
+    fliers = valores[~dentro].groupby(
+        [c[~dentro] for c in chaves], 
+        observed=True
+    ).unique()
+    
+    resultado = []
+    for grupo, linha in resumo.iterrows():
+        flier = fliers.get(grupo, np.array([]))
+        resultado.append({
+            'grupo': grupo,
+            'label': str(grupo[-1] if isinstance(grupo, tuple) else grupo),
+            'q1': linha['q1'],
+            'med': linha['med'],
+            'q3': linha['q3'],
+            'whislo': linha['whislo'] if pd.notna(linha['whislo']) else linha['q1'],
+            'whishi': linha['whishi'] if pd.notna(linha['whishi']) else linha['q3'],
+            'fliers': np.sort(np.asarray(flier, dtype=float))
+        })
+    
+    return resultado
@@ -0,0 +1,302 @@
+"""Backend DuckDB: filtros e agregações executados em SQL sobre o arquivo
+
+Com DASHBOARD_CONFIG.QUERY_BACKEND = "duckdb", a especificação de filtros da
+sidebar e as agregações de data_processor são compiladas em SQL e executadas
+pelo DuckDB direto no CSV/Parquet de origem; só os resultados (agregados ou as
+linhas filtradas) voltam para o Python. Os resultados seguem o mesmo formato
+(e a mesma ordem) do caminho em pandas.
+"""
+import functools
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_loader import marcar_consulta
+from data_processor import montar_vendas_por_dimensao, quantil_linear, resumir_persona
+from shared_cache import versao_arquivo
+
+COLUNA_VALOR = "Purchase Amount (USD)"
+
+_conexao_global = None
+_conexao_lock = threading.Lock()
+_local = threading.local()
+
+def _conexao():
+    """Cursor da thread sobre uma conexão DuckDB em memória (criada no primeiro uso)"""
+    global _conexao_global
+    cursor = getattr(_local, "cursor", None)
+    if cursor is not None:
+        return cursor
+    
+    with _conexao_lock:
+        if _conexao_global is None:
+            try:
+                import duckdb
+            except ImportError:
+                raise ValueError("❌ Backend 'duckdb' requer o pacote 'duckdb'")
+            _conexao_global = duckdb.connect()
+        # Conexões DuckDB não são seguras entre threads; cursores são
+        cursor = _conexao_global.cursor()
+    
+    cursor.execute("SET enable_progress_bar = false")
+    _local.cursor = cursor
+    return cursor
+
+def _identificador(nome: str) -> str:
+    return '"' + nome.replace('"', '""') + '"'
+
+def _literal(texto: str) -> str:
+    return "'" + texto.replace("'", "''") + "'"
+
+def fonte_sql(caminho: str, numerar_linhas: bool = False) -> str:
+    """
+    Expressão FROM que lê o arquivo de origem.
+    
+    Args:
+        caminho: CSV ou Parquet
+        numerar_linhas: Incluir a coluna __linha (posição da linha no arquivo,
+            usada como índice do DataFrame, como no pandas)
+    
+    Returns:
+        Trecho SQL para a cláusula FROM
+    """
+    if caminho.endswith(".parquet"):
+        if numerar_linhas:
+            return (
+                f"(SELECT * EXCLUDE (file_row_number), file_row_number AS __linha "
+                f"FROM read_parquet({_literal(caminho)}, file_row_number = true))"
+            )
+        return f"read_parquet({_literal(caminho)})"
+    
+    # Mesmos tipos que o pd.read_csv infere (sem booleanos "Yes"/"No" nem datas)
+    leitura = (
+        f"read_csv({_literal(caminho)}, header = true, "
+        f"auto_type_candidates = ['BIGINT', 'DOUBLE', 'VARCHAR'])"
+    )
+    if numerar_linhas:
+        return f"(SELECT *, row_number() OVER () - 1 AS __linha FROM {leitura})"
+    return leitura
+
+def compilar_filtros(filtros: Optional[dict]) -> Tuple[str, list]:
+    """
+    Compila a especificação de filtros da sidebar em uma cláusula WHERE.
+    
+    Args:
+        filtros: Campos de criar_sidebar ('categorias', 'generos',
+            'faixa_etaria', 'estacoes'); None = sem filtro
+    
+    Returns:
+        Tupla (condição SQL com parâmetros ?, lista de parâmetros)
+    """
+    if filtros is None:
+        return "TRUE", []
+    
+    condicoes, parametros = [], []
+    for coluna, valores in (
+        ("Category", filtros['categorias']),
+        ("Gender", filtros['generos']),
+        ("Season", filtros['estacoes'])
+    ):
+        if not valores:
+            # isin([]) do pandas não seleciona nada
+            return "FALSE", []
+        condicoes.append(f"{_identificador(coluna)} IN ({', '.join('?' * len(valores))})")
+        parametros.extend(valores)
+    
+    condicoes.append(f"{_identificador('Age')} BETWEEN ? AND ?")
+    parametros.extend(filtros['faixa_etaria'])
+    
+    return " AND ".join(condicoes), parametros
+
+@functools.lru_cache(maxsize=32)
+def _tipos_colunas(caminho: str, versao: str) -> dict:
+    """Tipo DuckDB de cada coluna do arquivo (por versão do arquivo)"""
+    linhas = _conexao().execute(f"DESCRIBE SELECT * FROM {fonte_sql(caminho)}").fetchall()
+    return {nome: tipo for nome, tipo, *_ in linhas}
+
+def _soma(caminho: str, coluna: str, condicao: str = None) -> str:
+    """SUM com o mesmo tipo do pandas (inteiros somam em int64, vazio = 0)"""
+    expressao = f"SUM({_identificador(coluna)})"
+    if condicao:
+        expressao += f" FILTER (WHERE {condicao})"
+    if _tipos_colunas(caminho, versao_arquivo(caminho))[coluna] in ("BIGINT", "INTEGER", "SMALLINT", "TINYINT"):
+        expressao = f"CAST({expressao} AS BIGINT)"
+    return f"COALESCE({expressao}, 0)"
+
+def _linhas(caminho: str, sql: str, parametros: list) -> pd.DataFrame:
+    """Executa uma consulta de linhas e devolve o DataFrame indexado como no pandas"""
+    df = _conexao().execute(sql, parametros).df().set_index("__linha")
+    df.index.name = None
+    
+    # Resultados vazios vêm como object; o pd.read_csv usa o tipo str
+    tipos = _tipos_colunas(caminho, versao_arquivo(caminho))
+    for coluna in df.columns:
+        if tipos.get(coluna) == "VARCHAR" and df[coluna].dtype == object:
+            df[coluna] = df[coluna].astype("str")
+    return df
+
+def filtrar(caminho: str, filtros: dict) -> pd.DataFrame:
+    """
+    Equivalente a aplicar_filtros executado no arquivo.
+    
+    Args:
+        caminho: Arquivo de origem
+        filtros: Campos de criar_sidebar
+    
+    Returns:
+        Linhas filtradas, com o índice igual à posição no arquivo
+    """
+    condicao, parametros = compilar_filtros(filtros)
+    df = _linhas(
+        caminho,
+        f"SELECT * FROM {fonte_sql(caminho, numerar_linhas=True)} "
+        f"WHERE {condicao} ORDER BY __linha",
+        parametros
+    )
+    return marcar_consulta(df, caminho, filtros)
+
+def estatisticas_filtradas(caminho: str, filtros: dict) -> dict:
+    """
+    Equivalente a calcular_estatisticas_filtradas em uma única leitura.
+    
+    Args:
+        caminho: Arquivo de origem
+        filtros: Campos de criar_sidebar
+    
+    Returns:
+        Dicionário com estatísticas e deltas
+    """
+    condicao, parametros = compilar_filtros(filtros)
+    valor = _identificador(COLUNA_VALOR)
+    
+    (
+        clientes_original, contagem_original, soma_original,
+        clientes, contagem, soma, maximo
+    ) = _conexao().execute(
+        f"SELECT COUNT(*), COUNT({valor}), {_soma(caminho, COLUNA_VALOR)}, "
+        f"COUNT(*) FILTER (WHERE {condicao}), "
+        f"COUNT({valor}) FILTER (WHERE {condicao}), "
+        f"{_soma(caminho, COLUNA_VALOR, condicao)}, "
+        f"MAX({valor}) FILTER (WHERE {condicao}) "
+        f"FROM {fonte_sql(caminho)}",
+        parametros * 4
+    ).fetchone()
+    
+    # Média como no pandas: soma / valores não nulos (NaN sem valores)
+    ticket_original = soma_original / contagem_original if contagem_original else np.nan
+    ticket = soma / contagem if contagem else np.nan
+    
+    return {
+        'clientes': clientes,
+        'delta_clientes_pct': (clientes / (clientes_original or 1) - 1) * 100,
+        'ticket_medio': ticket,
+        'delta_ticket': ticket - ticket_original,
+        'valor_total': soma,
+        'valor_maximo': maximo if maximo is not None else np.nan
+    }
+
+def vendas_por_dimensao(caminho: str, filtros: Optional[dict]) -> dict:
+    """
+    Equivalente a calcular_vendas_por_dimensao: os três agrupamentos saem de
+    uma única leitura (GROUPING SETS).
+    
+    Args:
+        caminho: Arquivo de origem
+        filtros: Campos de criar_sidebar (None = arquivo inteiro)
+    
+    Returns:
+        Dicionário com agregações
+    """
+    condicao, parametros = compilar_filtros(filtros)
+    estacao, local, categoria = (_identificador(c) for c in ("Season", "Location", "Category"))
+    valor = _identificador(COLUNA_VALOR)
+    
+    grupos = _conexao().execute(
+        f"SELECT GROUPING({estacao}, {local}, {categoria}) AS conjunto, "
+        f"{estacao}, {local}, {categoria}, "
+        f"{_soma(caminho, COLUNA_VALOR)} AS soma, COUNT({valor}) AS contagem "
+        f"FROM {fonte_sql(caminho)} WHERE {condicao} "
+        f"GROUP BY GROUPING SETS (({estacao}, {local}), ({estacao}), ({categoria})) "
+        f"ORDER BY conjunto, {estacao}, {local}, {categoria}",
+        parametros
+    ).df()
+    
+    # Bits de GROUPING: 1 = categoria fora do grupo, 2 = local, 4 = estação.
+    # Chaves nulas ficam de fora, como no groupby do pandas
+    grupos = grupos.rename(columns={'soma': 'sum', 'contagem': 'count'})
+    return montar_vendas_por_dimensao(
+        grupos[(grupos['conjunto'] == 1) & grupos['Season'].notna() & grupos['Location'].notna()],
+        grupos[(grupos['conjunto'] == 3) & grupos['Season'].notna()],
+        grupos[(grupos['conjunto'] == 6) & grupos['Category'].notna()]
+    )
+    
+def _acima_do_corte(
+    caminho: str,
+    filtros: Optional[dict],
+    percentil: float
+) -> Tuple[pd.DataFrame, float]:
+    """
+    Corte por percentil e linhas acima dele: só os dois vizinhos da posição
+    do quantil e as linhas selecionadas saem do DuckDB.
+    """
+    condicao, parametros = compilar_filtros(filtros)
+    valor = _identificador(COLUNA_VALOR)
+    base = f"FROM {fonte_sql(caminho)} WHERE {condicao} AND {valor} IS NOT NULL"
+    
+    n = _conexao().execute(f"SELECT COUNT(*) {base}", parametros).fetchone()[0]
+    threshold = quantil_linear(
+        n,
+        percentil,
+        lambda inicio: _conexao().execute(
+            f"SELECT {valor} {base} ORDER BY {valor} LIMIT 2 OFFSET ?",
+            parametros + [inicio]
+        ).df()[COLUNA_VALOR].to_numpy()
+    )
+    
+    # Comparar com NaN não seleciona nada, como no pandas
+    linhas = _linhas(
+        caminho,
+        f"SELECT * FROM {fonte_sql(caminho, numerar_linhas=True)} "
+        f"WHERE {condicao} AND {valor} > ? ORDER BY __linha",
+        parametros + [float(threshold)]
+    )
+    return linhas, threshold
+    
+def big_spenders(
+    caminho: str,
+    filtros: Optional[dict],
+    percentile: float
+) -> Tuple[pd.DataFrame, float]:
+    """
+    Equivalente a calcular_big_spenders executado no arquivo.
+    
+    Args:
+        caminho: Arquivo de origem
+        filtros: Campos de criar_sidebar (None = arquivo inteiro)
+        percentile: Percentil de corte (0.0 a 1.0)
+    
+    Returns:
+        Tuple de (dataframe de big spenders, threshold usado)
+    """
+    return _acima_do_corte(caminho, filtros, percentile)
+
+def dados_top_gastadores(
+    caminho: str,
+    filtros: Optional[dict],
+    percentil: float
+) -> Optional[dict]:
+    """
+    Equivalente a preparar_dados_top_gastadores executado no arquivo.
+    
+    Args:
+        caminho: Arquivo de origem
+        filtros: Campos de criar_sidebar (None = arquivo inteiro)
+        percentil: Percentil de corte
+    
+    Returns:
+        Dicionário com análise de persona
+    """
+    return resumir_persona(*_acima_do_corte(caminho, filtros, percentil))
+    
\ No newline at end of file
@@ -0,0 +1,655 @@
+"""Motor headless das 7 perguntas de negócio (sem Streamlit na interface)
+
+Uso:
+    python engine.py --dados shopping_behavior_updated.csv \\
+        [--filtros filtros.json] [--parametros '{"n_clusters": 4}'] \\
+        [--formato json|parquet] [--saida resultado.json] [--workers 4]
+    python engine.py --dados completo.csv --atualizar-modelo linhas_novas.csv
+    python engine.py --pontuar registros.json
+
+O arquivo de filtros usa os mesmos campos de criar_sidebar ('categorias',
+'generos', 'faixa_etaria', 'estacoes'); campos ausentes não filtram e listas
+vazias não selecionam nada, como na sidebar. Com uma lista de filtros o motor
+roda em modo lote, distribuindo as especificações em um pool de processos, e
+grava um resultado por especificação em --saida.
+
+--atualizar-modelo continua o boosting do modelo de Big Spenders persistido em
+MODEL_CONFIG.MODEL_DIR com as linhas novas (--dados é o dataset completo, já
+com elas) e retreina do zero quando o threshold ou as categorias mudam. O
+modelo atualizado também é exportado para o avaliador NumPy (tree_evaluator),
+que --pontuar usa para calcular a probabilidade de Big Spender de registros
+avulsos sem carregar o LightGBM.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+if __name__ in ("__main__", "__mp_main__"):
+    # Fora do servidor o Streamlit avisa sobre o "bare mode" a cada chamada
+    # st.* (ex.: avisos do clustering); como CLI esses avisos são só ruído
+    import warnings
+    from streamlit.logger import set_log_level
+    
+    warnings.filterwarnings('ignore')
+    set_log_level("error")
+
+from settings import DASHBOARD_CONFIG, MODEL_CONFIG
+from data_loader import carregar_dados
+from cache_manager import cache_memoria
+from shared_cache import cache_compartilhado
+from data_processor import (
+    aplicar_filtros,
+    calcular_big_spenders,
+    preparar_dados_top_gastadores,
+    calcular_vendas_por_dimensao,
+    calcular_histograma,
+    calcular_resumo_boxplot
+)
+
+PARAMETROS_PADRAO = {
+    'percentil_big_spender': MODEL_CONFIG.PERCENTILE_DEFAULT,
+    'n_clusters': MODEL_CONFIG.N_CLUSTERS_DEFAULT,
+    'percentil_persona': 90,
+    'bins_histograma': 50
+}
+
+FORMATOS_SAIDA = ["json", "parquet"]
+
+# Modelo compilado (tree_evaluator), em MODEL_CONFIG.MODEL_DIR
+ARQUIVO_MODELO_COMPILADO = "big_spender.npz"
+
+# ===========================
+# FILTROS
+# ===========================
+
+def completar_filtros(df: pd.DataFrame, filtros: Optional[dict]) -> dict:
+    """
+    Preenche os campos ausentes da especificação com "sem filtro".
+    
+    Só campos ausentes (ou None) são preenchidos: uma lista vazia continua
+    vazia e não seleciona nada, como um multiselect vazio na sidebar.
+    
+    Args:
+        df: DataFrame completo
+        filtros: Especificação parcial (mesmos campos de criar_sidebar)
+    
+    Returns:
+        Especificação completa
+    """
+    filtros = filtros or {}
+    
+    def campo(nome: str, padrao):
+        valor = filtros.get(nome)
+        return padrao() if valor is None else valor
+    
+    return {
+        'categorias': list(campo('categorias', lambda: sorted(df["Category"].unique()))),
+        'generos': list(campo('generos', lambda: sorted(df["Gender"].unique()))),
+        'faixa_etaria': tuple(
+            campo('faixa_etaria', lambda: (int(df["Age"].min()), int(df["Age"].max())))
+        ),
+        'estacoes': list(campo('estacoes', lambda: sorted(df["Season"].unique())))
+    }
+
+# ===========================
+# PERGUNTAS
+# ===========================
+
+def responder_pergunta_1(df: pd.DataFrame, percentil: int, bins: int) -> dict:
+    """Pergunta 1: probabilidade de um cliente ser Big Spender"""
+    bs, threshold = calcular_big_spenders(df, percentil / 100)
+    histograma = calcular_histograma(df["Purchase Amount (USD)"], bins)
+    
+    return {
+        'percentil': percentil,
+        'threshold': threshold,
+        'big_spenders': len(bs),
+        'probabilidade': len(bs) / len(df) if len(df) > 0 else 0,
+        'histograma': {
+            'contagens': histograma['contagens'].tolist(),
+            'edges': histograma['edges'].tolist()
+        }
+    }
+
+def responder_pergunta_2(df: pd.DataFrame, n_clusters: int) -> dict:
+    """Pergunta 2: segmentos naturais de consumidores (KMeans)"""
+    from clustering import realizar_clustering, calcular_estatisticas_clusters
+    
+    df_clusters = realizar_clustering(df, n_clusters)
+    return {
+        'n_clusters': n_clusters,
+        'estatisticas': calcular_estatisticas_clusters(df_clusters)
+    }
+
+def responder_pergunta_3(df: pd.DataFrame) -> dict:
+    """Pergunta 3: estações e locais com vendas mais intensas"""
+    vendas = calcular_vendas_por_dimensao(df)
+    
+    por_estacao_local = vendas['por_estacao_local'].copy()
+    por_estacao_local.columns = ['estacao', 'localizacao', 'valor_total', 'qtd_vendas']
+    
+    return {
+        'por_estacao_local': por_estacao_local.reset_index(drop=True),
+        'por_estacao': vendas['por_estacao'].rename('valor_total').rename_axis('estacao').reset_index()
+    }
+
+def responder_pergunta_4(df: pd.DataFrame) -> dict:
+    """Pergunta 4: categorias com maior valor médio por transação"""
+    por_categoria = calcular_vendas_por_dimensao(df)['por_categoria'].copy()
+    por_categoria.columns = ['ticket_medio', 'valor_total', 'qtd_vendas']
+    
+    return {
+        'por_categoria': por_categoria.sort_values('ticket_medio', ascending=False)
+            .rename_axis('categoria').reset_index()
+    }
+
+def responder_pergunta_5(df: pd.DataFrame, percentil: int) -> dict:
+    """Pergunta 5: persona ideal para campanhas de alto valor"""
+    persona = preparar_dados_top_gastadores(df, percentil / 100)
+    
+    if persona is None:
+        return {'percentil': percentil, 'disponivel': False}
+    
+    return {
+        'percentil': percentil,
+        'disponivel': True,
+        'threshold': persona['threshold'],
+        'total': persona['total'],
+        'idade_media': persona['idade_media'],
+        'ticket_medio': persona['ticket_medio'],
+        'genero_dist': persona['genero_dist'],
+        'top_categorias': persona['top_categorias']
+    }
+
+def _resumo_para_tabela(resumo: List[dict], grupos: List[str]) -> pd.DataFrame:
+    """Converte o resumo de boxplot em tabela (outliers viram contagem)"""
+    linhas = []
+    for item in resumo:
+        chave = item['grupo'] if isinstance(item['grupo'], tuple) else (item['grupo'],)
+        linha = dict(zip(grupos, chave))
+        linha.update({c: item[c] for c in ('q1', 'med', 'q3', 'whislo', 'whishi')})
+        linha['outliers'] = len(item['fliers'])
+        linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+def responder_pergunta_6(df: pd.DataFrame) -> dict:
+    """Pergunta 6: relação entre idade/gênero/categoria e valor gasto"""
+    valor = "Purchase Amount (USD)"
+    
+    return {
+        'correlacao_idade_valor': df["Age"].corr(df[valor]),
+        'por_genero': _resumo_para_tabela(
+            calcular_resumo_boxplot(df, valor, ["Gender"]), ['genero']
+        ),
+        'por_categoria_genero': _resumo_para_tabela(
+            calcular_resumo_boxplot(df, valor, ["Category", "Gender"]),
+            ['categoria', 'genero']
+        )
+    }
+
+def treinar_big_spender(df: pd.DataFrame, df_base: pd.DataFrame) -> Optional[dict]:
+    """
+    Treina e avalia o modelo de Big Spenders com os parâmetros de MODEL_CONFIG.
+    
+    O treino usa o Dataset LightGBM pré-binado do dataset completo (guardado
+    em MODEL_CONFIG.DATASET_DIR) e só seleciona as linhas filtradas, sem
+    recodificar as features a cada filtro. Fica em cache (como as demais
+    agregações) para que o aquecimento de caches na subida do servidor também
+    cubra o treino. As features de MODEL_CONFIG.MODEL_CUSTOMER_FEATURES vêm da
+    feature store e são anexadas antes do cache, então uma nova versão da
+    store gera um novo treino.
+    
+    Args:
+        df: DataFrame com os dados (linhas de df_base)
+        df_base: Dataset completo
+    
+    Returns:
+        Dicionário com 'model', 'dados', 'metricas' e 'threshold', ou None se
+        os dados forem insuficientes
+    """
+    features_clientes = list(MODEL_CONFIG.MODEL_CUSTOMER_FEATURES)
+    if features_clientes:
+        from feature_store import anexar_features
+        df = anexar_features(df, features_clientes)
+        df_base = anexar_features(df_base, features_clientes)
+    
+    return _treinar_big_spender(df, df_base, features_clientes)
+
+@cache_memoria
+@cache_compartilhado
+def _treinar_big_spender(
+    df: pd.DataFrame, 
+    df_base: pd.DataFrame, 
+    features_clientes: List[str]
+) -> Optional[dict]:
+    """Treino e avaliação (em cache) sobre as linhas já com as features da store"""
+    from prediction import construir_dataset_lgbm, treinar_em_subconjunto, avaliar_modelo
+    
+    threshold = df["Purchase Amount (USD)"].quantile(MODEL_CONFIG.BIG_SPENDER_PERCENTILE)
+    treino = treinar_em_subconjunto(
+        construir_dataset_lgbm(df_base, MODEL_CONFIG.DATASET_DIR, features_clientes),
+        df,
+        threshold,
+        MODEL_CONFIG.TEST_SIZE,
+        MODEL_CONFIG.RANDOM_STATE,
+        n_estimators=MODEL_CONFIG.LGBM_N_ESTIMATORS,
+        max_depth=MODEL_CONFIG.LGBM_MAX_DEPTH,
+        learning_rate=MODEL_CONFIG.LGBM_LEARNING_RATE
+    )
+    
+    if treino is None:
+        return None
+    
+    dados = {'X_test': treino['X_test'], 'y_test': treino['y_test']}
+    return {
+        'model': treino['booster'],
+        'dados': dados,
+        'metricas': avaliar_modelo(treino['booster'], dados['X_test'], dados['y_test']),
+        'threshold': threshold
+    }
+
+def responder_pergunta_7(df: pd.DataFrame, df_base: pd.DataFrame) -> dict:
+    """Pergunta 7: modelo preditivo de Big Spenders (LightGBM + SHAP)"""
+    from prediction import calcular_shap_values
+    
+    treino = treinar_big_spender(df, df_base)
+    if treino is None:
+        return {'disponivel': False}
+    
+    metricas = treino['metricas']
+    X_test = treino['dados']['X_test']
+    shap_values = calcular_shap_values(treino['model'], X_test)
+    
+    importancia = pd.DataFrame({
+        'feature': X_test.columns,
+        'shap_medio_abs': np.abs(shap_values).mean(axis=0)
+    }).sort_values('shap_medio_abs', ascending=False, ignore_index=True)
+    
+    return {
+        'disponivel': True,
+        'threshold': treino['threshold'],
+        'acuracia': metricas['acuracia'],
+        'roc_auc': metricas['roc_auc'],
+        'big_spenders_pred': metricas['big_spenders_pred'],
+        'total_test': metricas['total_test'],
+        'relatorio': metricas['report'],
+        'importancia_shap': importancia
+    }
+
+def calcular_respostas(
+    df: pd.DataFrame,
+    filtros: Optional[dict] = None,
+    parametros: Optional[dict] = None
+) -> dict:
+    """
+    Calcula as respostas das 7 perguntas para uma especificação de filtros.
+    
+    Args:
+        df: DataFrame completo
+        filtros: Campos de criar_sidebar (ausentes = sem filtro)
+        parametros: Sobrescreve PARAMETROS_PADRAO
+    
+    Returns:
+        Dicionário com 'filtros', 'parametros', 'registros', 'perguntas'
+        (respostas por número) e 'tempos' (segundos por pergunta)
+    
+    Raises:
+        ValueError: Se os filtros não selecionarem nenhum registro
+    """
+    filtros = completar_filtros(df, filtros)
+    parametros = {**PARAMETROS_PADRAO, **(parametros or {})}
+    
+    df_filtrado = aplicar_filtros(
+        df,
+        filtros['categorias'],
+        filtros['generos'],
+        filtros['faixa_etaria'],
+        filtros['estacoes']
+    )
+    
+    if len(df_filtrado) == 0:
+        raise ValueError("❌ Nenhum dado encontrado com os filtros informados")
+    
+    tarefas = {
+        1: lambda: responder_pergunta_1(
+            df_filtrado, parametros['percentil_big_spender'], parametros['bins_histograma']
+        ),
+        2: lambda: responder_pergunta_2(df_filtrado, parametros['n_clusters']),
+        3: lambda: responder_pergunta_3(df_filtrado),
+        4: lambda: responder_pergunta_4(df_filtrado),
+        5: lambda: responder_pergunta_5(df_filtrado, parametros['percentil_persona']),
+        6: lambda: responder_pergunta_6(df_filtrado),
+        7: lambda: responder_pergunta_7(df_filtrado, df)
+    }
+    
+    perguntas, tempos = {}, {}
+    for numero, tarefa in tarefas.items():
+        inicio = time.perf_counter()
+        perguntas[numero] = tarefa()
+        tempos[numero] = time.perf_counter() - inicio
+    
+    return {
+        'filtros': filtros,
+        'parametros': parametros,
+        'registros': len(df_filtrado),
+        'perguntas': perguntas,
+        'tempos': tempos
+    }
+
+def atualizar_modelo(caminho: str, caminho_novos: str) -> dict:
+    """
+    Atualiza o modelo persistido de Big Spenders com as linhas novas.
+    
+    Usa os parâmetros de MODEL_CONFIG (ver prediction.atualizar_modelo_incremental)
+    e exporta o modelo resultante para pontuar_registros.
+    
+    Args:
+        caminho: Dataset completo (já com as linhas novas)
+        caminho_novos: Somente as linhas adicionadas desde a última atualização
+    
+    Returns:
+        Dicionário com 'modo', 'motivo', 'threshold' e 'arvores'
+    """
+    from prediction import atualizar_modelo_incremental, exportar_modelo_compilado
+    
+    resultado = atualizar_modelo_incremental(
+        carregar_dados(caminho_novos, DASHBOARD_CONFIG.REQUIRED_COLUMNS),
+        carregar_dataset(caminho),
+        MODEL_CONFIG.BIG_SPENDER_PERCENTILE,
+        MODEL_CONFIG.MODEL_DIR,
+        n_estimators=MODEL_CONFIG.LGBM_N_ESTIMATORS,
+        n_estimators_incremental=MODEL_CONFIG.INCREMENTAL_N_ESTIMATORS,
+        max_depth=MODEL_CONFIG.LGBM_MAX_DEPTH,
+        learning_rate=MODEL_CONFIG.LGBM_LEARNING_RATE,
+        tolerancia_threshold=MODEL_CONFIG.THRESHOLD_DRIFT_TOLERANCE
+    )
+    exportar_modelo_compilado(
+        resultado['model'],
+        resultado['colunas'],
+        os.path.join(MODEL_CONFIG.MODEL_DIR, ARQUIVO_MODELO_COMPILADO)
+    )
+    
+    return {
+        'modo': resultado['modo'],
+        'motivo': resultado['motivo'],
+        'threshold': resultado['threshold'],
+        'arvores': resultado['model'].booster_.num_trees()
+    }
+
+def pontuar_registros(registros: List[dict], diretorio: str = None) -> List[dict]:
+    """
+    Calcula a probabilidade de Big Spender de registros avulsos.
+    
+    Usa o modelo exportado por atualizar_modelo, avaliado só com NumPy.
+    
+    Args:
+        registros: Dicionários {coluna do dataset: valor} (Age, Gender,
+            Category, Season, Location)
+        diretorio: Diretório do modelo (padrão: MODEL_CONFIG.MODEL_DIR)
+    
+    Returns:
+        Um dicionário com 'probabilidade' e 'big_spender' por registro
+    
+    Raises:
+        FileNotFoundError: Se o modelo ainda não foi exportado
+    """
+    from tree_evaluator import AvaliadorArvores
+    
+    caminho = os.path.join(diretorio or MODEL_CONFIG.MODEL_DIR, ARQUIVO_MODELO_COMPILADO)
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(
+            f"❌ Modelo compilado não encontrado: {caminho} (execute --atualizar-modelo)"
+        )
+    
+    avaliador = AvaliadorArvores.carregar(caminho)
+    if not registros:
+        return []
+    
+    probabilidades = avaliador.prever_proba(
+        np.vstack([avaliador.vetorizar(registro) for registro in registros])
+    )
+    return [
+        {'probabilidade': float(p), 'big_spender': bool(p > 0.5)}
+        for p in probabilidades
+    ]
+
+# ===========================
+# SERIALIZAÇÃO
+# ===========================
+
+def _para_json(valor, tabelas: Optional[dict] = None, caminho: str = ""):
+    """
+    Converte o resultado em tipos JSON.
+    
+    Com tabelas informado, DataFrames são separados nele (chave = caminho) e
+    substituídos por uma referência ao arquivo.
+    """
+    if isinstance(valor, pd.DataFrame):
+        if tabelas is not None:
+            tabelas[caminho] = valor
+            return {'tabela': f"{caminho}.parquet"}
+        return _para_json(valor.to_dict(orient="records"))
+    if isinstance(valor, pd.Series):
+        return _para_json(valor.to_dict())
+    if isinstance(valor, dict):
+        return {
+            str(chave): _para_json(item, tabelas, f"{caminho}_{chave}" if caminho else str(chave))
+            for chave, item in valor.items()
+        }
+    if isinstance(valor, (list, tuple)):
+        return [_para_json(item) for item in valor]
+    if isinstance(valor, np.ndarray):
+        return _para_json(valor.tolist())
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and np.isnan(valor):
+        return None
+    return valor
+
+def salvar_resultado(resultado: dict, caminho: str, formato: str = "json") -> None:
+    """
+    Grava o resultado de calcular_respostas.
+    
+    Em JSON tudo vai para um único arquivo. Em Parquet, caminho é um diretório
+    com uma tabela por arquivo e um resultado.json com os demais valores.
+    
+    Args:
+        resultado: Resultado de calcular_respostas
+        caminho: Arquivo (json) ou diretório (parquet) de destino
+        formato: 'json' ou 'parquet'
+    
+    Raises:
+        ValueError: Se o formato for desconhecido ou faltar o pyarrow
+    """
+    if formato not in FORMATOS_SAIDA:
+        raise ValueError(f"❌ Formato de saída desconhecido: {formato}")
+    
+    if formato == "json":
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(_para_json(resultado), f, ensure_ascii=False, indent=2)
+        return
+    
+    from exporter import exportar_dados
+    
+    os.makedirs(caminho, exist_ok=True)
+    tabelas = {}
+    resumo = _para_json(resultado, tabelas)
+    
+    for nome, tabela in tabelas.items():
+        with open(os.path.join(caminho, f"{nome}.parquet"), "wb") as f:
+            exportar_dados(tabela, "Parquet", f)
+    
+    with open(os.path.join(caminho, "resultado.json"), "w", encoding="utf-8") as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+
+# ===========================
+# MODO LOTE
+# ===========================
+
+# Dataset carregado uma vez por processo do pool
+_dados_worker = None
+
+def _inicializar_worker(caminho: str) -> None:
+    """Carrega o dataset no processo do pool"""
+    global _dados_worker
+    _dados_worker = carregar_dataset(caminho)
+
+def _processar_especificacao(filtros: dict, parametros: dict) -> dict:
+    """Executa uma especificação do lote (no processo do pool)"""
+    return calcular_respostas(_dados_worker, filtros, parametros)
+
+def carregar_dataset(caminho: str) -> pd.DataFrame:
+    """
+    Carrega e valida o dataset (mesmas regras do dashboard).
+    
+    Args:
+        caminho: Caminho do CSV
+    
+    Returns:
+        DataFrame validado
+    """
+    from feature_store import feature_store_necessaria, preparar_feature_store
+    
+    df = carregar_dados(caminho, DASHBOARD_CONFIG.REQUIRED_COLUMNS)
+    if feature_store_necessaria(df):
+        preparar_feature_store(caminho, df)
+    return df
+
+def processar_lote(
+    caminho: str,
+    especificacoes: List[dict],
+    parametros: Optional[dict] = None,
+    workers: int = None
+) -> List[dict]:
+    """
+    Calcula as respostas para várias especificações de filtros em paralelo.
+    
+    Args:
+        caminho: Caminho do CSV
+        especificacoes: Lista de filtros (campos de criar_sidebar)
+        parametros: Parâmetros das perguntas (comuns a todo o lote)
+        workers: Processos (padrão: DASHBOARD_CONFIG.ENGINE_WORKERS)
+    
+    Returns:
+        Resultados na ordem das especificações; especificações que falharem
+        trazem apenas 'filtros' e 'erro'
+    """
+    workers = workers or DASHBOARD_CONFIG.ENGINE_WORKERS
+    
+    if workers <= 1 or len(especificacoes) <= 1:
+        df = carregar_dataset(caminho)
+        executar = lambda filtros: calcular_respostas(df, filtros, parametros)
+        futuros = None
+    else:
+        # spawn: processos limpos, sem herdar estado do Streamlit
+        pool = ProcessPoolExecutor(
+            max_workers=min(workers, len(especificacoes)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar_worker,
+            initargs=(caminho,)
+        )
+        futuros = [pool.submit(_processar_especificacao, f, parametros) for f in especificacoes]
+    
+    resultados = []
+    try:
+        for i, filtros in enumerate(especificacoes):
+            try:
+                resultados.append(futuros[i].result() if futuros else executar(filtros))
+            except ValueError as e:
+                resultados.append({'filtros': filtros, 'erro': str(e)})
+    finally:
+        if futuros:
+            pool.shutdown()
+    
+    return resultados
+
+# ===========================
+# CLI
+# ===========================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dados", default=DASHBOARD_CONFIG.CSV_PATH)
+    parser.add_argument("--filtros", help="JSON com uma especificação ou uma lista delas")
+    parser.add_argument("--parametros", default="{}", help="JSON com parâmetros das perguntas")
+    parser.add_argument("--formato", choices=FORMATOS_SAIDA, default="json")
+    parser.add_argument("--saida", help="Arquivo/diretório de saída (padrão: stdout em JSON)")
+    parser.add_argument("--workers", type=int, default=DASHBOARD_CONFIG.ENGINE_WORKERS)
+    parser.add_argument(
+        "--atualizar-modelo", metavar="LINHAS_NOVAS",
+        help="Atualiza o modelo de Big Spenders persistido com as linhas novas"
+    )
+    parser.add_argument(
+        "--pontuar", metavar="REGISTROS",
+        help="JSON com um registro ou uma lista deles, pontuados pelo modelo exportado"
+    )
+    args = parser.parse_args()
+    
+    if args.pontuar:
+        with open(args.pontuar, encoding="utf-8") as f:
+            registros = json.load(f)
+        try:
+            pontuacoes = pontuar_registros(registros if isinstance(registros, list) else [registros])
+        except FileNotFoundError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        saida = pontuacoes if isinstance(registros, list) else pontuacoes[0]
+        print(json.dumps(saida, ensure_ascii=False, indent=2))
+        return 0
+    
+    if args.atualizar_modelo:
+        try:
+            resultado = atualizar_modelo(args.dados, args.atualizar_modelo)
+        except (FileNotFoundError, ValueError) as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        print(json.dumps(_para_json(resultado), ensure_ascii=False, indent=2))
+        return 0
+    
+    especificacoes = None
+    if args.filtros:
+        with open(args.filtros, encoding="utf-8") as f:
+            especificacoes = json.load(f)
+    lote = isinstance(especificacoes, list)
+    if not lote:
+        especificacoes = [especificacoes]
+    parametros = json.loads(args.parametros)
+    
+    try:
+        resultados = processar_lote(args.dados, especificacoes, parametros, args.workers)
+    except (FileNotFoundError, ValueError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    
+    if args.saida is None:
+        if args.formato != "json":
+            parser.error("--saida é obrigatório com --formato parquet")
+        saida = _para_json(resultados if lote else resultados[0])
+        print(json.dumps(saida, ensure_ascii=False, indent=2))
+    elif not lote:
+        salvar_resultado(resultados[0], args.saida, args.formato)
+    else:
+        os.makedirs(args.saida, exist_ok=True)
+        for i, resultado in enumerate(resultados):
+            extensao = ".json" if args.formato == "json" else ""
+            salvar_resultado(
+                resultado,
+                os.path.join(args.saida, f"filtro_{i:03d}{extensao}"),
+                args.formato
+            )
+    
+    falhas = [r['erro'] for r in resultados if 'erro' in r]
+    for falha in falhas:
+        print(falha, file=sys.stderr)
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
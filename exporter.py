@@ -0,0 +1,142 @@
+"""Exportação dos dados filtrados em blocos (CSV, CSV comprimido e Parquet)"""
+import gzip
+import importlib.util
+import io
+import tempfile
+from typing import BinaryIO, Callable
+
+import pandas as pd
+
+from settings import DASHBOARD_CONFIG
+
+FORMATOS_EXPORTACAO = {
+    "CSV": {'extensao': "csv", 'mime': "text/csv"},
+    "CSV (gzip)": {'extensao': "csv.gz", 'mime': "application/gzip"},
+    "CSV (zstd)": {'extensao': "csv.zst", 'mime': "application/zstd"},
+    "Parquet": {'extensao': "parquet", 'mime': "application/vnd.apache.parquet"}
+}
+
+def _blocos(df: pd.DataFrame, tamanho_bloco: int):
+    """Itera sobre o DataFrame em fatias de até tamanho_bloco linhas"""
+    for inicio in range(0, len(df), tamanho_bloco):
+        yield df.iloc[inicio:inicio + tamanho_bloco]
+
+def _escrever_csv(df: pd.DataFrame, destino: BinaryIO, tamanho_bloco: int) -> None:
+    """Escreve o CSV bloco a bloco em um fluxo binário"""
+    texto = io.TextIOWrapper(destino, encoding="utf-8", newline="", write_through=True)
+    try:
+        for i, bloco in enumerate(_blocos(df, tamanho_bloco)):
+            bloco.to_csv(texto, index=False, header=(i == 0))
+        if len(df) == 0:
+            df.to_csv(texto, index=False)
+        texto.flush()
+    finally:
+        # Solta o fluxo sem fechá-lo (quem abriu é quem fecha)
+        texto.detach()
+
+def _escrever_parquet(df: pd.DataFrame, destino: BinaryIO, tamanho_bloco: int) -> None:
+    """Escreve o Parquet com um row group por bloco"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("❌ Exportação em Parquet requer o pacote 'pyarrow'")
+    
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(destino, schema) as writer:
+        for bloco in _blocos(df, tamanho_bloco):
+            writer.write_table(pa.Table.from_pandas(bloco, schema=schema, preserve_index=False))
+
+def exportar_dados(
+    df: pd.DataFrame,
+    formato: str,
+    destino: BinaryIO,
+    tamanho_bloco: int = None
+) -> None:
+    """
+    Serializa o DataFrame em blocos diretamente no destino.
+    
+    Nenhuma cópia completa do arquivo é mantida em memória: cada bloco é
+    convertido, comprimido (quando for o caso) e escrito antes do próximo.
+    
+    Args:
+        df: DataFrame a exportar
+        formato: Chave de FORMATOS_EXPORTACAO
+        destino: Fluxo binário gravável (arquivo, temporário, etc.)
+        tamanho_bloco: Linhas por bloco (padrão: DASHBOARD_CONFIG.EXPORT_CHUNK_ROWS)
+    
+    Raises:
+        ValueError: Se o formato for desconhecido ou faltar a dependência opcional
+    """
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"❌ Formato de exportação desconhecido: {formato}")
+    
+    tamanho_bloco = tamanho_bloco or DASHBOARD_CONFIG.EXPORT_CHUNK_ROWS
+    
+    if formato == "CSV":
+        _escrever_csv(df, destino, tamanho_bloco)
+    elif formato == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=destino, mode="wb") as comprimido:
+            _escrever_csv(df, comprimido, tamanho_bloco)
+    elif formato == "CSV (zstd)":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("❌ Exportação em zstd requer o pacote 'zstandard'")
+        
+        with zstandard.ZstdCompressor().stream_writer(destino, closefd=False) as comprimido:
+            _escrever_csv(df, comprimido, tamanho_bloco)
+    else:
+        _escrever_parquet(df, destino, tamanho_bloco)
+
+def exportar_para_bytes(df: pd.DataFrame, formato: str) -> bytes:
+    """
+    Exporta em blocos para um arquivo temporário e devolve o conteúdo.
+    
+    O temporário é fechado (e removido) antes de retornar; só o resultado
+    final fica em memória, sem os buffers intermediários da conversão.
+    
+    Args:
+        df: DataFrame a exportar
+        formato: Chave de FORMATOS_EXPORTACAO
+    
+    Returns:
+        Conteúdo do arquivo exportado
+    """
+    with tempfile.TemporaryFile() as arquivo:
+        exportar_dados(df, formato, arquivo)
+        arquivo.seek(0)
+        return arquivo.read()
+
+def preparar_download(df: pd.DataFrame, formato: str) -> Callable[[], bytes]:
+    """
+    Cria o gerador do download para st.download_button.
+    
+    O Streamlit só chama a função quando o usuário clica em baixar, então a
+    serialização deixa de acontecer a cada rerun da página. O arquivo gerado
+    é servido a partir da memória (o Streamlit guarda os bytes do download).
+    
+    Args:
+        df: DataFrame a exportar
+        formato: Chave de FORMATOS_EXPORTACAO
+    
+    Returns:
+        Função sem argumentos que devolve o conteúdo exportado
+    """
+    return lambda: exportar_para_bytes(df, formato)
+
+def formato_disponivel(formato: str) -> bool:
+    """
+    Verifica se a dependência opcional do formato está instalada.
+    
+    Args:
+        formato: Chave de FORMATOS_EXPORTACAO
+    
+    Returns:
+        True se o formato pode ser exportado neste ambiente
+    """
+    modulo = {"CSV (zstd)": "zstandard", "Parquet": "pyarrow"}.get(formato)
+    if modulo is None:
+        return True
+    
+    return importlib.util.find_spec(modulo) is not None
@@ -0,0 +1,421 @@
+"""Feature store de clientes: agregados por Customer ID, versionados em disco
+
+A tabela guarda estatísticas suficientes por cliente (contagens, somas,
+máximos e o último valor observado), das quais saem as features usadas pelo
+clustering e pelo modelo: gasto total e médio, frequência anual, taxas de
+desconto/promoção, assinatura, avaliação média e a participação de cada
+categoria no gasto. Como as estatísticas são somáveis, linhas novas no fim do
+dataset só são agregadas e combinadas com a versão anterior.
+
+Cada versão é gravada como colunas mapeadas em memória (columnar_store) em
+um diretório próprio; o arquivo atual.json aponta para a versão vigente.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from settings import MODEL_CONFIG
+from columnar_store import ARQUIVO_MANIFESTO, gravar_colunas, mapear_colunas
+from shared_cache import versao_arquivo
+from fingerprint import marcar_versao, versao_dados
+
+ARQUIVO_ATUAL = "atual.json"
+CHAVE = "Customer ID"
+
+# Compras por ano de cada valor de "Frequency of Purchases"
+COMPRAS_POR_ANO = {
+    "Weekly": 52,
+    "Bi-Weekly": 26,
+    "Fortnightly": 26,
+    "Monthly": 12,
+    "Quarterly": 4,
+    "Every 3 Months": 4,
+    "Annually": 1
+}
+
+# Colunas do dataset lidas pela store (a assinatura das linhas usa só elas)
+COLUNAS_ORIGEM = [
+    CHAVE, "Age", "Gender", "Location", "Category", "Purchase Amount (USD)",
+    "Previous Purchases", "Frequency of Purchases", "Subscription Status",
+    "Discount Applied", "Promo Code Used", "Review Rating"
+]
+
+# Features que não usam o valor da compra: seguras como entrada do modelo de
+# Big Spender (as de gasto vazariam o alvo)
+FEATURES_SEM_GASTO = [
+    "frequencia_anual", "compras_anteriores", "taxa_desconto",
+    "taxa_promo", "assinante", "avaliacao_media"
+]
+
+def _sim(serie: pd.Series) -> pd.Series:
+    return (serie.astype(str) == "Yes").astype(np.int64)
+
+def agregar_linhas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula as estatísticas suficientes por cliente de um bloco de linhas.
+    
+    Args:
+        df: Linhas do dataset (com COLUNAS_ORIGEM)
+    
+    Returns:
+        DataFrame indexado por Customer ID
+    """
+    valor = df["Purchase Amount (USD)"].astype(float)
+    base = pd.DataFrame({
+        CHAVE: df[CHAVE].to_numpy(),
+        'n_linhas': 1,
+        'gasto_soma': valor.to_numpy(),
+        'gasto_maximo': valor.to_numpy(),
+        'descontos': _sim(df["Discount Applied"]).to_numpy(),
+        'promos': _sim(df["Promo Code Used"]).to_numpy(),
+        'avaliacao_soma': df["Review Rating"].fillna(0).to_numpy(dtype=float),
+        'avaliacao_n': df["Review Rating"].notna().to_numpy(dtype=np.int64),
+        'compras_anteriores': df["Previous Purchases"].to_numpy(dtype=float),
+        'assinante': _sim(df["Subscription Status"]).to_numpy(),
+        'frequencia_anual': (
+            df["Frequency of Purchases"].astype(str).map(COMPRAS_POR_ANO).to_numpy(dtype=float)
+        ),
+        'Age': df["Age"].to_numpy(),
+        'Gender': df["Gender"].astype(str).to_numpy(),
+        'Location': df["Location"].astype(str).to_numpy()
+    })
+    
+    por_cliente = base.groupby(CHAVE, sort=True).agg(
+        n_linhas=('n_linhas', 'sum'),
+        gasto_soma=('gasto_soma', 'sum'),
+        gasto_maximo=('gasto_maximo', 'max'),
+        descontos=('descontos', 'sum'),
+        promos=('promos', 'sum'),
+        avaliacao_soma=('avaliacao_soma', 'sum'),
+        avaliacao_n=('avaliacao_n', 'sum'),
+        compras_anteriores=('compras_anteriores', 'max'),
+        # Perfil: último valor observado
+        assinante=('assinante', 'last'),
+        frequencia_anual=('frequencia_anual', 'last'),
+        Age=('Age', 'last'),
+        Gender=('Gender', 'last'),
+        Location=('Location', 'last')
+    )
+    
+    # Gasto por categoria (uma coluna por categoria)
+    gasto_categoria = valor.groupby(
+        [df[CHAVE].to_numpy(), df["Category"].astype(str).to_numpy()]
+    ).sum().unstack(fill_value=0.0)
+    gasto_categoria.columns = [f"gasto_{c}" for c in gasto_categoria.columns]
+    
+    return por_cliente.join(gasto_categoria)
+
+def combinar(anterior: pd.DataFrame, novo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Combina duas tabelas de estatísticas (a nova tem as linhas mais recentes).
+    
+    Args:
+        anterior: Estatísticas já gravadas (indexadas por Customer ID)
+        novo: Estatísticas das linhas novas
+    
+    Returns:
+        Estatísticas de todas as linhas
+    """
+    colunas = list(dict.fromkeys(list(anterior.columns) + list(novo.columns)))
+    gastos = [c for c in colunas if c.startswith("gasto_") and c not in ("gasto_soma", "gasto_maximo")]
+    somas = ['n_linhas', 'gasto_soma', 'descontos', 'promos', 'avaliacao_soma', 'avaliacao_n'] + gastos
+    maximos = ['gasto_maximo', 'compras_anteriores']
+    
+    indice = anterior.index.union(novo.index)
+    a = anterior.reindex(index=indice, columns=colunas)
+    b = novo.reindex(index=indice, columns=colunas)
+    
+    perfil = [c for c in colunas if c not in somas and c not in maximos]
+    
+    # Perfil: vale o valor mais recente não nulo (como o 'last' do groupby)
+    resultado = b[perfil].combine_first(a[perfil])
+    resultado[somas] = a[somas].fillna(0) + b[somas].fillna(0)
+    resultado[maximos] = np.fmax(a[maximos], b[maximos])
+    resultado = resultado[colunas]
+    resultado[['n_linhas', 'descontos', 'promos', 'avaliacao_n']] = (
+        resultado[['n_linhas', 'descontos', 'promos', 'avaliacao_n']].astype(np.int64)
+    )
+    return resultado
+
+def derivar_features(estatisticas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula as features dos clientes a partir das estatísticas.
+    
+    Args:
+        estatisticas: Saída de agregar_linhas/combinar
+    
+    Returns:
+        Estatísticas + features (gasto_total, ticket_medio, gasto_anual_estimado,
+        taxa_desconto, taxa_promo, avaliacao_media e part_<categoria>)
+    """
+    n = estatisticas['n_linhas']
+    features = estatisticas.copy()
+    
+    features['gasto_total'] = estatisticas['gasto_soma']
+    features['ticket_medio'] = estatisticas['gasto_soma'] / n
+    features['gasto_anual_estimado'] = features['ticket_medio'] * estatisticas['frequencia_anual']
+    features['taxa_desconto'] = estatisticas['descontos'] / n
+    features['taxa_promo'] = estatisticas['promos'] / n
+    features['avaliacao_media'] = (
+        estatisticas['avaliacao_soma'] / estatisticas['avaliacao_n'].replace(0, np.nan)
+    )
+    
+    total = estatisticas['gasto_soma'].replace(0, np.nan)
+    for coluna in estatisticas.columns:
+        if coluna.startswith("gasto_") and coluna not in ("gasto_soma", "gasto_maximo"):
+            features[f"part_{coluna[len('gasto_'):]}"] = (estatisticas[coluna] / total).fillna(0.0)
+    
+    return features
+
+def _hashes_linhas(df: pd.DataFrame) -> np.ndarray:
+    """Hash de cada linha (colunas lidas pela store), para detectar linhas novas"""
+    return pd.util.hash_pandas_object(
+        df[COLUNAS_ORIGEM].astype({c: str for c in COLUNAS_ORIGEM if not pd.api.types.is_numeric_dtype(df[c])}),
+        index=False
+    ).to_numpy()
+
+def _assinatura(hashes: np.ndarray) -> str:
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+def ler_atual(diretorio: str = None) -> Optional[dict]:
+    """
+    Lê o apontador da versão vigente.
+    
+    Args:
+        diretorio: Diretório da store (padrão: MODEL_CONFIG.FEATURE_STORE_DIR)
+    
+    Returns:
+        Dicionário com 'versao', 'linhas', 'assinatura', 'clientes', 'modo',
+        'criado_em' e 'historico', ou None se a store estiver vazia
+    """
+    caminho = os.path.join(diretorio or MODEL_CONFIG.FEATURE_STORE_DIR, ARQUIVO_ATUAL)
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _ler_estatisticas(diretorio: str, versao: str) -> pd.DataFrame:
+    """Estatísticas gravadas de uma versão (em memória, para combinar)"""
+    tabela = mapear_colunas(os.path.join(diretorio, versao))
+    colunas = [c for c in tabela.columns if not c.startswith("part_") and c not in (
+        'gasto_total', 'ticket_medio', 'gasto_anual_estimado',
+        'taxa_desconto', 'taxa_promo', 'avaliacao_media'
+    )]
+    estatisticas = tabela[colunas].copy()
+    for coluna in ("Gender", "Location"):
+        estatisticas[coluna] = estatisticas[coluna].astype(str)
+    return estatisticas.set_index(CHAVE)
+
+def atualizar_feature_store(df: pd.DataFrame, diretorio: str = None) -> dict:
+    """
+    Atualiza a store com o dataset: incremental quando o dataset só ganhou
+    linhas no fim, completa quando linhas já processadas mudaram.
+    
+    Args:
+        df: Dataset completo
+        diretorio: Diretório da store (padrão: MODEL_CONFIG.FEATURE_STORE_DIR)
+    
+    Returns:
+        Apontador da versão vigente (ver ler_atual)
+    
+    Raises:
+        ValueError: Se faltarem colunas usadas pela store
+    """
+    diretorio = diretorio or MODEL_CONFIG.FEATURE_STORE_DIR
+    ausentes = [c for c in COLUNAS_ORIGEM if c not in df.columns]
+    if ausentes:
+        raise ValueError(f"❌ Colunas ausentes para a feature store: {', '.join(ausentes)}")
+    
+    hashes = _hashes_linhas(df)
+    atual = ler_atual(diretorio)
+    
+    if atual and atual['linhas'] == len(df) and atual['assinatura'] == _assinatura(hashes):
+        return atual
+    
+    if (
+        atual and atual['linhas'] < len(df)
+        and atual['assinatura'] == _assinatura(hashes[:atual['linhas']])
+    ):
+        modo = "incremental"
+        estatisticas = combinar(
+            _ler_estatisticas(diretorio, atual['versao']),
+            agregar_linhas(df.iloc[atual['linhas']:])
+        )
+    else:
+        modo = "completo"
+        estatisticas = agregar_linhas(df)
+    
+    tabela = derivar_features(estatisticas).reset_index()
+    assinatura = _assinatura(hashes)
+    versao = assinatura[:16]
+    destino = os.path.join(diretorio, versao)
+    if not os.path.exists(os.path.join(destino, ARQUIVO_MANIFESTO)):
+        gravar_colunas(tabela, destino)
+    
+    historico = ([atual['versao']] + atual.get('historico', []) if atual else [])
+    historico = [v for v in historico if v != versao][:max(MODEL_CONFIG.FEATURE_STORE_KEEP_VERSIONS - 1, 0)]
+    novo = {
+        'versao': versao,
+        'linhas': len(df),
+        'assinatura': assinatura,
+        'clientes': len(tabela),
+        'modo': modo,
+        'criado_em': time.time(),
+        'historico': historico
+    }
+    
+    # Escrita atômica: temporário exclusivo (processos concorrentes não
+    # gravam no mesmo arquivo) e substituição
+    fd, temporario = tempfile.mkstemp(dir=diretorio, prefix=".atual-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(novo, f, ensure_ascii=False)
+        os.replace(temporario, os.path.join(diretorio, ARQUIVO_ATUAL))
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    
+    _remover_versoes_antigas(diretorio)
+    return novo
+
+def _remover_versoes_antigas(diretorio: str) -> None:
+    """
+    Remove as versões fora do histórico do apontador relido do disco.
+    
+    Outro processo pode ter substituído atual.json depois da nossa escrita,
+    então só saem versões anteriores à vigente: as gravadas depois dela
+    podem estar a caminho de se tornar a próxima. Processos que ainda mapeiam
+    uma versão removida não são afetados.
+    """
+    vigente = ler_atual(diretorio)
+    if vigente is None:
+        return
+    
+    manter = {vigente['versao'], *vigente.get('historico', [])}
+    try:
+        limite = os.stat(os.path.join(diretorio, vigente['versao'])).st_mtime
+    except FileNotFoundError:
+        return
+    
+    for entrada in os.scandir(diretorio):
+        if (
+            entrada.is_dir() and not entrada.name.startswith(".")
+            and entrada.name not in manter and entrada.stat().st_mtime < limite
+        ):
+            shutil.rmtree(entrada.path, ignore_errors=True)
+
+def feature_store_necessaria(df: pd.DataFrame) -> bool:
+    """
+    Indica se a configuração usa features da store: MODEL_CUSTOMER_FEATURES
+    definido ou alguma CLUSTER_FEATURES que não é coluna do dataset.
+    
+    Args:
+        df: Dataset carregado
+    
+    Returns:
+        True se a store precisa estar atualizada
+    """
+    return bool(MODEL_CONFIG.MODEL_CUSTOMER_FEATURES) or any(
+        f not in df.columns for f in MODEL_CONFIG.CLUSTER_FEATURES
+    )
+
+@st.cache_resource(show_spinner=False)
+def garantir_feature_store(csv_path: str, versao: str, _df: pd.DataFrame) -> dict:
+    """
+    Atualiza a store uma vez por versão do arquivo de dados (por processo).
+    
+    Args:
+        csv_path: Caminho do dataset
+        versao: versao_arquivo(csv_path) (chave do cache)
+        _df: Dataset completo (não entra na chave)
+    
+    Returns:
+        Apontador da versão vigente
+    """
+    return atualizar_feature_store(_df)
+
+def preparar_feature_store(csv_path: str, df: pd.DataFrame) -> dict:
+    """
+    Garante a store atualizada para o dataset carregado.
+    
+    Args:
+        csv_path: Caminho do dataset
+        df: Dataset completo
+    
+    Returns:
+        Apontador da versão vigente
+    """
+    return garantir_feature_store(csv_path, versao_arquivo(csv_path), df)
+
+@st.cache_resource(show_spinner=False)
+def _abrir_versao(diretorio: str, versao: str) -> pd.DataFrame:
+    """Tabela mapeada de uma versão, indexada por Customer ID (uma por processo)"""
+    return mapear_colunas(os.path.join(diretorio, versao)).set_index(CHAVE)
+
+def carregar_features(diretorio: str = None) -> Optional[pd.DataFrame]:
+    """
+    Tabela de features da versão vigente (somente leitura).
+    
+    Args:
+        diretorio: Diretório da store (padrão: MODEL_CONFIG.FEATURE_STORE_DIR)
+    
+    Returns:
+        DataFrame indexado por Customer ID, ou None se a store estiver vazia
+    """
+    diretorio = diretorio or MODEL_CONFIG.FEATURE_STORE_DIR
+    atual = ler_atual(diretorio)
+    if atual is None:
+        return None
+    return _abrir_versao(diretorio, atual['versao'])
+
+def anexar_features(
+    df: pd.DataFrame,
+    colunas: List[str],
+    diretorio: str = None
+) -> pd.DataFrame:
+    """
+    Acrescenta features da store às linhas, pelo Customer ID.
+    
+    Args:
+        df: Linhas do dataset (com Customer ID)
+        colunas: Features da store (colunas já presentes em df são mantidas)
+        diretorio: Diretório da store (padrão: MODEL_CONFIG.FEATURE_STORE_DIR)
+    
+    Returns:
+        Novo DataFrame com as colunas acrescentadas (NaN para clientes fora da store)
+    
+    Raises:
+        ValueError: Se a store estiver vazia ou a feature não existir
+    """
+    colunas = [c for c in colunas if c not in df.columns]
+    if not colunas:
+        return df
+    
+    tabela = carregar_features(diretorio)
+    if tabela is None:
+        raise ValueError("❌ Feature store de clientes vazia: execute atualizar_feature_store")
+    
+    desconhecidas = [c for c in colunas if c not in tabela.columns]
+    if desconhecidas:
+        raise ValueError(f"❌ Features desconhecidas na feature store: {', '.join(desconhecidas)}")
+    
+    extras = tabela[colunas].reindex(df[CHAVE].to_numpy())
+    extras.index = df.index
+    resultado = pd.concat([df, extras], axis=1)
+    
+    # Versão = versão das linhas + features + versão da store (ver fingerprint)
+    versao = versao_dados(df)
+    atual = ler_atual(diretorio or MODEL_CONFIG.FEATURE_STORE_DIR)
+    if versao is not None and atual is not None:
+        marcar_versao(resultado, f"{versao}|features:{colunas}:{atual['versao']}")
+    return resultado
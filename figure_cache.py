@@ -0,0 +1,309 @@
+"""Cache de figuras renderizadas (PNG/SVG)"""
+import io
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import streamlit as st
+
+from settings import UI_CONFIG
+from fingerprint import calcular_fingerprint
+from instrumentation import execucao_atual, medir_etapa
+
+class CacheFiguras:
+    """Cache LRU de figuras renderizadas com orçamento em bytes"""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_usados = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def obter(self, chave: str) -> Optional[bytes]:
+        """
+        Busca uma figura no cache.
+        
+        Args:
+            chave: Chave da figura
+        
+        Returns:
+            Bytes da figura, ou None se não estiver no cache
+        """
+        with self._lock:
+            dados = self._itens.get(chave)
+            if dados is None:
+                self.misses += 1
+                return None
+            
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return dados
+    
+    def guardar(self, chave: str, dados: bytes) -> None:
+        """
+        Guarda uma figura, descartando as menos usadas se o orçamento estourar.
+        
+        Args:
+            chave: Chave da figura
+            dados: Bytes da figura renderizada
+        """
+        if len(dados) > self.max_bytes:
+            return
+        
+        with self._lock:
+            if chave in self._itens:
+                self.bytes_usados -= len(self._itens.pop(chave))
+            
+            self._itens[chave] = dados
+            self.bytes_usados += len(dados)
+            
+            while self.bytes_usados > self.max_bytes:
+                _, antigo = self._itens.popitem(last=False)
+                self.bytes_usados -= len(antigo)
+                self.evictions += 1
+    
+    def limpar(self) -> None:
+        """Remove todas as figuras do cache"""
+        with self._lock:
+            self._itens.clear()
+            self.bytes_usados = 0
+    
+    def estatisticas(self) -> dict:
+        """
+        Retorna uso e contadores do cache.
+        
+        Returns:
+            Dicionário com itens, bytes, hits, misses e evictions
+        """
+        with self._lock:
+            return {
+                'itens': len(self._itens),
+                'bytes_usados': self.bytes_usados,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+# Instância global (compartilhada entre sessões do mesmo processo)
+CACHE_FIGURAS = CacheFiguras(UI_CONFIG.FIGURE_CACHE_MAX_BYTES)
+
+def _chave_grafico(funcao: Callable, formato: str, args: tuple, kwargs: dict) -> str:
+    """Monta a chave do cache para uma chamada de gráfico"""
+    return (
+        f"{funcao.__module__}.{funcao.__qualname__}:{formato}:"
+        f"{calcular_fingerprint(*args, **kwargs)}"
+    )
+
+def _renderizar_bytes(
+    funcao: Callable,
+    args: tuple,
+    kwargs: dict,
+    formato: str,
+    dpi: int
+) -> bytes:
+    """
+    Cria a figura e a serializa (também executada nos processos do pool).
+    
+    Returns:
+        Bytes da figura renderizada
+    """
+    fig = funcao(*args, **kwargs)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=formato, dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
+
+def _renderizar_medido(
+    funcao: Callable,
+    args: tuple,
+    kwargs: dict,
+    formato: str,
+    dpi: int
+) -> tuple:
+    """_renderizar_bytes com os tempos de parede e de CPU do processo do pool"""
+    inicio, cpu = time.perf_counter(), time.process_time()
+    dados = _renderizar_bytes(funcao, args, kwargs, formato, dpi)
+    return dados, time.perf_counter() - inicio, time.process_time() - cpu
+
+def renderizar_grafico(
+    funcao: Callable,
+    *args,
+    formato: str = None,
+    **kwargs
+) -> bytes:
+    """
+    Renderiza um gráfico de charts.py, servindo do cache quando possível.
+    
+    Args:
+        funcao: Função que cria a figura matplotlib
+        *args: Argumentos da função
+        formato: 'png' ou 'svg' (padrão: UI_CONFIG.FIGURE_FORMAT)
+        **kwargs: Argumentos nomeados da função
+    
+    Returns:
+        Bytes da figura renderizada
+    """
+    formato = formato or UI_CONFIG.FIGURE_FORMAT
+    chave = _chave_grafico(funcao, formato, args, kwargs)
+    
+    dados = CACHE_FIGURAS.obter(chave)
+    if dados is not None:
+        return dados
+    
+    with medir_etapa(f"charts.{funcao.__name__}"):
+        dados = _renderizar_bytes(funcao, args, kwargs, formato, UI_CONFIG.FIGURE_DPI)
+    CACHE_FIGURAS.guardar(chave, dados)
+    return dados
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _inicializar_worker() -> None:
+    """Importa matplotlib/seaborn (via charts) uma vez por processo do pool"""
+    import charts  # noqa: F401
+
+def _obter_pool() -> ProcessPoolExecutor:
+    """Cria (uma vez por processo) o pool de renderização"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: não herda threads nem o estado do servidor Streamlit
+            _pool = ProcessPoolExecutor(
+                max_workers=UI_CONFIG.CHART_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_worker
+            )
+            # Sobe todos os processos já, sem esperar pela primeira página
+            for _ in range(UI_CONFIG.CHART_WORKERS):
+                _pool.submit(int)
+        return _pool
+
+def renderizar_graficos(tarefas: List[tuple], formato: str = None) -> List[bytes]:
+    """
+    Renderiza vários gráficos em paralelo, preservando a ordem.
+    
+    Figuras em cache são servidas direto; as demais são distribuídas no pool
+    de processos (UI_CONFIG.CHART_WORKERS).
+    
+    Args:
+        tarefas: Lista de (função, args, kwargs)
+        formato: 'png' ou 'svg' (padrão: UI_CONFIG.FIGURE_FORMAT)
+    
+    Returns:
+        Bytes de cada figura, na ordem das tarefas
+    """
+    formato = formato or UI_CONFIG.FIGURE_FORMAT
+    chaves = [_chave_grafico(f, formato, a, k) for f, a, k in tarefas]
+    resultados = [CACHE_FIGURAS.obter(chave) for chave in chaves]
+    pendentes = [i for i, dados in enumerate(resultados) if dados is None]
+    
+    if len(pendentes) > 1 and UI_CONFIG.CHART_WORKERS > 1:
+        pool = _obter_pool()
+        # Com o perfil ativo, cada processo do pool devolve também os seus tempos
+        execucao = execucao_atual()
+        inicio = time.perf_counter()
+        futuros = {
+            i: pool.submit(
+                _renderizar_medido if execucao else _renderizar_bytes,
+                *tarefas[i], formato, UI_CONFIG.FIGURE_DPI
+            )
+            for i in pendentes
+        }
+        for i, futuro in futuros.items():
+            resultados[i] = futuro.result()
+            if execucao is not None:
+                resultados[i], wall, cpu = resultados[i]
+                execucao.registrar(f"charts.{tarefas[i][0].__name__} (pool)", inicio, wall, cpu)
+    else:
+        for i in pendentes:
+            with medir_etapa(f"charts.{tarefas[i][0].__name__}"):
+                resultados[i] = _renderizar_bytes(*tarefas[i], formato, UI_CONFIG.FIGURE_DPI)
+    
+    for i in pendentes:
+        CACHE_FIGURAS.guardar(chaves[i], resultados[i])
+    
+    return resultados
+
+def _mostrar(destino, dados: bytes, formato: str) -> None:
+    """Exibe os bytes de uma figura em um elemento Streamlit"""
+    if formato == "svg":
+        destino.image(dados.decode("utf-8"), use_container_width=True)
+    else:
+        destino.image(dados, use_container_width=True)
+
+# Lote ativo na thread do script (None = renderização imediata)
+_estado = threading.local()
+
+@contextmanager
+def renderizacao_paralela():
+    """
+    Agrupa os gráficos exibidos dentro do bloco e os renderiza em paralelo.
+    
+    exibir_grafico passa a reservar um espaço (st.empty) na posição do gráfico;
+    ao sair do bloco, todos são renderizados juntos e preenchidos em ordem.
+    Blocos aninhados se juntam ao lote mais externo.
+    """
+    if getattr(_estado, "lote", None) is not None:
+        yield
+        return
+    
+    _estado.lote = []
+    try:
+        yield
+        lote = _estado.lote
+    finally:
+        _estado.lote = None
+    
+    formato = UI_CONFIG.FIGURE_FORMAT
+    dados = renderizar_graficos([tarefa for _, tarefa in lote], formato)
+    for (espaco, _), figura in zip(lote, dados):
+        _mostrar(espaco, figura, formato)
+
+def _funcao_grafico(grafico: str) -> Callable:
+    """Função de charts.py pelo nome (importa matplotlib/seaborn na primeira vez)"""
+    import charts
+    
+    return getattr(charts, grafico)
+
+def exibir_grafico(
+    grafico: str,
+    *args,
+    formato: str = None,
+    **kwargs
+) -> None:
+    """
+    Exibe um gráfico de charts.py no Streamlit usando o cache de figuras.
+    
+    Dentro de renderizacao_paralela o gráfico entra no lote; fora dele é
+    renderizado imediatamente. Com UI_CONFIG.CHART_BACKEND = "vega" o
+    servidor só envia a especificação Vega-Lite e o navegador desenha, sem
+    importar charts.py (nem matplotlib/seaborn).
+    
+    Args:
+        grafico: Nome da função em charts.py (ex.: "criar_grafico_pizza")
+        *args: Argumentos da função
+        formato: 'png' ou 'svg' (padrão: UI_CONFIG.FIGURE_FORMAT)
+        **kwargs: Argumentos nomeados da função
+    """
+    if UI_CONFIG.CHART_BACKEND == "vega":
+        from vega_charts import especificar
+        
+        st.vega_lite_chart(especificar(grafico, *args, **kwargs), use_container_width=True)
+        return
+    
+    funcao = _funcao_grafico(grafico)
+    formato = formato or UI_CONFIG.FIGURE_FORMAT
+    lote = getattr(_estado, "lote", None)
+    
+    if lote is not None and formato == UI_CONFIG.FIGURE_FORMAT:
+        lote.append((st.empty(), (funcao, args, kwargs)))
+        return
+    
+    _mostrar(st, renderizar_grafico(funcao, *args, formato=formato, **kwargs), formato)
@@ -0,0 +1,121 @@
+"""Fingerprint dos argumentos das funções em cache
+
+Usado pelo cache em memória (cache_manager), pelo compartilhado (shared_cache)
+e pelo de figuras (figure_cache). Hashear um DataFrame inteiro custa uma
+passada pelos dados a cada chamada; por isso os DataFrames produzidos pelo
+projeto recebem uma versão (marcar_versao): o dataset carregado leva a versão
+do arquivo, o filtrado acrescenta os filtros e o resultado de uma função em
+cache leva a chave da chamada. Com a versão, o fingerprint não percorre as
+linhas. DataFrames derivados (ex.: df[mascara], df.copy()) são outros objetos
+e voltam a ser identificados pelo conteúdo.
+
+DataFrames versionados não devem ser alterados no lugar: acrescentar ou
+remover colunas invalida a versão, mas trocar valores não.
+"""
+import hashlib
+import pickle
+import threading
+import weakref
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# id do objeto -> (referência fraca, versão, linhas, colunas)
+_versoes = {}
+_versoes_lock = threading.Lock()
+_LIMPEZA_A_CADA = 1024
+
+def marcar_versao(df: pd.DataFrame, versao: str) -> pd.DataFrame:
+    """
+    Associa ao objeto DataFrame uma versão que identifica o seu conteúdo.
+    
+    A versão vale só para este objeto (não passa para cópias nem para
+    DataFrames derivados) e deve mudar sempre que o conteúdo mudar.
+    
+    Args:
+        df: DataFrame
+        versao: Identificação do conteúdo (ex.: versão do arquivo + filtros)
+    
+    Returns:
+        O próprio DataFrame
+    """
+    with _versoes_lock:
+        if len(_versoes) >= _LIMPEZA_A_CADA:
+            # Descarta as entradas de objetos já coletados
+            for chave in [c for c, (ref, *_) in _versoes.items() if ref() is None]:
+                del _versoes[chave]
+        _versoes[id(df)] = (weakref.ref(df), versao, len(df), tuple(df.columns))
+    return df
+
+def versao_dados(df: pd.DataFrame) -> Optional[str]:
+    """
+    Versão registrada para o DataFrame (ver marcar_versao).
+    
+    Args:
+        df: DataFrame
+    
+    Returns:
+        Versão, ou None se o objeto não foi marcado ou mudou de forma
+    """
+    entrada = _versoes.get(id(df))
+    if entrada is None:
+        return None
+    
+    ref, versao, linhas, colunas = entrada
+    if ref() is not df or len(df) != linhas or tuple(df.columns) != colunas:
+        return None
+    return versao
+
+def marcar_resultado(valor, chave: str):
+    """Marca um DataFrame devolvido por uma função em cache com a chave da chamada"""
+    if isinstance(valor, pd.DataFrame):
+        marcar_versao(valor, chave)
+    return valor
+
+def calcular_fingerprint(*args, **kwargs) -> str:
+    """
+    Calcula o fingerprint dos argumentos de uma chamada.
+    
+    DataFrames versionados são identificados pela versão; os demais
+    DataFrames, Series e arrays pelo conteúdo; escalares pela sua
+    representação e os demais objetos (ex.: modelos) pelo pickle.
+    
+    Returns:
+        Hash hexadecimal dos argumentos
+    """
+    h = hashlib.sha1()
+    
+    def atualizar(valor):
+        if isinstance(valor, pd.DataFrame):
+            versao = versao_dados(valor)
+            if versao is not None:
+                h.update(f"dfv{versao}".encode())
+                return
+            h.update(f"df{list(valor.columns)}{list(valor.dtypes)}".encode())
+            h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+        elif isinstance(valor, pd.Series):
+            h.update(f"series{valor.name}{valor.dtype}".encode())
+            h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+        elif isinstance(valor, np.ndarray):
+            h.update(f"np{valor.shape}{valor.dtype}".encode())
+            h.update(np.ascontiguousarray(valor).tobytes())
+        elif isinstance(valor, (list, tuple)):
+            h.update(f"{type(valor).__name__}{len(valor)}".encode())
+            for item in valor:
+                atualizar(item)
+        elif isinstance(valor, dict):
+            h.update(f"dict{len(valor)}".encode())
+            for chave in sorted(valor, key=repr):
+                h.update(repr(chave).encode())
+                atualizar(valor[chave])
+        elif valor is None or isinstance(valor, (str, bytes, int, float, complex)):
+            h.update(repr(valor).encode())
+        else:
+            # repr de objetos arbitrários não identifica o estado
+            h.update(type(valor).__qualname__.encode())
+            h.update(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    atualizar(args)
+    atualizar(kwargs)
+    return h.hexdigest()
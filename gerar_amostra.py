@@ -0,0 +1,65 @@
+"""Dataset sintético grande para medir os backends e o clustering
+
+Uso:
+    python gerar_amostra.py [--repeticoes 300] [--saida amostra_grande.parquet]
+
+Repete o CSV do repositório `repeticoes` vezes e renumera o Customer ID de 0 a
+N-1 (cada linha vira um cliente, como no original). Com o padrão são
+1.170.000 linhas: é o arquivo usado nos tempos citados no histórico do projeto
+("amostra de 1,17M linhas"). As demais colunas repetem o CSV, então as
+distribuições e as categorias são as mesmas; só o volume muda. Com extensão
+.csv grava CSV; caso contrário, Parquet (requer pyarrow).
+
+Exemplo:
+    python gerar_amostra.py && python backend_check.py --dados amostra_grande.parquet
+
+Para o dashboard, aponte DASHBOARD_CONFIG.CSV_PATH para o arquivo gerado.
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+from settings import DASHBOARD_CONFIG
+
+REPETICOES_PADRAO = 300
+
+def gerar_amostra(csv_path: str, repeticoes: int) -> pd.DataFrame:
+    """
+    Repete o dataset e renumera os clientes.
+    
+    Args:
+        csv_path: CSV de origem
+        repeticoes: Número de cópias
+    
+    Returns:
+        DataFrame com len(origem) × repeticoes linhas
+    
+    Raises:
+        ValueError: Se repeticoes < 1
+    """
+    if repeticoes < 1:
+        raise ValueError(f"❌ repeticoes deve ser >= 1 (recebido {repeticoes})")
+    
+    origem = pd.read_csv(csv_path)
+    df = pd.concat([origem] * repeticoes, ignore_index=True)
+    df["Customer ID"] = range(len(df))
+    return df
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dados", default=DASHBOARD_CONFIG.CSV_PATH)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO)
+    parser.add_argument("--saida", default="amostra_grande.parquet")
+    args = parser.parse_args()
+    
+    df = gerar_amostra(args.dados, args.repeticoes)
+    if args.saida.endswith(".csv"):
+        df.to_csv(args.saida, index=False)
+    else:
+        df.to_parquet(args.saida, index=False)
+    print(f"{len(df):,} linhas -> {args.saida}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""Instrumentação por etapa: tempo, CPU, memória e cache (desligada por padrão)
+
+Com DASHBOARD_CONFIG.PROFILING_ENABLED, cada execução do script (rerun da
+página ou de um fragmento) registra, por etapa: tempo de parede, tempo de CPU
+do processo, pico de alocação (tracemalloc, relativo ao início da etapa) e os
+hits/misses do GERENCIADOR_CACHE e do CACHE_FIGURAS durante a etapa. As
+etapas são marcadas com @instrumentar ou `with medir_etapa(nome)`; fora de
+uma execução ativa (motor headless, aquecimento em threads) nada é medido.
+
+Ao fim da execução, as etapas são exportadas como linhas JSON
+(PROFILING_EXPORT_PATH) e exibidas no painel de perfil. Os contadores de CPU
+e de cache são do processo: com várias sessões simultâneas, incluem o
+trabalho das outras. O pico de memória também: o tracemalloc rastreia as
+alocações de todas as threads (outras sessões, aquecimento de caches) e o
+tracemalloc.reset_peak usado entre etapas é global, então execuções
+simultâneas zeram o pico umas das outras. Com mais de uma sessão ativa, os
+picos servem só como ordem de grandeza; para medi-los, use uma sessão só.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from settings import DASHBOARD_CONFIG
+
+_local = threading.local()
+_exportacao_lock = threading.Lock()
+
+def _contadores_cache() -> dict:
+    """Hits e misses atuais dos caches do processo"""
+    from cache_manager import GERENCIADOR_CACHE
+    from figure_cache import CACHE_FIGURAS
+    
+    return {
+        'cache_hits': GERENCIADOR_CACHE.hits,
+        'cache_misses': GERENCIADOR_CACHE.misses,
+        'figuras_hits': CACHE_FIGURAS.hits,
+        'figuras_misses': CACHE_FIGURAS.misses
+    }
+
+class _Etapa:
+    """Etapa em andamento"""
+    
+    __slots__ = ('nome', 'nivel', 'inicio', 'cpu', 'base', 'pico', 'caches')
+    
+    def __init__(self, nome: str, nivel: int, base: int):
+        self.nome = nome
+        self.nivel = nivel
+        self.base = base
+        self.pico = 0
+        self.caches = _contadores_cache()
+        self.inicio = time.perf_counter()
+        self.cpu = time.process_time()
+
+class Execucao:
+    """Etapas medidas em uma execução do script"""
+    
+    def __init__(self, tipo: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.tipo = tipo
+        self.criado_em = time.time()
+        self.etapas = []
+        self._abertas = []
+        self._inicio = time.perf_counter()
+        self._cpu = time.process_time()
+        self.memoria = tracemalloc.is_tracing()
+    
+    def _atualizar_picos(self) -> int:
+        """Propaga o pico desde o último evento às etapas abertas; retorna a memória atual"""
+        if not self.memoria:
+            return 0
+        atual, pico = tracemalloc.get_traced_memory()
+        for etapa in self._abertas:
+            etapa.pico = max(etapa.pico, pico - etapa.base)
+        # Global ao processo: execuções simultâneas zeram o pico umas das outras
+        tracemalloc.reset_peak()
+        return atual
+    
+    def abrir(self, nome: str) -> _Etapa:
+        etapa = _Etapa(nome, len(self._abertas), self._atualizar_picos())
+        self._abertas.append(etapa)
+        return etapa
+    
+    def fechar(self, etapa: _Etapa) -> None:
+        wall = time.perf_counter() - etapa.inicio
+        cpu = time.process_time() - etapa.cpu
+        self._atualizar_picos()
+        self._abertas.remove(etapa)
+        
+        caches = _contadores_cache()
+        self.etapas.append({
+            'etapa': etapa.nome,
+            'nivel': etapa.nivel,
+            'inicio_s': etapa.inicio - self._inicio,
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'pico_bytes': etapa.pico if self.memoria else None,
+            **{nome: caches[nome] - etapa.caches[nome] for nome in caches}
+        })
+    
+    def registrar(self, nome: str, inicio: float, wall_s: float, cpu_s: float) -> None:
+        """Etapa medida em outro processo (ex.: renderização no pool de gráficos)"""
+        self.etapas.append({
+            'etapa': nome,
+            'nivel': len(self._abertas),
+            'inicio_s': inicio - self._inicio,
+            'wall_s': wall_s,
+            'cpu_s': cpu_s,
+            'pico_bytes': None,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'figuras_hits': 0,
+            'figuras_misses': 0
+        })
+    
+    def resumo(self) -> dict:
+        return {
+            'execucao': self.id,
+            'tipo': self.tipo,
+            'criado_em': self.criado_em,
+            'wall_s': time.perf_counter() - self._inicio,
+            'cpu_s': time.process_time() - self._cpu,
+            # Na ordem de início (etapas internas terminam antes das externas)
+            'etapas': sorted(self.etapas, key=lambda etapa: etapa['inicio_s'])
+        }
+
+def execucao_atual() -> Optional[Execucao]:
+    """Execução medida na thread atual (None se não houver)"""
+    return getattr(_local, "execucao", None)
+
+def iniciar_execucao(tipo: str = "pagina") -> Optional[Execucao]:
+    """
+    Começa a medir uma execução do script na thread atual.
+    
+    Args:
+        tipo: "pagina" (rerun completo) ou "fragmento"
+    
+    Returns:
+        Execução ativa, ou None com o perfil desligado
+    """
+    if not DASHBOARD_CONFIG.PROFILING_ENABLED:
+        _local.execucao = None
+        return None
+    
+    if DASHBOARD_CONFIG.PROFILING_TRACEMALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    
+    _local.execucao = Execucao(tipo)
+    return _local.execucao
+
+@contextmanager
+def medir_etapa(nome: str):
+    """
+    Mede o bloco como uma etapa da execução ativa (não faz nada sem ela).
+    
+    Args:
+        nome: Nome da etapa
+    """
+    execucao = execucao_atual()
+    if execucao is None:
+        yield
+        return
+    
+    etapa = execucao.abrir(nome)
+    try:
+        yield
+    finally:
+        execucao.fechar(etapa)
+
+def instrumentar(funcao: Callable = None, *, nome: str = None):
+    """
+    Mede cada chamada da função como uma etapa.
+    
+    Aplicado por fora dos decoradores de cache, mede também as chamadas
+    servidas do cache (com o hit registrado na etapa).
+    
+    Args:
+        funcao: Função decorada (uso como @instrumentar)
+        nome: Nome da etapa (padrão: nome da função)
+    
+    Returns:
+        Função decorada
+    """
+    if funcao is None:
+        return lambda f: instrumentar(f, nome=nome)
+    
+    etapa = nome or funcao.__name__
+    
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        if execucao_atual() is None:
+            return funcao(*args, **kwargs)
+        with medir_etapa(etapa):
+            return funcao(*args, **kwargs)
+    
+    return wrapper
+
+def exportar_execucao(resumo: dict, caminho: str, sessao: str = None) -> None:
+    """
+    Acrescenta a execução ao arquivo JSON lines: uma linha por etapa e uma
+    linha 'execucao' com os totais.
+    
+    Args:
+        resumo: Resultado de Execucao.resumo
+        caminho: Arquivo .jsonl
+        sessao: Identificador da sessão Streamlit
+    """
+    comum = {'execucao': resumo['execucao'], 'tipo': resumo['tipo'], 'sessao': sessao}
+    linhas = [
+        {'registro': 'etapa', 'criado_em': resumo['criado_em'], **comum, **etapa}
+        for etapa in resumo['etapas']
+    ]
+    linhas.append({
+        'registro': 'execucao',
+        'criado_em': resumo['criado_em'],
+        **comum,
+        'wall_s': resumo['wall_s'],
+        'cpu_s': resumo['cpu_s'],
+        'etapas': len(resumo['etapas'])
+    })
+    
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with _exportacao_lock, open(caminho, "a", encoding="utf-8") as f:
+        for linha in linhas:
+            f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+
+def finalizar_execucao() -> Optional[dict]:
+    """
+    Encerra a execução ativa: exporta as etapas e guarda o resumo no
+    histórico da sessão.
+    
+    Returns:
+        Resumo da execução (ver Execucao.resumo), ou None sem execução ativa
+    """
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    
+    execucao = execucao_atual()
+    if execucao is None:
+        return None
+    _local.execucao = None
+    
+    resumo = execucao.resumo()
+    ctx = get_script_run_ctx(suppress_warning=True)
+    
+    if DASHBOARD_CONFIG.PROFILING_EXPORT_PATH:
+        exportar_execucao(
+            resumo,
+            DASHBOARD_CONFIG.PROFILING_EXPORT_PATH,
+            ctx.session_id if ctx else None
+        )
+    
+    if ctx is not None:
+        historico = st.session_state.setdefault("perfil_execucoes", [])
+        historico.insert(0, resumo)
+        del historico[DASHBOARD_CONFIG.PROFILING_HISTORY:]
+    
+    return resumo
+
+@contextmanager
+def execucao_fragmento():
+    """
+    Mede um rerun isolado de fragmento como execução própria; dentro de uma
+    execução da página, não faz nada.
+    """
+    if execucao_atual() is not None or iniciar_execucao("fragmento") is None:
+        yield
+        return
+    
+    try:
+        yield
+    finally:
+        finalizar_execucao()
+
+def _tabela_etapas(etapas: list):
+    import pandas as pd
+    
+    tabela = pd.DataFrame(etapas)
+    tabela['etapa'] = ["  " * nivel + nome for nivel, nome in zip(tabela['nivel'], tabela['etapa'])]
+    tabela['pico_mb'] = tabela['pico_bytes'] / (1024 * 1024)
+    return tabela[[
+        'etapa', 'wall_s', 'cpu_s', 'pico_mb',
+        'cache_hits', 'cache_misses', 'figuras_hits', 'figuras_misses'
+    ]]
+
+def exibir_painel_perfil() -> None:
+    """Encerra a execução ativa e exibe o painel de perfil (recolhível)"""
+    import streamlit as st
+    
+    resumo = finalizar_execucao()
+    if resumo is None:
+        return
+    
+    with st.expander(" Perfil da Execução"):
+        st.caption(
+            f"Execução {resumo['execucao']}: {resumo['wall_s']:.3f} s de parede, "
+            f"{resumo['cpu_s']:.3f} s de CPU, {len(resumo['etapas'])} etapas"
+        )
+        st.caption(
+            "CPU, cache e pico de memória são medidos no processo inteiro: com "
+            "outras sessões ou o aquecimento de caches rodando ao mesmo tempo, "
+            "incluem o trabalho delas (e os picos de memória zeram uns aos outros)."
+        )
+        if resumo['etapas']:
+            st.dataframe(
+                _tabela_etapas(resumo['etapas']),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    'etapa': "Etapa",
+                    'wall_s': st.column_config.NumberColumn("Parede (s)", format="%.3f"),
+                    'cpu_s': st.column_config.NumberColumn("CPU (s)", format="%.3f"),
+                    'pico_mb': st.column_config.NumberColumn("Pico (MB)", format="%.1f"),
+                    'cache_hits': "Cache hits",
+                    'cache_misses': "Cache misses",
+                    'figuras_hits': "Figuras hits",
+                    'figuras_misses': "Figuras misses"
+                }
+            )
+        
+        historico = st.session_state.get("perfil_execucoes", [])[1:]
+        if historico:
+            st.write("**Execuções anteriores (inclui reruns de fragmentos):**")
+            st.dataframe(
+                [
+                    {
+                        'Execução': r['execucao'],
+                        'Tipo': r['tipo'],
+                        'Parede (s)': round(r['wall_s'], 3),
+                        'CPU (s)': round(r['cpu_s'], 3),
+                        'Etapas': len(r['etapas'])
+                    }
+                    for r in historico
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
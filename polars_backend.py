@@ -0,0 +1,244 @@
+"""Backend Polars: filtros e agregações em planos lazy sobre o arquivo
+
+Com DASHBOARD_CONFIG.QUERY_BACKEND = "polars", as funções de data_processor
+montam um LazyFrame sobre o CSV/Parquet de origem (scan), com o predicado da
+sidebar e os agrupamentos no mesmo plano: o otimizador leva o filtro e a
+seleção de colunas para a leitura, e o motor executa em várias threads. O
+DataFrame filtrado carrega a especificação (ver data_loader.marcar_consulta),
+então cada pergunta remonta o plano a partir do arquivo em vez de agregar as
+linhas em pandas. Os resultados seguem o formato e a ordem do caminho pandas.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_loader import marcar_consulta
+from data_processor import montar_vendas_por_dimensao, quantil_linear, resumir_persona
+
+COLUNA_VALOR = "Purchase Amount (USD)"
+
+def _polars():
+    try:
+        import polars
+    except ImportError:
+        raise ValueError("❌ Backend 'polars' requer o pacote 'polars'")
+    return polars
+
+def varrer(caminho: str, numerar_linhas: bool = False):
+    """
+    LazyFrame sobre o arquivo de origem (nada é lido até o collect).
+    
+    Args:
+        caminho: CSV ou Parquet
+        numerar_linhas: Incluir a coluna __linha (posição da linha no arquivo,
+            usada como índice do DataFrame, como no pandas)
+    
+    Returns:
+        pl.LazyFrame
+    """
+    pl = _polars()
+    if caminho.endswith(".parquet"):
+        plano = pl.scan_parquet(caminho)
+    else:
+        # Inferência sobre o arquivo inteiro, como o pd.read_csv
+        plano = pl.scan_csv(caminho, infer_schema_length=None)
+    
+    if numerar_linhas:
+        plano = plano.with_row_index("__linha")
+    return plano
+
+def compilar_filtros(filtros: Optional[dict]):
+    """
+    Compila a especificação de filtros da sidebar em um predicado Polars.
+    
+    Args:
+        filtros: Campos de criar_sidebar ('categorias', 'generos',
+            'faixa_etaria', 'estacoes'); None = sem filtro
+    
+    Returns:
+        pl.Expr booleana (nulos contam como falso)
+    """
+    pl = _polars()
+    if filtros is None:
+        return pl.lit(True)
+    
+    predicado = (
+        pl.col("Category").is_in(list(filtros['categorias'])) &
+        pl.col("Gender").is_in(list(filtros['generos'])) &
+        pl.col("Age").is_between(*filtros['faixa_etaria'], closed="both") &
+        pl.col("Season").is_in(list(filtros['estacoes']))
+    )
+    return predicado.fill_null(False)
+
+def _linhas(plano) -> pd.DataFrame:
+    """Coleta um plano de linhas como DataFrame pandas indexado pela posição no arquivo"""
+    df = plano.collect().to_pandas()
+    df = df.set_index(df.pop("__linha").astype("int64"))
+    df.index.name = None
+    
+    # Texto vem como object; o pd.read_csv usa o tipo str
+    for coluna in df.columns:
+        if df[coluna].dtype == object:
+            df[coluna] = df[coluna].astype("str")
+    return df
+
+def filtrar(caminho: str, filtros: dict) -> pd.DataFrame:
+    """
+    Equivalente a aplicar_filtros executado no arquivo.
+    
+    Args:
+        caminho: Arquivo de origem
+        filtros: Campos de criar_sidebar
+    
+    Returns:
+        Linhas filtradas, com o índice igual à posição no arquivo
+    """
+    df = _linhas(varrer(caminho, numerar_linhas=True).filter(compilar_filtros(filtros)))
+    return marcar_consulta(df, caminho, filtros)
+
+def estatisticas_filtradas(caminho: str, filtros: dict) -> dict:
+    """
+    Equivalente a calcular_estatisticas_filtradas em um único plano.
+    
+    Args:
+        caminho: Arquivo de origem
+        filtros: Campos de criar_sidebar
+    
+    Returns:
+        Dicionário com estatísticas e deltas
+    """
+    pl = _polars()
+    predicado = compilar_filtros(filtros)
+    valor = pl.col(COLUNA_VALOR)
+    
+    linha = varrer(caminho).select(
+        pl.len().alias('clientes_original'),
+        valor.count().alias('contagem_original'),
+        valor.sum().alias('soma_original'),
+        predicado.sum().cast(pl.Int64).alias('clientes'),
+        valor.filter(predicado).count().alias('contagem'),
+        valor.filter(predicado).sum().alias('soma'),
+        valor.filter(predicado).max().alias('maximo')
+    ).collect().row(0, named=True)
+    
+    # Média como no pandas: soma / valores não nulos (NaN sem valores)
+    ticket_original = (
+        linha['soma_original'] / linha['contagem_original']
+        if linha['contagem_original'] else np.nan
+    )
+    ticket = linha['soma'] / linha['contagem'] if linha['contagem'] else np.nan
+    
+    return {
+        'clientes': linha['clientes'],
+        'delta_clientes_pct': (linha['clientes'] / (linha['clientes_original'] or 1) - 1) * 100,
+        'ticket_medio': ticket,
+        'delta_ticket': ticket - ticket_original,
+        'valor_total': linha['soma'],
+        'valor_maximo': linha['maximo'] if linha['maximo'] is not None else np.nan
+    }
+
+def vendas_por_dimensao(caminho: str, filtros: Optional[dict]) -> dict:
+    """
+    Equivalente a calcular_vendas_por_dimensao: os três agrupamentos são
+    coletados juntos, com a leitura filtrada compartilhada entre eles.
+    
+    Args:
+        caminho: Arquivo de origem
+        filtros: Campos de criar_sidebar (None = arquivo inteiro)
+    
+    Returns:
+        Dicionário com agregações
+    """
+    pl = _polars()
+    filtrado = varrer(caminho).filter(compilar_filtros(filtros))
+    valor = pl.col(COLUNA_VALOR)
+    
+    def agrupar(chaves: list, metricas: list):
+        # Chaves nulas ficam de fora, como no groupby do pandas
+        return (
+            filtrado.drop_nulls(chaves)
+            .group_by(chaves)
+            .agg(metricas)
+            .sort(chaves)
+        )
+    
+    # Contagens do Polars são u32; o pandas devolve int64
+    soma, contagem = valor.sum().alias('sum'), valor.count().cast(pl.Int64).alias('count')
+    estacao_local, estacao, categoria = pl.collect_all([
+        agrupar(["Season", "Location"], [soma, contagem]),
+        agrupar(["Season"], [soma]),
+        agrupar(["Category"], [soma, contagem])
+    ])
+    
+    return montar_vendas_por_dimensao(
+        estacao_local.to_pandas(),
+        estacao.to_pandas(),
+        categoria.to_pandas()
+    )
+
+def _acima_do_corte(
+    caminho: str,
+    filtros: Optional[dict],
+    percentil: float
+) -> Tuple[pd.DataFrame, float]:
+    """
+    Corte por percentil e linhas acima dele: só os dois vizinhos da posição
+    do quantil e as linhas selecionadas são coletados.
+    """
+    pl = _polars()
+    valores = (
+        varrer(caminho)
+        .filter(compilar_filtros(filtros))
+        .select(pl.col(COLUNA_VALOR).drop_nulls())
+    )
+    
+    n = valores.select(pl.len()).collect().item()
+    threshold = quantil_linear(
+        n,
+        percentil,
+        lambda inicio: valores.sort(COLUNA_VALOR).slice(inicio, 2).collect()[COLUNA_VALOR].to_numpy()
+    )
+    
+    # Comparar com NaN não seleciona nada, como no pandas
+    linhas = _linhas(
+        varrer(caminho, numerar_linhas=True)
+        .filter(compilar_filtros(filtros) & (pl.col(COLUNA_VALOR) > float(threshold)))
+    )
+    return linhas, threshold
+
+def big_spenders(
+    caminho: str,
+    filtros: Optional[dict],
+    percentile: float
+) -> Tuple[pd.DataFrame, float]:
+    """
+    Equivalente a calcular_big_spenders executado no arquivo.
+    
+    Args:
+        caminho: Arquivo de origem
+        filtros: Campos de criar_sidebar (None = arquivo inteiro)
+        percentile: Percentil de corte (0.0 a 1.0)
+    
+    Returns:
+        Tuple de (dataframe de big spenders, threshold usado)
+    """
+    return _acima_do_corte(caminho, filtros, percentile)
+
+def dados_top_gastadores(
+    caminho: str,
+    filtros: Optional[dict],
+    percentil: float
+) -> Optional[dict]:
+    """
+    Equivalente a preparar_dados_top_gastadores executado no arquivo.
+    
+    Args:
+        caminho: Arquivo de origem
+        filtros: Campos de criar_sidebar (None = arquivo inteiro)
+        percentil: Percentil de corte
+    
+    Returns:
+        Dicionário com análise de persona
+    """
+    return resumir_persona(*_acima_do_corte(caminho, filtros, percentil))
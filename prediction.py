@@ -1,65 +1,59 @@
 """Modelos de predição (LightGBM)"""
+import hashlib
+import json
+import os
+import tempfile
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+import lightgbm as lgb
 from lightgbm import LGBMClassifier
 from sklearn.metrics import roc_auc_score, classification_report
-from shap import TreeExplainer
+from tree_evaluator import compilar_arvores, salvar_arvores
+from shared_cache import cache_compartilhado
+from cancelamento import callback_lightgbm
+from instrumentation import instrumentar
+from fingerprint import versao_dados
 import streamlit as st
-from typing import Tuple
+from typing import Tuple, Optional
 
-def preparar_dados_modelo(
-    df: pd.DataFrame, 
-    threshold: float,
-    test_size: float,
-    random_state: int
-) -> dict:
+FEATURES_MODELO = ['Age', 'Gender', 'Category', 'Season', 'Location']
+FEATURES_CATEGORICAS = ['Gender', 'Category', 'Season', 'Location']
+
+ARQUIVO_BOOSTER = "big_spender.txt"
+ARQUIVO_METADADOS = "big_spender.json"
+
+def codificar_features(
+    df: pd.DataFrame,
+    colunas: Optional[list] = None
+) -> pd.DataFrame:
     """
-    Prepara os dados para o treinamento do modelo.
+    Aplica One-Hot Encoding nas features do modelo.
     
     Args:
         df: DataFrame com os dados
-        threshold: Limite de compra para definir Big Spender
-        test_size: Proporção do conjunto de teste
-        random_state: Seed para reprodutibilidade
+        colunas: Colunas de um modelo já treinado. Quando informado, o
+            resultado é alinhado a esse vocabulário (colunas ausentes viram 0)
         
     Returns:
-        Dicionário com X_train, X_test, y_train, y_test
+        DataFrame com as features codificadas
     """
-    # 1. Feature Engineering e Target
-    df['is_big_spender'] = (df['Purchase Amount (USD)'] > threshold).astype(int)
-    
-    # 2. Seleção de Features
-    features = ['Age', 'Gender', 'Category', 'Season', 'Location']
-    
-    # 3. One-Hot Encoding para variáveis categóricas
-    df_model = pd.get_dummies(df[features], drop_first=True)
-    
-    # 4. Target
-    y = df['is_big_spender']
-    X = df_model
+    # Colunas categóricas geram indicadores só para os valores presentes,
+    # como acontece com colunas de texto
+    features = df[FEATURES_MODELO].apply(
+        lambda s: s.cat.remove_unused_categories() 
+        if isinstance(s.dtype, pd.CategoricalDtype) else s
+    )
     
-    # 5. Validação de dados
-    if len(y) < 10:
-        return None
-    if y.sum() < 2:
-        return None # Mínimo de 2 amostras positivas
+    if colunas is None:
+        return pd.get_dummies(features, drop_first=True)
     
-    # 6. Split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, 
-        test_size=test_size, 
-        random_state=random_state,
-        stratify=y # Garante proporção de classes
+    return pd.get_dummies(features).reindex(
+        columns=colunas, 
+        fill_value=False
     )
-    
-    return {
-        'X_train': X_train,
-        'X_test': X_test,
-        'y_train': y_train,
-        'y_test': y_test
-    }
 
+@instrumentar
 def treinar_modelo_big_spender(
     X_train: pd.DataFrame, 
     y_train: pd.Series,
@@ -87,27 +81,29 @@ def treinar_modelo_big_spender(
         random_state=42,
         verbose=-1 # Desliga logs
     )
-    model.fit(X_train, y_train)
+    # Rodadas de boosting são pontos de cancelamento (ver cancelamento.py)
+    model.fit(X_train, y_train, callbacks=[callback_lightgbm()])
     return model
 
 def avaliar_modelo(
-    model: LGBMClassifier,
+    model,
     X_test: pd.DataFrame,
-    y_test: pd.Series
+    y_test
 ) -> dict:
     """
     Avalia performance do modelo.
     
     Args:
-        model: Modelo treinado
+        model: Modelo (LGBMClassifier ou Booster binário) treinado
         X_test: Features de teste
         y_test: Target de teste
         
     Returns:
         Dicionário com métricas
     """
-    y_pred = model.predict(X_test)
-    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    booster = getattr(model, 'booster_', model)
+    y_pred_proba = booster.predict(X_test)
+    y_pred = (y_pred_proba > 0.5).astype(int)
     
     return {
         'acuracia': (y_pred == y_test).mean(),
@@ -122,20 +118,24 @@ def avaliar_modelo(
         )
     }
 
+@instrumentar
+@cache_compartilhado
 def calcular_shap_values(
-    model: LGBMClassifier,
+    model,
     X_test: pd.DataFrame
 ):
     """
     Calcula SHAP values para interpretabilidade.
     
     Args:
-        model: Modelo treinado
+        model: Modelo (LGBMClassifier ou Booster) treinado
         X_test: Features de teste
         
     Returns:
         SHAP values
     """
+    from shap import TreeExplainer
+    
     explainer = TreeExplainer(model)
     shap_values = explainer.shap_values(X_test)
     
@@ -143,3 +143,454 @@ def calcular_shap_values(
     if isinstance(shap_values, list):
         return shap_values[1]  # Classe positiva
     return shap_values
+
+def _gravar_atomico(caminho: str, gravar) -> None:
+    """
+    Grava um arquivo de forma atômica.
+    
+    gravar(temporario) escreve em um temporário exclusivo do mesmo diretório,
+    que então substitui o destino: processos gravando ao mesmo tempo não
+    sobrescrevem o temporário um do outro.
+    
+    Args:
+        caminho: Arquivo de destino
+        gravar: Função que grava o conteúdo no caminho recebido
+    """
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho) or ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        gravar(temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+def _gravar_json(dados: dict, caminho: str) -> None:
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False)
+
+def extrair_vocabulario(df: pd.DataFrame) -> dict:
+    """
+    Extrai o vocabulário das features categóricas do modelo.
+    
+    Args:
+        df: DataFrame com os dados
+        
+    Returns:
+        Dicionário {coluna: lista ordenada de valores}
+    """
+    return {
+        col: sorted(df[col].dropna().astype(str).unique().tolist())
+        for col in FEATURES_CATEGORICAS
+    }
+
+def salvar_modelo(
+    model: LGBMClassifier,
+    threshold: float,
+    vocabulario: dict,
+    colunas: list,
+    diretorio: str
+) -> None:
+    """
+    Persiste o booster e os metadados usados nas atualizações incrementais.
+    
+    Args:
+        model: Modelo treinado
+        threshold: Limite de compra usado para rotular o target
+        vocabulario: Vocabulário das features categóricas
+        colunas: Colunas (one-hot) usadas no treino
+        diretorio: Diretório de destino
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    
+    metadados = {
+        'threshold': float(threshold),
+        'vocabulario': vocabulario,
+        'colunas': list(colunas),
+        'n_arvores': model.booster_.num_trees()
+    }
+    
+    _gravar_atomico(os.path.join(diretorio, ARQUIVO_BOOSTER), model.booster_.save_model)
+    _gravar_atomico(
+        os.path.join(diretorio, ARQUIVO_METADADOS), 
+        lambda caminho: _gravar_json(metadados, caminho)
+    )
+
+def carregar_modelo(diretorio: str) -> Optional[dict]:
+    """
+    Carrega o booster persistido e seus metadados.
+    
+    Args:
+        diretorio: Diretório onde o modelo foi salvo
+        
+    Returns:
+        Dicionário com 'booster' (caminho) e os metadados, ou None se não houver modelo
+    """
+    caminho_booster = os.path.join(diretorio, ARQUIVO_BOOSTER)
+    caminho_metadados = os.path.join(diretorio, ARQUIVO_METADADOS)
+    
+    if not (os.path.exists(caminho_booster) and os.path.exists(caminho_metadados)):
+        return None
+    
+    with open(caminho_metadados, encoding="utf-8") as f:
+        metadados = json.load(f)
+    
+    metadados['booster'] = caminho_booster
+    return metadados
+
+def detectar_drift(
+    anterior: dict,
+    threshold: float,
+    df_novos: pd.DataFrame,
+    tolerancia: float
+) -> Optional[str]:
+    """
+    Verifica se os novos dados invalidam o modelo persistido.
+    
+    Args:
+        anterior: Metadados do modelo persistido
+        threshold: Threshold recalculado sobre todos os dados
+        df_novos: Novas linhas
+        tolerancia: Variação relativa máxima aceita no threshold
+        
+    Returns:
+        Motivo do drift, ou None se a atualização incremental for segura
+    """
+    threshold_anterior = anterior['threshold']
+    base = abs(threshold_anterior) if threshold_anterior else 1
+    variacao = abs(threshold - threshold_anterior) / base
+    
+    if variacao > tolerancia:
+        return (
+            f"Threshold mudou {variacao:.1%} "
+            f"({threshold_anterior:.2f} → {threshold:.2f})"
+        )
+    
+    vocabulario_novos = extrair_vocabulario(df_novos)
+    for col, valores in vocabulario_novos.items():
+        novos = set(valores) - set(anterior['vocabulario'].get(col, []))
+        if novos:
+            return f"Novos valores em {col}: {', '.join(sorted(novos))}"
+    
+    return None
+
+def atualizar_modelo_incremental(
+    df_novos: pd.DataFrame,
+    df_completo: pd.DataFrame,
+    percentile: float,
+    diretorio: str,
+    n_estimators: int,
+    n_estimators_incremental: int,
+    max_depth: int,
+    learning_rate: float,
+    tolerancia_threshold: float
+) -> dict:
+    """
+    Atualiza o modelo com novas linhas, continuando o boosting do booster salvo.
+    
+    Faz um retreino completo quando não há modelo salvo, quando o threshold de
+    big spender ou o vocabulário das categorias mudam, ou quando as novas linhas
+    não contêm as duas classes.
+    
+    Args:
+        df_novos: Linhas adicionadas desde o último treino
+        df_completo: Todos os dados (incluindo as novas linhas)
+        percentile: Percentil que define Big Spender (0.0 a 1.0)
+        diretorio: Diretório do modelo persistido
+        n_estimators: Número de estimadores no retreino completo
+        n_estimators_incremental: Árvores adicionadas na atualização incremental
+        max_depth: Profundidade máxima
+        learning_rate: Taxa de aprendizado
+        tolerancia_threshold: Variação relativa máxima aceita no threshold
+        
+    Returns:
+        Dicionário com 'model', 'modo' ('incremental' ou 'completo'), 'motivo',
+        'threshold' e 'colunas' (colunas one-hot do modelo)
+        
+    Raises:
+        ValueError: Se não houver linhas novas
+    """
+    if len(df_novos) == 0:
+        raise ValueError("❌ Nenhuma linha nova para atualizar o modelo")
+    
+    threshold = df_completo["Purchase Amount (USD)"].quantile(percentile)
+    anterior = carregar_modelo(diretorio)
+    
+    if anterior is None:
+        motivo = "Nenhum modelo persistido"
+    else:
+        motivo = detectar_drift(anterior, threshold, df_novos, tolerancia_threshold)
+    
+    if motivo is None:
+        y = (df_novos["Purchase Amount (USD)"] > anterior['threshold']).astype(int)
+        if y.nunique() < 2:
+            motivo = "Novas linhas não contêm as duas classes"
+    
+    if motivo is None:
+        X = codificar_features(df_novos, anterior['colunas'])
+        model = LGBMClassifier(
+            n_estimators=n_estimators_incremental,
+            max_depth=max_depth,
+            learning_rate=learning_rate,
+            random_state=42,
+            verbose=-1
+        )
+        model.fit(X, y, init_model=anterior['booster'], callbacks=[callback_lightgbm()])
+        salvar_modelo(
+            model, 
+            anterior['threshold'], 
+            anterior['vocabulario'], 
+            anterior['colunas'], 
+            diretorio
+        )
+        return {
+            'model': model,
+            'modo': 'incremental',
+            'motivo': None,
+            'threshold': anterior['threshold'],
+            'colunas': list(anterior['colunas'])
+        }
+    
+    # Retreino completo
+    X = codificar_features(df_completo)
+    y = (df_completo["Purchase Amount (USD)"] > threshold).astype(int)
+    model = treinar_modelo_big_spender(
+        X, y,
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        learning_rate=learning_rate
+    )
+    salvar_modelo(
+        model, 
+        threshold, 
+        extrair_vocabulario(df_completo), 
+        X.columns, 
+        diretorio
+    )
+    return {
+        'model': model,
+        'modo': 'completo',
+        'motivo': motivo,
+        'threshold': threshold,
+        'colunas': list(X.columns)
+    }
+
+def calcular_versao_dataset(df: pd.DataFrame, colunas: list) -> str:
+    """
+    Calcula a versão (fingerprint) das features do modelo.
+    
+    DataFrames versionados (ver fingerprint.marcar_versao) são identificados
+    pela versão, sem percorrer as linhas.
+    
+    Args:
+        df: DataFrame com os dados
+        colunas: Features do Dataset
+        
+    Returns:
+        Hash hexadecimal que identifica a versão do dataset
+    """
+    h = hashlib.sha1(repr(list(colunas)).encode())
+    versao = versao_dados(df)
+    if versao is not None:
+        h.update(versao.encode())
+    else:
+        h.update(pd.util.hash_pandas_object(df[list(colunas)], index=True).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+def montar_matriz_features(
+    df: pd.DataFrame,
+    vocabulario: dict,
+    colunas: Optional[list] = None
+) -> np.ndarray:
+    """
+    Monta a matriz float32 de features com categorias como códigos inteiros.
+    
+    Args:
+        df: DataFrame com os dados
+        vocabulario: Vocabulário das features categóricas
+        colunas: Features, na ordem do Dataset (padrão: FEATURES_MODELO)
+        
+    Returns:
+        Matriz (linhas × colunas); valores fora do vocabulário viram NaN
+    """
+    colunas = colunas or FEATURES_MODELO
+    X = np.empty((len(df), len(colunas)), dtype=np.float32)
+    
+    for j, col in enumerate(colunas):
+        if col in vocabulario:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # Recodifica direto dos códigos, sem materializar os textos
+                codigos = df[col].cat.set_categories(vocabulario[col]).cat.codes
+                codigos = codigos.to_numpy().astype(np.float32)
+            else:
+                codigos = pd.Index(vocabulario[col]).get_indexer(df[col].astype(str))
+                codigos = codigos.astype(np.float32)
+            codigos[codigos < 0] = np.nan
+            X[:, j] = codigos
+        else:
+            X[:, j] = df[col].to_numpy(dtype=np.float32)
+    
+    return X
+
+@instrumentar
+def construir_dataset_lgbm(
+    df: pd.DataFrame,
+    diretorio: str,
+    features_clientes: Optional[list] = None
+) -> dict:
+    """
+    Constrói o Dataset LightGBM binado de uma versão dos dados.
+    
+    O Dataset é salvo em formato binário no disco e reaproveitado enquanto a
+    versão dos dados não mudar, evitando refazer encoding e binning a cada
+    treino.
+    
+    Args:
+        df: DataFrame completo (base para todos os subconjuntos)
+        diretorio: Diretório onde os datasets binários são salvos
+        features_clientes: Colunas numéricas da feature store já anexadas a df
+        
+    Returns:
+        Dicionário com 'dataset', 'versao', 'vocabulario', 'colunas' e 'index' da base
+    """
+    colunas = FEATURES_MODELO + list(features_clientes or [])
+    versao = calcular_versao_dataset(df, colunas)
+    caminho_bin = os.path.join(diretorio, f"{versao}.bin")
+    caminho_vocab = os.path.join(diretorio, f"{versao}.json")
+    params = {'verbose': -1}
+    
+    if os.path.exists(caminho_bin) and os.path.exists(caminho_vocab):
+        with open(caminho_vocab, encoding="utf-8") as f:
+            vocabulario = json.load(f)
+        dataset = lgb.Dataset(caminho_bin, params=params).construct()
+    else:
+        os.makedirs(diretorio, exist_ok=True)
+        vocabulario = extrair_vocabulario(df)
+        dataset = lgb.Dataset(
+            montar_matriz_features(df, vocabulario, colunas),
+            label=np.zeros(len(df), dtype=np.float32),
+            feature_name=colunas,
+            categorical_feature=FEATURES_CATEGORICAS,
+            params=params,
+            free_raw_data=True
+        ).construct()
+        
+        def salvar_binario(caminho: str) -> None:
+            os.remove(caminho)  # save_binary não sobrescreve arquivos existentes
+            dataset.save_binary(caminho)
+        
+        # O vocabulário vai por último: só com ele o binário é reaproveitado
+        _gravar_atomico(caminho_bin, salvar_binario)
+        _gravar_atomico(caminho_vocab, lambda caminho: _gravar_json(vocabulario, caminho))
+    
+    return {
+        'dataset': dataset,
+        'versao': versao,
+        'vocabulario': vocabulario,
+        'colunas': colunas,
+        'index': df.index
+    }
+
+@instrumentar
+def treinar_em_subconjunto(
+    base: dict,
+    df_segmento: pd.DataFrame,
+    threshold: float,
+    test_size: float,
+    random_state: int,
+    n_estimators: int,
+    max_depth: int,
+    learning_rate: float
+) -> Optional[dict]:
+    """
+    Treina o modelo sobre um subconjunto de linhas do Dataset pré-binado.
+    
+    Args:
+        base: Resultado de construir_dataset_lgbm
+        df_segmento: Linhas selecionadas (índice deve existir na base)
+        threshold: Limite de compra para definir Big Spender
+        test_size: Proporção do conjunto de teste
+        random_state: Seed para reprodutibilidade
+        n_estimators: Número de estimadores
+        max_depth: Profundidade máxima
+        learning_rate: Taxa de aprendizado
+        
+    Returns:
+        Dicionário com 'booster', 'X_test' (features float32, categorias como
+        códigos) e 'y_test', ou None se os dados forem insuficientes
+        
+    Raises:
+        ValueError: Se o segmento contiver linhas fora da base
+    """
+    posicoes = base['index'].get_indexer(df_segmento.index)
+    if (posicoes < 0).any():
+        raise ValueError("❌ Segmento contém linhas fora do dataset base")
+    
+    y = (df_segmento["Purchase Amount (USD)"] > threshold).astype(int).to_numpy()
+    
+    if len(y) < 10 or y.sum() < 2:
+        return None
+    
+    pos_train, pos_test, y_train, y_test = train_test_split(
+        posicoes, y,
+        test_size=test_size,
+        random_state=random_state,
+        stratify=y
+    )
+    
+    # O subset do LightGBM reaproveita os bins da base; índices em ordem crescente
+    ordem = np.argsort(pos_train)
+    train_set = base['dataset'].subset(pos_train[ordem].tolist()).construct()
+    train_set.set_label(y_train[ordem])
+    
+    booster = lgb.train(
+        {
+            'objective': 'binary',
+            'max_depth': max_depth,
+            'learning_rate': learning_rate,
+            'seed': 42,
+            'verbose': -1
+        },
+        train_set,
+        num_boost_round=n_estimators,
+        callbacks=[callback_lightgbm()]
+    )
+    
+    return {
+        'booster': booster,
+        'X_test': pd.DataFrame(
+            montar_matriz_features(
+                df_segmento.loc[base['index'][pos_test]], 
+                base['vocabulario'],
+                base['colunas']
+            ),
+            columns=base['colunas']
+        ),
+        'y_test': y_test
+    }
+
+def exportar_modelo_compilado(
+    model: LGBMClassifier,
+    colunas: list,
+    caminho: str,
+    vocabulario: Optional[dict] = None
+) -> None:
+    """
+    Exporta o modelo para o avaliador NumPy (tree_evaluator).
+    
+    O arquivo gerado é carregado com AvaliadorArvores.carregar, sem importar
+    pandas nem lightgbm.
+    
+    Args:
+        model: Modelo (ou Booster) treinado
+        colunas: Colunas usadas no treino, na ordem do modelo
+        caminho: Caminho do arquivo .npz de destino
+        vocabulario: Vocabulário, quando as categorias são códigos inteiros
+    """
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    
+    arrays = compilar_arvores(model, colunas, FEATURES_CATEGORICAS, vocabulario)
+    _gravar_atomico(caminho, lambda temporario: salvar_arvores(arrays, temporario))
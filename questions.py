@@ -1,367 +1,396 @@
 """Componentes das 7 perguntas de negócio"""
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from shap import summary_plot
 
-from settings import MODEL_CONFIG, UI_CONFIG
+from settings import DASHBOARD_CONFIG, MODEL_CONFIG, UI_CONFIG
 from formatters import formatar_moeda, formatar_percentual, formatar_numero
 from data_processor import (
     calcular_big_spenders, 
     preparar_dados_top_gastadores,
-    calcular_vendas_por_dimensao
-)
-from clustering import realizar_clustering, calcular_estatisticas_clusters
-from prediction import (
-    preparar_dados_modelo, 
-    treinar_modelo_big_spender,
-    avaliar_modelo,
-    calcular_shap_values
-)
-from charts import (
-    criar_grafico_distribuicao,
-    criar_grafico_clusters,
-    criar_grafico_barras_horizontal,
-    criar_grafico_pizza,
-    criar_scatter_idade_valor,
-    criar_boxplot_genero
+    calcular_vendas_por_dimensao,
+    calcular_histograma,
+    calcular_resumo_boxplot,
+    calcular_pontos_dispersao
 )
+from data_loader import carregar_dados
+from figure_cache import exibir_grafico, renderizacao_paralela
+from cancelamento import acompanhar_progresso
+from instrumentation import execucao_fragmento, medir_etapa
+
+# matplotlib, seaborn, scikit-learn, LightGBM e SHAP são importados dentro das
+# perguntas que os usam, para não atrasar a primeira renderização da página.
+# Os gráficos são indicados pelo nome da função em charts.py: com o backend
+# "vega", charts.py (e o matplotlib) nem chega a ser importado
 
 def pergunta_1_probabilidade_big_spender(df: pd.DataFrame):
     """Pergunta 1: Qual a probabilidade de um cliente ser Big Spender?"""
-    with st.expander(
-        "1️⃣ Qual a probabilidade de um cliente ser Big Spender?", 
-        expanded=True
-    ):
-        col1, col2 = st.columns([1, 2])
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        percentil = st.slider(
+            "Percentil de Corte", 
+            MODEL_CONFIG.PERCENTILE_MIN,
+            MODEL_CONFIG.PERCENTILE_MAX,
+            MODEL_CONFIG.PERCENTILE_DEFAULT,
+            5,
+            key="percentil_1",
+            help="Define o limite superior de gastos"
+        )
         
-        with col1:
-            percentil = st.slider(
-                "Percentil de Corte", 
-                MODEL_CONFIG.PERCENTILE_MIN,
-                MODEL_CONFIG.PERCENTILE_MAX,
-                MODEL_CONFIG.PERCENTILE_DEFAULT,
-                5,
-                key="percentil_1",
-                help="Define o limite superior de gastos"
-            )
-            
-            bs, threshold = calcular_big_spenders(df, percentil/100)
-            prob = len(bs) / len(df) if len(df) > 0 else 0
-            
-            st.metric(
-                f"Probabilidade (Top {100-percentil}%)",
-                formatar_percentual(prob),
-                help=f"Clientes com compras acima de {formatar_moeda(threshold)}"
-            )
-            st.metric("Valor de Corte", formatar_moeda(threshold))
-            st.metric("Big Spenders", formatar_numero(len(bs)))
+        bs, threshold = calcular_big_spenders(df, percentil/100)
+        prob = len(bs) / len(df) if len(df) > 0 else 0
         
-        with col2:
-            fig = criar_grafico_distribuicao(df, threshold)
-            st.pyplot(fig)
-            plt.close(fig)
+        st.metric(
+            f"Probabilidade (Top {100-percentil}%)",
+            formatar_percentual(prob),
+            help=f"Clientes com compras acima de {formatar_moeda(threshold)}"
+        )
+        st.metric("Valor de Corte", formatar_moeda(threshold))
+        st.metric("Big Spenders", formatar_numero(len(bs)))
+    
+    with col2:
+        histograma = calcular_histograma(df["Purchase Amount (USD)"], 50)
+        exibir_grafico("criar_grafico_distribuicao", histograma, threshold)
 
 def pergunta_2_segmentos_consumidores(df: pd.DataFrame):
     """Pergunta 2: Quais são os segmentos naturais de consumidores?"""
-    with st.expander("2️⃣ Quais são os segmentos naturais de consumidores?"):
-        col1, col2 = st.columns([1, 2])
+    from clustering import realizar_clustering, calcular_estatisticas_clusters
+    
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        n_clusters = st.slider(
+            "Número de Clusters",
+            MODEL_CONFIG.N_CLUSTERS_MIN,
+            MODEL_CONFIG.N_CLUSTERS_MAX,
+            MODEL_CONFIG.N_CLUSTERS_DEFAULT,
+            key="clusters",
+            help="Número de segmentos de clientes"
+        )
         
-        with col1:
-            n_clusters = st.slider(
-                "Número de Clusters",
-                MODEL_CONFIG.N_CLUSTERS_MIN,
-                MODEL_CONFIG.N_CLUSTERS_MAX,
-                MODEL_CONFIG.N_CLUSTERS_DEFAULT,
-                key="clusters",
-                help="Número de segmentos de clientes"
-            )
-            
-            with st.spinner(UI_CONFIG.SPINNER_TEXT_CLUSTER):
-                df_clusters = realizar_clustering(df, n_clusters)
-                cluster_stats = calcular_estatisticas_clusters(df_clusters)
-            
-            if not cluster_stats.empty:
-                st.write("**Características dos Clusters:**")
-                # Formatar colunas de moeda
-                cluster_stats['Ticket_Medio'] = cluster_stats['Ticket_Medio'].apply(formatar_moeda)
-                cluster_stats['Max_Compra'] = cluster_stats['Max_Compra'].apply(formatar_moeda)
-                st.dataframe(cluster_stats, use_container_width=True, hide_index=True)
-            else:
-                st.warning("⚠️ Dados insuficientes para clustering")
+        # A barra de progresso permite abandonar o clustering se um filtro mudar
+        with st.spinner(UI_CONFIG.SPINNER_TEXT_CLUSTER), acompanhar_progresso(UI_CONFIG.SPINNER_TEXT_CLUSTER):
+            df_clusters = realizar_clustering(df, n_clusters)
+            cluster_stats = calcular_estatisticas_clusters(df_clusters)
         
-        with col2:
-            if not cluster_stats.empty:
-                fig = criar_grafico_clusters(df_clusters)
-                st.pyplot(fig)
-                plt.close(fig)
+        if not cluster_stats.empty:
+            st.write("**Características dos Clusters:**")
+            # Formatar colunas de moeda
+            cluster_stats['Ticket_Medio'] = cluster_stats['Ticket_Medio'].apply(formatar_moeda)
+            cluster_stats['Max_Compra'] = cluster_stats['Max_Compra'].apply(formatar_moeda)
+            st.dataframe(cluster_stats, use_container_width=True, hide_index=True)
+        else:
+            st.warning("⚠️ Dados insuficientes para clustering")
+    
+    with col2:
+        if not cluster_stats.empty:
+            dispersao = calcular_pontos_dispersao(
+                df_clusters, "Age", "Purchase Amount (USD)", "Cluster",
+                limite=UI_CONFIG.SCATTER_DENSITY_THRESHOLD,
+                bins=UI_CONFIG.DENSITY_GRID_BINS,
+                excluir=[-1]
+            )
+            exibir_grafico("criar_grafico_clusters", dispersao)
 
 def pergunta_3_vendas_intensas(df: pd.DataFrame):
     """Pergunta 3: Em quais estações e locais as vendas são mais intensas?"""
-    with st.expander("3️⃣ Em quais estações e locais as vendas são mais intensas?"):
-        vendas = calcular_vendas_por_dimensao(df)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("Top 10: Estação × Localização")
-            season_state = vendas['por_estacao_local'].head(10).copy()
-            season_state.columns = ["Estação", "Localização", "Valor Total", "Qtd Vendas"]
-            season_state["Valor Total"] = season_state["Valor Total"].apply(formatar_moeda)
-            st.dataframe(season_state, use_container_width=True, hide_index=True)
-        
-        with col2:
-            st.subheader("Vendas por Estação")
-            fig = criar_grafico_barras_horizontal(
-                vendas['por_estacao'],
-                "Vendas por Estação do Ano",
-                "Valor Total (USD)"
-            )
-            st.pyplot(fig)
-            plt.close(fig)
+    vendas = calcular_vendas_por_dimensao(df)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Top 10: Estação × Localização")
+        season_state = vendas['por_estacao_local'].head(10).copy()
+        season_state.columns = ["Estação", "Localização", "Valor Total", "Qtd Vendas"]
+        season_state["Valor Total"] = season_state["Valor Total"].apply(formatar_moeda)
+        st.dataframe(season_state, use_container_width=True, hide_index=True)
+    
+    with col2:
+        st.subheader("Vendas por Estação")
+        exibir_grafico(
+            "criar_grafico_barras_horizontal",
+            vendas['por_estacao'],
+            "Vendas por Estação do Ano",
+            "Valor Total (USD)"
+        )
 
 def pergunta_4_categorias_maior_valor(df: pd.DataFrame):
     """Pergunta 4: Quais categorias geram maior valor médio por transação?"""
-    with st.expander("4️⃣ Quais categorias geram maior valor médio por transação?"):
-        vendas = calcular_vendas_por_dimensao(df)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("Estatísticas por Categoria")
-            cat_stats = vendas['por_categoria'].copy()
-            cat_stats.columns = ["Ticket Médio", "Valor Total", "Qtd Vendas"]
-            cat_stats = cat_stats.sort_values("Ticket Médio", ascending=False)
-            cat_stats["Ticket Médio"] = cat_stats["Ticket Médio"].apply(formatar_moeda)
-            cat_stats["Valor Total"] = cat_stats["Valor Total"].apply(formatar_moeda)
-            st.dataframe(cat_stats, use_container_width=True)
-        
-        with col2:
-            st.subheader("Ticket Médio por Categoria")
-            cat_avg = df.groupby("Category")["Purchase Amount (USD)"].mean().sort_values(ascending=True)
-            fig = criar_grafico_barras_horizontal(
-                cat_avg,
-                "Ticket Médio por Categoria",
-                "Valor Médio (USD)",
-                color='teal'
-            )
-            st.pyplot(fig)
-            plt.close(fig)
+    vendas = calcular_vendas_por_dimensao(df)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Estatísticas por Categoria")
+        cat_stats = vendas['por_categoria'].copy()
+        cat_stats.columns = ["Ticket Médio", "Valor Total", "Qtd Vendas"]
+        cat_stats = cat_stats.sort_values("Ticket Médio", ascending=False)
+        cat_stats["Ticket Médio"] = cat_stats["Ticket Médio"].apply(formatar_moeda)
+        cat_stats["Valor Total"] = cat_stats["Valor Total"].apply(formatar_moeda)
+        st.dataframe(cat_stats, use_container_width=True)
+    
+    with col2:
+        st.subheader("Ticket Médio por Categoria")
+        cat_avg = df.groupby("Category", observed=True)["Purchase Amount (USD)"].mean().sort_values(ascending=True)
+        exibir_grafico(
+            "criar_grafico_barras_horizontal",
+            cat_avg,
+            "Ticket Médio por Categoria",
+            "Valor Médio (USD)",
+            color='teal'
+        )
 
 def pergunta_5_persona_ideal(df: pd.DataFrame):
     """Pergunta 5: Qual a persona ideal para campanhas de alto valor?"""
-    with st.expander("5️⃣ Qual a persona ideal para campanhas de alto valor?"):
-        percentil_top = st.slider(
-            "Percentil dos Top Gastadores", 
-            80, 99, 90, 
-            key="percentil_5",
-            help="Define o percentil dos maiores gastadores"
-        )
-        
-        persona_data = preparar_dados_top_gastadores(df, percentil_top/100)
-        
-        if persona_data is None:
-            st.warning("⚠️ Dados insuficientes para análise de persona")
-            return
-        
-        st.info(
-            f"📊 Analisando os **{100-percentil_top}% maiores gastadores** "
-            f"(compras acima de {formatar_moeda(persona_data['threshold'])})"
-        )
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Total de Top Gastadores", formatar_numero(persona_data['total']))
-            st.metric("Idade Média", f"{persona_data['idade_media']:.1f} anos")
-            st.metric("Ticket Médio", formatar_moeda(persona_data['ticket_medio']))
-        
-        with col2:
-            st.write("**Distribuição por Gênero:**")
-            for gender, count in persona_data['genero_dist'].items():
-                pct = (count / persona_data['total']) * 100
-                st.write(f"- {gender}: {count} ({pct:.1f}%)")
-        
-        with col3:
-            st.write("**Top 3 Categorias:**")
-            for cat, count in persona_data['top_categorias'].items():
-                pct = (count / persona_data['total']) * 100
-                st.write(f"- {cat}: {count} ({pct:.1f}%)")
-        
-        # Visualizações
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            gender_series = pd.Series(persona_data['genero_dist'])
-            fig = criar_grafico_pizza(gender_series, 'Distribuição por Gênero')
-            st.pyplot(fig)
-            plt.close(fig)
-        
-        with col2:
-            fig, ax = plt.subplots(figsize=(6, 4))
-            persona_data['df']["Age"].hist(
-                bins=20, 
-                color='lightgreen', 
-                edgecolor='black', 
-                ax=ax
-            )
-            ax.set_xlabel('Idade')
-            ax.set_ylabel('Frequência')
-            ax.set_title('Distribuição de Idade', fontweight='bold')
-            plt.tight_layout()
-            st.pyplot(fig)
-            plt.close(fig)
+    percentil_top = st.slider(
+        "Percentil dos Top Gastadores", 
+        80, 99, 90, 
+        key="percentil_5",
+        help="Define o percentil dos maiores gastadores"
+    )
+    
+    persona_data = preparar_dados_top_gastadores(df, percentil_top/100)
+    
+    if persona_data is None:
+        st.warning("⚠️ Dados insuficientes para análise de persona")
+        return
+    
+    st.info(
+        f"📊 Analisando os **{100-percentil_top}% maiores gastadores** "
+        f"(compras acima de {formatar_moeda(persona_data['threshold'])})"
+    )
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Total de Top Gastadores", formatar_numero(persona_data['total']))
+        st.metric("Idade Média", f"{persona_data['idade_media']:.1f} anos")
+        st.metric("Ticket Médio", formatar_moeda(persona_data['ticket_medio']))
+    
+    with col2:
+        st.write("**Distribuição por Gênero:**")
+        for gender, count in persona_data['genero_dist'].items():
+            pct = (count / persona_data['total']) * 100
+            st.write(f"- {gender}: {count} ({pct:.1f}%)")
+    
+    with col3:
+        st.write("**Top 3 Categorias:**")
+        for cat, count in persona_data['top_categorias'].items():
+            pct = (count / persona_data['total']) * 100
+            st.write(f"- {cat}: {count} ({pct:.1f}%)")
+    
+    # Visualizações
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        gender_series = pd.Series(persona_data['genero_dist'])
+        exibir_grafico("criar_grafico_pizza", gender_series, 'Distribuição por Gênero')
+    
+    with col2:
+        histograma = calcular_histograma(persona_data['df']["Age"], 20)
+        exibir_grafico("criar_histograma_idade", histograma)
 
 def pergunta_6_relacao_caracteristicas(df: pd.DataFrame):
     """Pergunta 6: Como características do cliente se relacionam com valor gasto?"""
-    with st.expander("6️⃣ Como características do cliente se relacionam com valor gasto?"):
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("Idade × Valor × Gênero")
-            fig = criar_scatter_idade_valor(df)
-            st.pyplot(fig)
-            plt.close(fig)
-        
-        with col2:
-            st.subheader("Distribuição de Valores por Gênero")
-            fig = criar_boxplot_genero(df)
-            st.pyplot(fig)
-            plt.close(fig)
-        
-        # Análise adicional por categoria e gênero
-        st.subheader("Análise por Categoria e Gênero")
-        fig, ax = plt.subplots(figsize=(12, 6))
-        import seaborn as sns
-        sns.boxplot(
-            data=df,
-            x="Category",
-            y="Purchase Amount (USD)",
-            hue="Gender",
-            palette="pastel",
-            ax=ax
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Idade × Valor × Gênero")
+        dispersao = calcular_pontos_dispersao(
+            df, "Age", "Purchase Amount (USD)", "Gender",
+            limite=UI_CONFIG.SCATTER_DENSITY_THRESHOLD,
+            bins=UI_CONFIG.DENSITY_GRID_BINS
         )
-        ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
-        ax.set_title('Valor de Compra por Categoria e Gênero', fontweight='bold')
-        ax.set_xlabel('Categoria')
-        ax.set_ylabel('Valor da Compra (USD)')
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)
+        exibir_grafico("criar_scatter_idade_valor", dispersao)
+    
+    with col2:
+        st.subheader("Distribuição de Valores por Gênero")
+        resumo = calcular_resumo_boxplot(df, "Purchase Amount (USD)", ["Gender"])
+        exibir_grafico("criar_boxplot_genero", resumo)
+    
+    # Análise adicional por categoria e gênero
+    st.subheader("Análise por Categoria e Gênero")
+    resumo = calcular_resumo_boxplot(
+        df, "Purchase Amount (USD)", ["Category", "Gender"]
+    )
+    exibir_grafico("criar_boxplot_categoria_genero", resumo)
 
 def pergunta_7_modelo_preditivo(df: pd.DataFrame):
     """Pergunta 7: Modelo Preditivo - Quem são os futuros Big Spenders?"""
-    with st.expander("7️⃣ Modelo Preditivo: Quem são os futuros Big Spenders?"):
-        st.subheader("🤖 Modelo LightGBM + Análise SHAP")
-        
-        with st.spinner(UI_CONFIG.SPINNER_TEXT_MODEL):
-            try:
-                # Preparar dados
-                threshold_model = df["Purchase Amount (USD)"].quantile(
-                    MODEL_CONFIG.BIG_SPENDER_PERCENTILE
+    import matplotlib.pyplot as plt
+    from shap import summary_plot
+    from prediction import calcular_shap_values
+    from engine import treinar_big_spender
+    
+    st.subheader("🤖 Modelo LightGBM + Análise SHAP")
+    
+    with st.spinner(UI_CONFIG.SPINNER_TEXT_MODEL):
+        try:
+            # A barra de progresso permite abandonar o treino se um filtro mudar
+            with acompanhar_progresso(UI_CONFIG.SPINNER_TEXT_MODEL):
+                # Dataset completo (mesmo objeto em cache da página): o treino
+                # seleciona as linhas filtradas no Dataset pré-binado dele
+                df_base = carregar_dados(
+                    DASHBOARD_CONFIG.CSV_PATH, 
+                    DASHBOARD_CONFIG.REQUIRED_COLUMNS
                 )
-                
-                dados = preparar_dados_modelo(
-                    df, 
-                    threshold_model,
-                    MODEL_CONFIG.TEST_SIZE,
-                    MODEL_CONFIG.RANDOM_STATE
+                treino = treinar_big_spender(df, df_base)
+            
+            if treino is None:
+                st.warning(
+                    "⚠️ Dados insuficientes para treinar o modelo. "
+                    "Ajuste os filtros para incluir mais dados."
                 )
-                
-                if dados is None:
-                    st.warning(
-                        "⚠️ Dados insuficientes para treinar o modelo. "
-                        "Ajuste os filtros para incluir mais dados."
-                    )
-                    return
-                
-                # Treinar modelo
-                model = treinar_modelo_big_spender(
-                    dados['X_train'], 
-                    dados['y_train'],
-                    n_estimators=MODEL_CONFIG.LGBM_N_ESTIMATORS,
-                    max_depth=MODEL_CONFIG.LGBM_MAX_DEPTH,
-                    learning_rate=MODEL_CONFIG.LGBM_LEARNING_RATE
+                return
+            
+            model = treino['model']
+            dados = treino['dados']
+            metricas = treino['metricas']
+            
+            # Exibir métricas
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.metric(
+                    "Acurácia", 
+                    f"{metricas['acuracia']:.2%}",
+                    help="Proporção de predições corretas"
                 )
-                
-                # Avaliar modelo
-                metricas = avaliar_modelo(
-                    model, 
-                    dados['X_test'], 
-                    dados['y_test']
+            
+            with col2:
+                st.metric(
+                    "ROC-AUC", 
+                    f"{metricas['roc_auc']:.3f}",
+                    help="Área sob a curva ROC (0.5 = aleatório, 1.0 = perfeito)"
                 )
+            
+            with col3:
+                st.metric(
+                    "Big Spenders Identificados", 
+                    f"{metricas['big_spenders_pred']}/{metricas['total_test']}",
+                    help="Quantidade de Big Spenders preditos no conjunto de teste"
+                )
+            
+            # SHAP Analysis
+            st.subheader("📊 Importância das Features (SHAP)")
+            
+            shap_values = calcular_shap_values(model, dados['X_test'])
+            
+            fig, ax = plt.subplots(figsize=(10, 6))
+            summary_plot(
+                shap_values, 
+                dados['X_test'], 
+                plot_type="bar", 
+                show=False
+            )
+            st.pyplot(plt.gcf())
+            plt.close()
+            
+            # Relatório detalhado
+            with st.expander("📄 Ver Relatório Detalhado"):
+                st.text(metricas['report'])
                 
-                # Exibir métricas
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.metric(
-                        "Acurácia", 
-                        f"{metricas['acuracia']:.2%}",
-                        help="Proporção de predições corretas"
-                    )
-                
-                with col2:
-                    st.metric(
-                        "ROC-AUC", 
-                        f"{metricas['roc_auc']:.3f}",
-                        help="Área sob a curva ROC (0.5 = aleatório, 1.0 = perfeito)"
-                    )
-                
-                with col3:
-                    st.metric(
-                        "Big Spenders Identificados", 
-                        f"{metricas['big_spenders_pred']}/{metricas['total_test']}",
-                        help="Quantidade de Big Spenders preditos no conjunto de teste"
-                    )
-                
-                # SHAP Analysis
-                st.subheader("📊 Importância das Features (SHAP)")
-                
-                shap_values = calcular_shap_values(model, dados['X_test'])
+                st.markdown("### 💡 Interpretação")
+                st.info("""
+                **Como interpretar os resultados:**
                 
-                fig, ax = plt.subplots(figsize=(10, 6))
-                summary_plot(
-                    shap_values, 
-                    dados['X_test'], 
-                    plot_type="bar", 
-                    show=False
-                )
-                st.pyplot(plt.gcf())
-                plt.close()
+                - **Acurácia**: Percentual de predições corretas
+                - **ROC-AUC**: Capacidade do modelo de distinguir entre classes (>0.7 é bom)
+                - **SHAP**: Features mais importantes têm barras maiores
                 
-                # Relatório detalhado
-                with st.expander("📄 Ver Relatório Detalhado"):
-                    st.text(metricas['report'])
-                    
-                    st.markdown("### 💡 Interpretação")
-                    st.info("""
-                    **Como interpretar os resultados:**
-                    
-                    - **Acurácia**: Percentual de predições corretas
-                    - **ROC-AUC**: Capacidade do modelo de distinguir entre classes (>0.7 é bom)
-                    - **SHAP**: Features mais importantes têm barras maiores
-                    
-                    **Próximos passos:**
-                    1. Identifique as features mais importantes
-                    2. Foque estratégias de marketing nessas características
-                    3. Monitore a evolução das predições ao longo do tempo
-                    """)
-            
-            except ValueError as e:
-                st.error(f"❌ Erro nos dados: {str(e)}")
-            except Exception as e:
-                st.error(f"❌ Erro inesperado ao treinar o modelo: {str(e)}")
-                import traceback
-                with st.expander("🔍 Detalhes do erro"):
-                    st.code(traceback.format_exc())
+                **Próximos passos:**
+                1. Identifique as features mais importantes
+                2. Foque estratégias de marketing nessas características
+                3. Monitore a evolução das predições ao longo do tempo
+                """)
+        
+        except ValueError as e:
+            st.error(f"❌ Erro nos dados: {str(e)}")
+        except Exception as e:
+            st.error(f"❌ Erro inesperado ao treinar o modelo: {str(e)}")
+            import traceback
+            with st.expander("🔍 Detalhes do erro"):
+                st.code(traceback.format_exc())
+
+# (título, função, aberta por padrão)
+PERGUNTAS = [
+    (
+        "1️⃣ Qual a probabilidade de um cliente ser Big Spender?",
+        pergunta_1_probabilidade_big_spender,
+        True
+    ),
+    (
+        "2️⃣ Quais são os segmentos naturais de consumidores?",
+        pergunta_2_segmentos_consumidores,
+        False
+    ),
+    (
+        "3️⃣ Em quais estações e locais as vendas são mais intensas?",
+        pergunta_3_vendas_intensas,
+        False
+    ),
+    (
+        "4️⃣ Quais categorias geram maior valor médio por transação?",
+        pergunta_4_categorias_maior_valor,
+        False
+    ),
+    (
+        "5️⃣ Qual a persona ideal para campanhas de alto valor?",
+        pergunta_5_persona_ideal,
+        False
+    ),
+    (
+        "6️⃣ Como características do cliente se relacionam com valor gasto?",
+        pergunta_6_relacao_caracteristicas,
+        False
+    ),
+    (
+        "7️⃣ Modelo Preditivo: Quem são os futuros Big Spenders?",
+        pergunta_7_modelo_preditivo,
+        False
+    )
+]
+
+# st.fragment (Streamlit >= 1.37) reexecuta só a função decorada quando um
+# widget dentro dela muda; versões anteriores oferecem experimental_fragment
+_fragmento = (
+    getattr(st, "fragment", None) 
+    or getattr(st, "experimental_fragment", None) 
+    or (lambda funcao: funcao)
+)
+
+@_fragmento
+def _render_pergunta(numero: int, titulo: str, funcao, df: pd.DataFrame):
+    """Renderiza uma pergunta isolada das demais (widgets reexecutam só ela)."""
+    aberta = st.toggle(
+        titulo,
+        value=st.session_state.perguntas_abertas[numero],
+        key=f"toggle_pergunta_{numero}"
+    )
+    st.session_state.perguntas_abertas[numero] = aberta
+    
+    if aberta:
+        # Rerun só do fragmento: medido como execução própria (ver instrumentation)
+        with execucao_fragmento(), st.container(border=True), renderizacao_paralela():
+            with medir_etapa(funcao.__name__):
+                funcao(df)
 
 def render_questions(df_filtrado: pd.DataFrame):
-    """Renderiza todas as perguntas de negócio."""
-    pergunta_1_probabilidade_big_spender(df_filtrado)
-    pergunta_2_segmentos_consumidores(df_filtrado)
-    pergunta_3_vendas_intensas(df_filtrado)
-    pergunta_4_categorias_maior_valor(df_filtrado)
-    pergunta_5_persona_ideal(df_filtrado)
-    pergunta_6_relacao_caracteristicas(df_filtrado)
-    pergunta_7_modelo_preditivo(df_filtrado)
+    """
+    Renderiza as perguntas de negócio.
+    
+    Só as perguntas abertas pelo usuário são calculadas; o estado de cada uma
+    fica guardado na sessão. Cada pergunta é um fragmento: sliders e toggles
+    reexecutam apenas a própria pergunta, não o script inteiro. Os gráficos
+    são renderizados em paralelo (figure_cache.renderizacao_paralela).
+    """
+    if 'perguntas_abertas' not in st.session_state:
+        st.session_state.perguntas_abertas = {
+            numero: aberta 
+            for numero, (_, _, aberta) in enumerate(PERGUNTAS, start=1)
+        }
+    
+    # Gráficos de todas as perguntas abertas são renderizados juntos, em paralelo
+    with medir_etapa("perguntas"), renderizacao_paralela():
+        for numero, (titulo, funcao, _) in enumerate(PERGUNTAS, start=1):
+            _render_pergunta(numero, titulo, funcao, df_filtrado)
@@ -10,10 +10,46 @@ class DashboardConfig:
     # O arquivo CSV será colocado na raiz do projeto para simplificar a implantação
     CSV_PATH: str = "shopping_behavior_updated.csv"
     
+    # Backend do dataset: "pandas" (CSV lido por processo) ou "mmap" (colunas
+    # tipadas em disco, mapeadas somente leitura por todos os processos)
+    DATA_BACKEND: str = "mmap"
+    COLUMNAR_DIR: str = ".cache/colunas"
+    
+    # Filtros e agregações: "pandas" (em memória), "duckdb" (SQL executado
+    # direto sobre o CSV/Parquet de origem) ou "polars" (planos lazy sobre o
+    # arquivo, em várias threads); os dois últimos requerem o pacote
+    # correspondente. Paridade e tempos: python backend_check.py
+    QUERY_BACKEND: str = "pandas"
+    
     # Títulos
     PAGE_TITLE: str = "Dashboard Varejo - 7 Perguntas"
     PAGE_ICON: str = "📊"
     
+    # Exportação (linhas escritas por bloco)
+    EXPORT_CHUNK_ROWS: int = 50_000
+    
+    # Motor headless: processos no modo lote (relatórios noturnos)
+    ENGINE_WORKERS: int = min(4, os.cpu_count() or 1)
+    
+    # Aquecimento de caches (subida do servidor / troca do dataset)
+    WARMUP_ENABLED: bool = True
+    WARMUP_WORKERS: int = 2
+    # Especificações de filtros (campos de criar_sidebar); None = tudo
+    # selecionado + cada estação isolada + cada categoria isolada
+    WARMUP_FILTERS: list = None
+    
+    # Perfil por etapa (tempo, CPU, pico de memória e cache) com painel na
+    # página e exportação em JSON lines ("" = não exporta); o tracemalloc
+    # deixa a execução mais lenta enquanto ligado
+    PROFILING_ENABLED: bool = False
+    PROFILING_TRACEMALLOC: bool = True
+    PROFILING_EXPORT_PATH: str = ".cache/perfil.jsonl"
+    PROFILING_HISTORY: int = 10
+    
+    # Explorador de segmentos: início de cada faixa etária (a última é aberta)
+    SEGMENT_AGE_BINS: tuple = (18, 25, 35, 45, 55, 65)
+    SEGMENT_MIN_CLIENTS: int = 10
+    
     # Colunas obrigatórias
     REQUIRED_COLUMNS: list = None
     
@@ -48,6 +84,29 @@ class ModelConfig:
     LGBM_N_ESTIMATORS: int = 100
     LGBM_MAX_DEPTH: int = 5
     LGBM_LEARNING_RATE: float = 0.1
+    
+    # Atualização incremental
+    MODEL_DIR: str = ".cache/modelos"
+    INCREMENTAL_N_ESTIMATORS: int = 20
+    THRESHOLD_DRIFT_TOLERANCE: float = 0.05
+    
+    # Datasets LightGBM pré-binados
+    DATASET_DIR: str = ".cache/datasets"
+    
+    # Feature store de clientes (agregados por Customer ID)
+    FEATURE_STORE_DIR: str = ".cache/features"
+    FEATURE_STORE_KEEP_VERSIONS: int = 3
+    # Features do clustering; nomes que não são colunas do dataset vêm da
+    # feature store (ex.: "gasto_total", "frequencia_anual", "taxa_desconto")
+    CLUSTER_FEATURES: tuple = ("Age", "Purchase Amount (USD)")
+    # Colunas categóricas nas features (ex.: "Location", "Payment Method")
+    # ativam o k-prototypes: distância nas numéricas padronizadas + peso ×
+    # número de categorias diferentes do protótipo
+    CLUSTER_CATEGORICAL_WEIGHT: float = 0.5
+    CLUSTER_MAX_ITER: int = 100
+    # Features da store acrescentadas ao modelo de Big Spender (use as de
+    # feature_store.FEATURES_SEM_GASTO: as de gasto vazam o alvo)
+    MODEL_CUSTOMER_FEATURES: tuple = ()
 
 @dataclass
 class UIConfig:
@@ -61,11 +120,49 @@ class UIConfig:
     PLOT_SIZE_MEDIUM: tuple = (10, 6)
     PLOT_SIZE_LARGE: tuple = (12, 6)
     
+    # Backend dos gráficos: "matplotlib" (imagem no servidor) ou "vega"
+    # (especificação Vega-Lite agregada, desenhada no navegador)
+    CHART_BACKEND: str = "matplotlib"
+    
+    # Cache de figuras renderizadas
+    FIGURE_FORMAT: str = "png"
+    FIGURE_DPI: int = 200
+    FIGURE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    
+    # Processos para renderização paralela de gráficos (1 = serial)
+    CHART_WORKERS: int = min(4, os.cpu_count() or 1)
+    
+    # Scatter em modo densidade (grade 2D) acima deste número de linhas
+    SCATTER_DENSITY_THRESHOLD: int = 200_000
+    DENSITY_GRID_BINS: int = 60
+    
     # Animações
     SPINNER_TEXT_MODEL: str = " Treinando modelo de Machine Learning..."
     SPINNER_TEXT_CLUSTER: str = " Realizando segmentação..."
 
+@dataclass
+class CacheConfig:
+    """Configurações do cache compartilhado entre processos do servidor"""
+    
+    # Backend: "sqlite", "arquivos", "redis" ou "desligado". Os resultados são
+    # lidos com pickle: o armazenamento tem de ser confiável (quem grava nele
+    # executa código no servidor), então o diretório deve ser gravável só pelo
+    # usuário do servidor
+    SHARED_CACHE_BACKEND: str = "sqlite"
+    SHARED_CACHE_PATH: str = ".cache/compartilhado"
+    SHARED_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    SHARED_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    # Segredo do HMAC das entradas no Redis (obrigatório com o backend "redis"):
+    # entradas sem assinatura válida são ignoradas
+    SHARED_CACHE_REDIS_SECRET: str = os.environ.get("SHARED_CACHE_REDIS_SECRET", "")
+    
+    # Cache em memória do processo: orçamento global e política de despejo
+    # ("lru" = menos recente, "lfu" = menos usado)
+    MEMORY_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    MEMORY_CACHE_POLICY: str = "lru"
+
 # Instâncias globais
 DASHBOARD_CONFIG = DashboardConfig()
 MODEL_CONFIG = ModelConfig()
 UI_CONFIG = UIConfig()
+CACHE_CONFIG = CacheConfig()
@@ -0,0 +1,373 @@
+"""Cache de resultados compartilhado entre processos (réplicas) do servidor
+
+O cache em memória (cache_manager) é por processo: cada réplica atrás do
+balanceador recalcularia dados, agregações, clusters e modelos. As funções
+decoradas com cache_compartilhado consultam antes um armazenamento comum
+(SQLite ou arquivos em disco, ou Redis), que fica abaixo do cache em memória:
+
+    @cache_memoria
+    @cache_compartilhado
+    def calcular(...): ...
+
+Os resultados são gravados com pickle e lidos com pickle.loads: o
+armazenamento precisa ser confiável, porque quem consegue gravar nele
+executa código nos processos do servidor. O diretório/arquivo SQLite deve ser
+gravável só pelo usuário do servidor; no Redis, que costuma ser acessível pela
+rede, cada entrada é assinada com HMAC (CACHE_CONFIG.SHARED_CACHE_REDIS_SECRET)
+e entradas sem assinatura válida são ignoradas.
+"""
+import functools
+import hashlib
+import hmac
+import inspect
+import logging
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+from settings import CACHE_CONFIG
+from fingerprint import calcular_fingerprint, marcar_resultado
+
+logger = logging.getLogger(__name__)
+
+class BackendSQLite:
+    """Chave-valor em SQLite (WAL), com despejo LRU por tamanho total"""
+    
+    def __init__(self, caminho: str, max_bytes: int):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        
+        with self._conexao() as conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS itens ("
+                "chave TEXT PRIMARY KEY, dados BLOB NOT NULL, "
+                "tamanho INTEGER NOT NULL, acessado REAL NOT NULL)"
+            )
+            conexao.execute("CREATE INDEX IF NOT EXISTS idx_acessado ON itens (acessado)")
+    
+    def _conexao(self) -> sqlite3.Connection:
+        """Uma conexão por thread (sqlite3 não compartilha conexões entre threads)"""
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=30)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+    
+    def obter(self, chave: str) -> Optional[bytes]:
+        conexao = self._conexao()
+        linha = conexao.execute("SELECT dados FROM itens WHERE chave = ?", (chave,)).fetchone()
+        if linha is None:
+            return None
+        
+        with conexao:
+            conexao.execute("UPDATE itens SET acessado = ? WHERE chave = ?", (time.time(), chave))
+        return linha[0]
+    
+    def guardar(self, chave: str, dados: bytes) -> None:
+        # Maior que o orçamento inteiro: não é guardado (o despejo não
+        # remove o próprio item, e o orçamento ficaria estourado)
+        if len(dados) > self.max_bytes:
+            return
+        
+        # Cada transação é atômica: leitores nunca veem um valor pela metade
+        with self._conexao() as conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO itens (chave, dados, tamanho, acessado) VALUES (?, ?, ?, ?)",
+                (chave, sqlite3.Binary(dados), len(dados), time.time())
+            )
+            total = conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM itens").fetchone()[0]
+            
+            if total > self.max_bytes:
+                excedente = total - self.max_bytes
+                antigos = conexao.execute(
+                    "SELECT chave, tamanho FROM itens WHERE chave != ? ORDER BY acessado",
+                    (chave,)
+                )
+                remover = []
+                for antiga, tamanho in antigos:
+                    if excedente <= 0:
+                        break
+                    remover.append((antiga,))
+                    excedente -= tamanho
+                conexao.executemany("DELETE FROM itens WHERE chave = ?", remover)
+    
+    def limpar(self) -> None:
+        with self._conexao() as conexao:
+            conexao.execute("DELETE FROM itens")
+    
+    def estatisticas(self) -> dict:
+        itens, total = self._conexao().execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM itens"
+        ).fetchone()
+        return {'itens': itens, 'bytes_usados': total, 'max_bytes': self.max_bytes}
+
+class BackendArquivos:
+    """Um arquivo por chave, escrito em temporário + os.replace (atômico)"""
+    
+    def __init__(self, diretorio: str, max_bytes: int):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+    
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, hashlib.sha1(chave.encode()).hexdigest())
+    
+    def obter(self, chave: str) -> Optional[bytes]:
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "rb") as f:
+                dados = f.read()
+            os.utime(caminho)  # data de modificação = último acesso (LRU)
+        except FileNotFoundError:
+            return None
+        return dados
+    
+    def guardar(self, chave: str, dados: bytes) -> None:
+        if len(dados) > self.max_bytes:
+            return
+        
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dados)
+            os.replace(temporario, self._caminho(chave))
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        
+        self._despejar()
+    
+    def _itens(self) -> list:
+        """Lista (mtime, tamanho, caminho) dos itens gravados"""
+        itens = []
+        for entrada in os.scandir(self.diretorio):
+            if entrada.is_file() and not entrada.name.endswith(".tmp"):
+                try:
+                    info = entrada.stat()
+                except FileNotFoundError:
+                    continue  # removido por outro processo
+                itens.append((info.st_mtime, info.st_size, entrada.path))
+        return itens
+    
+    def _despejar(self) -> None:
+        """Remove os itens menos usados até caber no orçamento"""
+        itens = self._itens()
+        excedente = sum(tamanho for _, tamanho, _ in itens) - self.max_bytes
+        
+        for _, tamanho, caminho in sorted(itens):
+            if excedente <= 0:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            excedente -= tamanho
+    
+    def limpar(self) -> None:
+        for _, _, caminho in self._itens():
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+    
+    def estatisticas(self) -> dict:
+        itens = self._itens()
+        return {
+            'itens': len(itens),
+            'bytes_usados': sum(tamanho for _, tamanho, _ in itens),
+            'max_bytes': self.max_bytes
+        }
+
+class BackendRedis:
+    """
+    Redis (ou compatível); o despejo fica com a política maxmemory do servidor.
+    
+    Cada valor é gravado com um HMAC-SHA256 da chave e dos dados; valores com
+    assinatura inválida (gravados sem o segredo) são tratados como ausentes.
+    """
+    
+    def __init__(self, url: str, max_bytes: int, segredo: str):
+        if not segredo:
+            raise ValueError(
+                "❌ Backend 'redis' requer CACHE_CONFIG.SHARED_CACHE_REDIS_SECRET "
+                "(as entradas são assinadas antes do pickle.loads)"
+            )
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("❌ Backend 'redis' requer o pacote 'redis'")
+        
+        self.cliente = redis.Redis.from_url(url)
+        self.max_bytes = max_bytes
+        self._segredo = segredo.encode()
+        self._prefixo = "varejo:"
+    
+    def _assinar(self, chave: str, dados: bytes) -> bytes:
+        return hmac.new(self._segredo, chave.encode() + b"\0" + dados, hashlib.sha256).digest()
+    
+    def obter(self, chave: str) -> Optional[bytes]:
+        valor = self.cliente.get(self._prefixo + chave)
+        if valor is None:
+            return None
+        
+        assinatura, dados = valor[:32], valor[32:]
+        if not hmac.compare_digest(assinatura, self._assinar(chave, dados)):
+            logger.warning("Entrada do cache compartilhado com assinatura inválida: %s", chave)
+            return None
+        return dados
+    
+    def guardar(self, chave: str, dados: bytes) -> None:
+        if len(dados) <= self.max_bytes:
+            self.cliente.set(self._prefixo + chave, self._assinar(chave, dados) + dados)
+    
+    def limpar(self) -> None:
+        for chave in self.cliente.scan_iter(f"{self._prefixo}*"):
+            self.cliente.delete(chave)
+    
+    def estatisticas(self) -> dict:
+        itens = sum(1 for _ in self.cliente.scan_iter(f"{self._prefixo}*"))
+        return {
+            'itens': itens,
+            'bytes_usados': self.cliente.info("memory").get("used_memory", 0),
+            'max_bytes': self.max_bytes
+        }
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def criar_backend(tipo: str = None):
+    """
+    Cria o backend configurado em CACHE_CONFIG.
+    
+    Args:
+        tipo: "sqlite", "arquivos", "redis" ou "desligado"
+            (padrão: CACHE_CONFIG.SHARED_CACHE_BACKEND)
+    
+    Returns:
+        Instância do backend, ou None quando desligado
+    
+    Raises:
+        ValueError: Se o tipo for desconhecido ou faltar a dependência opcional
+    """
+    tipo = tipo or CACHE_CONFIG.SHARED_CACHE_BACKEND
+    caminho = CACHE_CONFIG.SHARED_CACHE_PATH
+    max_bytes = CACHE_CONFIG.SHARED_CACHE_MAX_BYTES
+    
+    if tipo == "desligado":
+        return None
+    if tipo == "sqlite":
+        return BackendSQLite(os.path.join(caminho, "cache.sqlite"), max_bytes)
+    if tipo == "arquivos":
+        return BackendArquivos(caminho, max_bytes)
+    if tipo == "redis":
+        return BackendRedis(
+            CACHE_CONFIG.SHARED_CACHE_REDIS_URL, 
+            max_bytes, 
+            CACHE_CONFIG.SHARED_CACHE_REDIS_SECRET
+        )
+    raise ValueError(f"❌ Backend de cache desconhecido: {tipo}")
+
+def obter_backend():
+    """Backend do processo (criado no primeiro uso)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = criar_backend() or False
+        return _backend or None
+
+def versao_arquivo(caminho: str) -> str:
+    """
+    Identifica a versão de um arquivo (caminho, data de modificação e tamanho).
+    
+    Args:
+        caminho: Caminho do arquivo
+    
+    Returns:
+        String que muda quando o arquivo é substituído
+    """
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return f"{caminho}:ausente"
+    return f"{os.path.abspath(caminho)}:{info.st_mtime_ns}:{info.st_size}"
+
+def versao_funcao(funcao: Callable) -> str:
+    """Hash do código-fonte: alterar a função invalida os resultados antigos"""
+    try:
+        fonte = inspect.getsource(funcao)
+    except (OSError, TypeError):
+        fonte = funcao.__qualname__
+    return hashlib.sha1(fonte.encode()).hexdigest()[:12]
+
+def cache_compartilhado(
+    funcao: Callable = None, 
+    *, 
+    ttl: float = None, 
+    arquivos: tuple = ()
+):
+    """
+    Guarda o resultado da função no backend compartilhado.
+    
+    Os resultados são serializados com pickle, então cada chamada recebe a
+    sua própria cópia. Falhas do backend não interrompem a página: a função
+    é simplesmente executada.
+    
+    Args:
+        funcao: Função decorada (uso como @cache_compartilhado)
+        ttl: Validade em segundos (uso como @cache_compartilhado(ttl=...))
+        arquivos: Parâmetros que recebem caminhos de arquivo; a versão de
+            cada arquivo entra na chave, então substituí-lo invalida o cache
+    
+    Returns:
+        Função decorada
+    """
+    if funcao is None:
+        return lambda f: cache_compartilhado(f, ttl=ttl, arquivos=arquivos)
+    
+    prefixo = f"{funcao.__module__}.{funcao.__qualname__}:{versao_funcao(funcao)}"
+    assinatura = inspect.signature(funcao)
+    
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        backend = obter_backend()
+        if backend is None:
+            return funcao(*args, **kwargs)
+        
+        versoes = []
+        if arquivos:
+            parametros = assinatura.bind(*args, **kwargs).arguments
+            versoes = [versao_arquivo(parametros[nome]) for nome in arquivos if nome in parametros]
+        chave = f"{prefixo}:{calcular_fingerprint(*args, *versoes, **kwargs)}"
+        
+        try:
+            dados = backend.obter(chave)
+            if dados is not None:
+                expira, resultado = pickle.loads(dados)
+                if expira is None or expira > time.time():
+                    return marcar_resultado(resultado, chave)
+        except Exception:
+            logger.exception("Falha ao ler o cache compartilhado (%s)", prefixo)
+        
+        resultado = funcao(*args, **kwargs)
+        
+        try:
+            expira = time.time() + ttl if ttl else None
+            backend.guardar(
+                chave,
+                pickle.dumps((expira, resultado), protocol=pickle.HIGHEST_PROTOCOL)
+            )
+        except Exception:
+            logger.exception("Falha ao gravar no cache compartilhado (%s)", prefixo)
+        
+        return marcar_resultado(resultado, chave)
+    
+    return wrapper
@@ -1,40 +1,58 @@
 """Componente de sidebar com filtros"""
 import streamlit as st
 import pandas as pd
-from typing import Tuple, List
+from typing import Tuple, List, Optional
+from data_catalog import montar_catalogo, contar_facetas
+from formatters import formatar_numero
 
-def criar_sidebar(df: pd.DataFrame) -> dict:
+def _legenda_faceta(contagens: dict) -> str:
+    """Linhas de cada opção, como legenda abaixo do filtro"""
+    return " · ".join(f"{valor}: {formatar_numero(n)}" for valor, n in contagens.items())
+
+def criar_sidebar(df: pd.DataFrame, catalogo: Optional[dict] = None) -> dict:
     """
     Cria sidebar com filtros interativos.
     
+    As opções e os limites vêm do catálogo do dataset (data_catalog), e
+    abaixo de cada filtro aparece quantas linhas cada opção traria com a
+    seleção atual dos demais filtros.
+    
     Args:
         df: DataFrame com os dados
+        catalogo: Catálogo do dataset (obter_catalogo); calculado de df se omitido
         
     Returns:
         Dicionário com valores dos filtros selecionados
     """
+    if catalogo is None:
+        catalogo = montar_catalogo(df)
+    valores = catalogo['valores']
+    
     with st.sidebar:
         st.header(" Filtros de Análise")
         st.markdown("Ajuste os filtros abaixo para segmentar sua análise:")
+        total_selecao = st.empty()
         
         # Filtro de Categoria
         categorias = st.multiselect(
             " Categoria de Produto",
-            sorted(df["Category"].unique()),
-            default=df["Category"].unique(),
+            valores["Category"],
+            default=valores["Category"],
             help="Selecione uma ou mais categorias"
         )
+        legenda_categorias = st.empty()
         
         # Filtro de Gênero
         generos = st.multiselect(
             " Gênero",
-            sorted(df["Gender"].unique()),
-            default=df["Gender"].unique()
+            valores["Gender"],
+            default=valores["Gender"]
         )
+        legenda_generos = st.empty()
         
         # Filtro de Idade
-        min_age = int(df["Age"].min())
-        max_age = int(df["Age"].max())
+        min_age = catalogo['idade_min']
+        max_age = catalogo['idade_max']
         
         faixa_etaria = st.slider(
             " Faixa Etária",
@@ -47,9 +65,25 @@ def criar_sidebar(df: pd.DataFrame) -> dict:
         # Filtro de Estação
         estacoes = st.multiselect(
             " Estação do Ano",
-            sorted(df["Season"].unique()),
-            default=df["Season"].unique()
+            valores["Season"],
+            default=valores["Season"]
+        )
+        legenda_estacoes = st.empty()
+        
+        # Contagens por opção: saem do cubo do catálogo, sem percorrer o df
+        contagens = contar_facetas(catalogo, {
+            'categorias': categorias,
+            'generos': generos,
+            'faixa_etaria': faixa_etaria,
+            'estacoes': estacoes
+        })
+        total_selecao.caption(
+            f"**{formatar_numero(contagens['linhas'])}** de "
+            f"{formatar_numero(catalogo['linhas'])} registros na seleção"
         )
+        legenda_categorias.caption(_legenda_faceta(contagens['facetas']["Category"]))
+        legenda_generos.caption(_legenda_faceta(contagens['facetas']["Gender"]))
+        legenda_estacoes.caption(_legenda_faceta(contagens['facetas']["Season"]))
         
         st.markdown("---")
         
@@ -86,9 +120,9 @@ def criar_sidebar(df: pd.DataFrame) -> dict:
         st.info(f"""
         **Dataset:** Customer Shopping Behavior
         
-        **Total de registros:** {len(df):,}
+        **Total de registros:** {catalogo['linhas']:,}
         
-        **Categorias:** {df["Category"].nunique()}
+        **Categorias:** {len(valores["Category"])}
         
         **Período:** Todas as estações
         """)
@@ -0,0 +1,85 @@
+"""Orçamento de inicialização: tempo e memória até a primeira renderização
+
+Uso:
+    python startup_budget.py [--max-segundos 4] [--max-rss-mb 250]
+
+Executa o app em um processo novo (sem filtros aplicados, como na primeira
+visita), mede tempo e RSS máximo até o fim da renderização da visão geral e
+verifica se as dependências pesadas continuam sem ser importadas. O
+aquecimento de caches (cache_warmer) fica desligado: ele roda depois da
+primeira renderização e importaria o scikit-learn e o LightGBM em segundo
+plano. Retorna código de saída 1 quando algum limite é excedido.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Dependências que só devem ser carregadas pelas perguntas que as usam
+MODULOS_PESADOS = ["matplotlib", "seaborn", "sklearn", "lightgbm", "shap"]
+
+MAX_SEGUNDOS_PADRAO = 4.0
+MAX_RSS_MB_PADRAO = 250.0
+
+_SCRIPT_MEDICAO = """
+import json, resource, sys, time
+import settings
+settings.DASHBOARD_CONFIG.WARMUP_ENABLED = False
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+duracao = time.perf_counter() - inicio
+print(json.dumps({{
+    'segundos': duracao,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'excecoes': [str(e.value) for e in at.exception],
+    'modulos_pesados': [m for m in {modulos!r} if m in sys.modules]
+}}))
+"""
+
+def medir_inicializacao() -> dict:
+    """
+    Mede tempo e RSS até a primeira renderização em um processo novo.
+    
+    Returns:
+        Dicionário com 'segundos', 'rss_mb', 'excecoes' e 'modulos_pesados'
+    """
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    script = _SCRIPT_MEDICAO.format(app=app, modulos=MODULOS_PESADOS)
+    
+    saida = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(app),
+        check=True
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-segundos", type=float, default=MAX_SEGUNDOS_PADRAO)
+    parser.add_argument("--max-rss-mb", type=float, default=MAX_RSS_MB_PADRAO)
+    args = parser.parse_args()
+    
+    resultado = medir_inicializacao()
+    print(json.dumps(resultado, indent=2))
+    
+    falhas = []
+    if resultado['excecoes']:
+        falhas.append(f"Exceções na renderização: {resultado['excecoes']}")
+    if resultado['segundos'] > args.max_segundos:
+        falhas.append(f"Tempo {resultado['segundos']:.2f}s > {args.max_segundos:.2f}s")
+    if resultado['rss_mb'] > args.max_rss_mb:
+        falhas.append(f"RSS {resultado['rss_mb']:.0f} MB > {args.max_rss_mb:.0f} MB")
+    if resultado['modulos_pesados']:
+        falhas.append(f"Importados antes do necessário: {', '.join(resultado['modulos_pesados'])}")
+    
+    for falha in falhas:
+        print(f"❌ {falha}")
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+@pytest.fixture(scope="session")
+def dados() -> pd.DataFrame:
+    """Dataset de exemplo do repositório"""
+    return pd.read_csv(os.path.join(RAIZ, "shopping_behavior_updated.csv"))
@@ -0,0 +1,62 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+from charts import criar_grafico_clusters, criar_scatter_idade_valor, desenhar_densidade
+from data_processor import calcular_grade_densidade, calcular_pontos_dispersao
+
+def test_densidade_sem_linhas_com_hue(dados):
+    grade = calcular_grade_densidade(dados.iloc[:0], "Age", "Purchase Amount (USD)", hue="Gender", bins=10)
+    assert grade['contagens'].shape == (0, 10, 10)
+    
+    ax = Figure().subplots()
+    desenhar_densidade(ax, grade, titulo_legenda="Gender")
+    assert not ax.collections
+
+def test_densidade_sem_linhas(dados):
+    grade = calcular_grade_densidade(dados.iloc[:0], "Age", "Purchase Amount (USD)", bins=10)
+    assert grade['contagens'].shape == (1, 10, 10)
+    
+    ax = Figure().subplots()
+    desenhar_densidade(ax, grade)
+    assert len(ax.collections) == 1
+
+def test_densidade_com_hue(dados):
+    grade = calcular_grade_densidade(dados, "Age", "Purchase Amount (USD)", hue="Gender", bins=10)
+    assert grade['contagens'].sum() == len(dados)
+    
+    ax = Figure().subplots()
+    desenhar_densidade(ax, grade, titulo_legenda="Gender")
+    assert len(ax.collections) == len(grade['grupos'])
+
+def test_pontos_dispersao(dados):
+    dispersao = calcular_pontos_dispersao(dados, "Age", "Purchase Amount (USD)", "Gender", limite=len(dados))
+    assert list(dispersao['pontos'].columns) == ["Age", "Purchase Amount (USD)", "Gender"]
+    assert len(dispersao['pontos']) == len(dados)
+    
+    grade = calcular_pontos_dispersao(dados, "Age", "Purchase Amount (USD)", "Gender", limite=100, bins=10)
+    assert 'pontos' not in grade
+    assert grade['grade']['contagens'].shape == (2, 10, 10)
+
+def test_pontos_dispersao_excluir(dados):
+    clusters = dados.assign(Cluster=np.where(dados["Age"] < 30, -1, dados["Age"] // 20))
+    validos = (clusters["Cluster"] != -1).sum()
+    
+    pontos = calcular_pontos_dispersao(clusters, "Age", "Purchase Amount (USD)", "Cluster", excluir=[-1])
+    assert len(pontos['pontos']) == validos
+    
+    grade = calcular_pontos_dispersao(
+        clusters, "Age", "Purchase Amount (USD)", "Cluster", limite=100, bins=10, excluir=[-1]
+    )
+    assert -1 not in grade['grade']['grupos']
+    assert grade['grade']['contagens'].sum() == validos
+
+def test_graficos_de_dispersao(dados):
+    for limite in (len(dados), 100):
+        dispersao = calcular_pontos_dispersao(dados, "Age", "Purchase Amount (USD)", "Gender", limite=limite)
+        assert criar_scatter_idade_valor(dispersao).axes
+    
+    vazia = calcular_pontos_dispersao(
+        dados.assign(Cluster=-1), "Age", "Purchase Amount (USD)", "Cluster", excluir=[-1]
+    )
+    texto = criar_grafico_clusters(vazia).axes[0].texts
+    assert texto[0].get_text() == "Dados insuficientes para visualização de clusters"
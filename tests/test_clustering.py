@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from clustering import _iterar_prototipos, codificar_mistas, k_prototypes
+
+def _grupos(n_por_grupo=200, seed=0):
+    """Dois grupos separados nas numéricas e na categoria"""
+    rng = np.random.default_rng(seed)
+    X = np.vstack([
+        rng.normal(-3, 0.5, (n_por_grupo, 2)),
+        rng.normal(3, 0.5, (n_por_grupo, 2))
+    ])
+    C = np.repeat([[0], [1]], n_por_grupo, axis=0).astype(np.int32)
+    esperado = np.repeat([0, 1], n_por_grupo)
+    return X, C, esperado
+
+def _mesma_particao(rotulos, esperado):
+    return pd.crosstab(rotulos, esperado).gt(0).sum(axis=1).eq(1).all()
+
+def test_codificar_mistas():
+    df = pd.DataFrame({'a': ["x", "y", "x"], 'b': ["p", "p", "q"]})
+    codigos = codificar_mistas(df, ['a', 'b'])
+    
+    assert codigos.dtype == np.int32
+    assert codigos.tolist() == [[0, 0], [1, 0], [0, 1]]
+
+def test_k_prototypes_separa_grupos():
+    X, C, esperado = _grupos()
+    rotulos = k_prototypes(X, C, 2, peso=0.5, n_init=3)
+    
+    assert _mesma_particao(rotulos, esperado)
+
+@pytest.mark.parametrize("p, q", [(2, 0), (0, 1)])
+def test_k_prototypes_so_numericas_ou_so_categoricas(p, q):
+    X, C, esperado = _grupos()
+    rotulos = k_prototypes(X[:, :p], C[:, :q], 2, peso=1.0, n_init=3)
+    
+    assert _mesma_particao(rotulos, esperado)
+
+def test_k_prototypes_refina_a_amostra():
+    X, C, esperado = _grupos(n_por_grupo=500)
+    rotulos = k_prototypes(X, C, 2, peso=0.5, n_init=2, amostra=100)
+    
+    assert len(rotulos) == len(C)
+    assert _mesma_particao(rotulos, esperado)
+
+def test_max_iter_zero_atribui_aos_prototipos_iniciais():
+    X, C, _ = _grupos()
+    sementes = [0, len(C) - 1]
+    
+    rotulos, custo, centros, modas = _iterar_prototipos(
+        X, C, X[sementes], C[sementes], 0.5, max_iter=0, tol=1e-4
+    )
+    
+    assert np.array_equal(centros, X[sementes])
+    assert rotulos[0] == 0 and rotulos[-1] == 1
+    assert custo >= 0
+    assert len(k_prototypes(X, C, 2, peso=0.5, n_init=2, max_iter=0)) == len(C)
+
+def test_custo_corresponde_aos_prototipos_devolvidos():
+    X, C, _ = _grupos()
+    rotulos, custo, centros, modas = _iterar_prototipos(
+        X, C, X[[0, 1]], C[[0, 1]], 0.5, max_iter=1, tol=0.0
+    )
+    
+    distancias = (
+        ((X[:, None, :] - centros[None, :, :]) ** 2).sum(axis=2)
+        + 0.5 * (C[:, None, :] != modas[None, :, :]).sum(axis=2)
+    )
+    assert np.array_equal(rotulos, distancias.argmin(axis=1))
+    assert custo == pytest.approx(distancias.min(axis=1).sum())
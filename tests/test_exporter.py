@@ -0,0 +1,32 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+from exporter import exportar_dados, formato_disponivel, preparar_download
+
+def test_csv_em_blocos(dados):
+    destino = io.BytesIO()
+    exportar_dados(dados, "CSV", destino, tamanho_bloco=1000)
+    lido = pd.read_csv(io.BytesIO(destino.getvalue()))
+    pd.testing.assert_frame_equal(lido, dados)
+
+def test_download_gzip(dados):
+    conteudo = preparar_download(dados.head(2500), "CSV (gzip)")()
+    assert isinstance(conteudo, bytes)
+    lido = pd.read_csv(io.BytesIO(gzip.decompress(conteudo)))
+    pd.testing.assert_frame_equal(lido, dados.head(2500))
+
+def test_download_sem_linhas(dados):
+    conteudo = preparar_download(dados.iloc[:0], "CSV")()
+    assert conteudo.decode("utf-8").strip() == ",".join(dados.columns)
+
+@pytest.mark.skipif(not formato_disponivel("Parquet"), reason="requer pyarrow")
+def test_download_parquet(dados):
+    lido = pd.read_parquet(io.BytesIO(preparar_download(dados, "Parquet")()))
+    pd.testing.assert_frame_equal(lido, dados)
+
+def test_formato_desconhecido(dados):
+    with pytest.raises(ValueError):
+        exportar_dados(dados, "XLSX", io.BytesIO())
@@ -0,0 +1,112 @@
+import json
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from settings import MODEL_CONFIG
+from feature_store import (
+    ARQUIVO_ATUAL,
+    agregar_linhas,
+    atualizar_feature_store,
+    combinar,
+    feature_store_necessaria,
+    ler_atual
+)
+from columnar_store import mapear_colunas
+
+@pytest.fixture
+def recorrentes(dados):
+    """Dataset em que parte dos clientes volta a comprar no fim"""
+    return pd.concat([dados, dados.iloc[:500]], ignore_index=True)
+
+def _versoes(diretorio):
+    return sorted(e.name for e in os.scandir(diretorio) if e.is_dir() and not e.name.startswith("."))
+
+def test_combinar_equivale_a_agregar_tudo(recorrentes):
+    corte = len(recorrentes) - 700
+    combinado = combinar(agregar_linhas(recorrentes.iloc[:corte]), agregar_linhas(recorrentes.iloc[corte:]))
+    
+    pd.testing.assert_frame_equal(
+        combinado, agregar_linhas(recorrentes), check_like=True, check_dtype=False
+    )
+
+def test_combinar_cliente_so_na_anterior(dados):
+    anterior = agregar_linhas(dados.iloc[:10])
+    combinado = combinar(anterior, agregar_linhas(dados.iloc[10:20]))
+    
+    assert len(combinado) == 20
+    assert combinado.loc[anterior.index, 'gasto_soma'].tolist() == anterior['gasto_soma'].tolist()
+
+def test_atualizacao_incremental(recorrentes, tmp_path):
+    inicial = atualizar_feature_store(recorrentes.iloc[:3000], str(tmp_path / "store"))
+    assert inicial['modo'] == "completo"
+    
+    atual = atualizar_feature_store(recorrentes, str(tmp_path / "store"))
+    assert atual['modo'] == "incremental"
+    assert atual['linhas'] == len(recorrentes)
+    assert atual['historico'] == [inicial['versao']]
+    
+    # Mesmo dataset: nada a fazer
+    assert atualizar_feature_store(recorrentes, str(tmp_path / "store")) == atual
+    
+    completo = atualizar_feature_store(recorrentes, str(tmp_path / "referencia"))
+    assert completo['modo'] == "completo"
+    assert completo['versao'] == atual['versao']
+    pd.testing.assert_frame_equal(
+        mapear_colunas(str(tmp_path / "store" / atual['versao'])).set_index("Customer ID"),
+        mapear_colunas(str(tmp_path / "referencia" / completo['versao'])).set_index("Customer ID"),
+        check_like=True, check_dtype=False, check_categorical=False
+    )
+
+def test_linhas_alteradas_refazem_tudo(dados, tmp_path):
+    atualizar_feature_store(dados, str(tmp_path))
+    alterado = dados.copy()
+    alterado.loc[0, "Purchase Amount (USD)"] += 1
+    
+    assert atualizar_feature_store(alterado, str(tmp_path))['modo'] == "completo"
+
+def test_remove_versoes_fora_do_historico(dados, tmp_path):
+    for n in (1000, 2000, 3000, 3900):
+        atual = atualizar_feature_store(dados.iloc[:n], str(tmp_path))
+        time.sleep(0.01)
+    
+    assert len(atual['historico']) == MODEL_CONFIG.FEATURE_STORE_KEEP_VERSIONS - 1
+    assert _versoes(tmp_path) == sorted([atual['versao'], *atual['historico']])
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+def test_preserva_versoes_posteriores_a_vigente(dados, tmp_path):
+    atual = atualizar_feature_store(dados.iloc[:1000], str(tmp_path))
+    
+    # Versão gravada por outro processo depois da vigente, ainda sem apontador
+    posterior = tmp_path / "posterior"
+    posterior.mkdir()
+    futuro = time.time() + 60
+    os.utime(posterior, (futuro, futuro))
+    antiga = tmp_path / "antiga"
+    antiga.mkdir()
+    os.utime(antiga, (0, 0))
+    
+    atualizar_feature_store(dados.iloc[:2000], str(tmp_path))
+    
+    assert posterior.exists()
+    assert not antiga.exists()
+    assert atual['versao'] in _versoes(tmp_path)
+
+def test_apontador_relido_do_disco(dados, tmp_path):
+    atual = atualizar_feature_store(dados.iloc[:1000], str(tmp_path))
+    
+    with open(tmp_path / ARQUIVO_ATUAL, encoding="utf-8") as f:
+        assert json.load(f) == atual
+    assert ler_atual(str(tmp_path)) == atual
+
+def test_feature_store_necessaria(dados, monkeypatch):
+    assert not feature_store_necessaria(dados)
+    
+    monkeypatch.setattr(MODEL_CONFIG, "CLUSTER_FEATURES", ("Age", "gasto_total"))
+    assert feature_store_necessaria(dados)
+    
+    monkeypatch.setattr(MODEL_CONFIG, "CLUSTER_FEATURES", ("Age",))
+    monkeypatch.setattr(MODEL_CONFIG, "MODEL_CUSTOMER_FEATURES", ("taxa_desconto",))
+    assert feature_store_necessaria(dados)
@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pytest
+
+from fingerprint import marcar_versao
+from prediction import (
+    FEATURES_MODELO,
+    atualizar_modelo_incremental,
+    calcular_versao_dataset,
+    carregar_modelo,
+    construir_dataset_lgbm,
+    detectar_drift,
+    extrair_vocabulario,
+    treinar_em_subconjunto
+)
+
+PARAMETROS = {
+    'n_estimators': 10,
+    'n_estimators_incremental': 5,
+    'max_depth': 3,
+    'learning_rate': 0.1,
+    'tolerancia_threshold': 0.05
+}
+
+def test_detectar_drift_sem_mudancas(dados):
+    anterior = {'threshold': 80.0, 'vocabulario': extrair_vocabulario(dados)}
+    assert detectar_drift(anterior, 82.0, dados.tail(100), 0.05) is None
+
+def test_detectar_drift_threshold(dados):
+    anterior = {'threshold': 80.0, 'vocabulario': extrair_vocabulario(dados)}
+    motivo = detectar_drift(anterior, 90.0, dados.tail(100), 0.05)
+    assert motivo.startswith("Threshold mudou")
+
+def test_detectar_drift_categoria_nova(dados):
+    anterior = {'threshold': 80.0, 'vocabulario': extrair_vocabulario(dados)}
+    novos = dados.tail(10).copy()
+    novos.loc[novos.index[0], "Category"] = "Electronics"
+    assert detectar_drift(anterior, 80.0, novos, 0.05) == "Novos valores em Category: Electronics"
+
+def test_atualizacao_incremental(dados, tmp_path):
+    diretorio = str(tmp_path)
+    antigos, novos = dados.iloc[:3000], dados.iloc[3000:]
+    
+    primeiro = atualizar_modelo_incremental(antigos, antigos, 0.8, diretorio, **PARAMETROS)
+    assert primeiro['modo'] == 'completo'
+    assert primeiro['motivo'] == "Nenhum modelo persistido"
+    assert carregar_modelo(diretorio)['n_arvores'] == 10
+    
+    segundo = atualizar_modelo_incremental(novos, dados, 0.8, diretorio, **PARAMETROS)
+    assert segundo['modo'] == 'incremental'
+    assert segundo['threshold'] == primeiro['threshold']
+    assert segundo['colunas'] == primeiro['colunas']
+    assert carregar_modelo(diretorio)['n_arvores'] == 15
+    assert not [n for n in os.listdir(diretorio) if n.endswith(".tmp")]
+
+def test_atualizacao_com_drift_retreina(dados, tmp_path):
+    diretorio = str(tmp_path)
+    atualizar_modelo_incremental(dados, dados, 0.8, diretorio, **PARAMETROS)
+    
+    resultado = atualizar_modelo_incremental(dados.tail(500), dados, 0.5, diretorio, **PARAMETROS)
+    assert resultado['modo'] == 'completo'
+    assert resultado['motivo'].startswith("Threshold mudou")
+    assert carregar_modelo(diretorio)['n_arvores'] == 10
+
+def test_atualizacao_sem_linhas_novas(dados, tmp_path):
+    with pytest.raises(ValueError):
+        atualizar_modelo_incremental(dados.iloc[:0], dados, 0.8, str(tmp_path), **PARAMETROS)
+
+def test_versao_dataset(dados):
+    copia = dados.copy()
+    assert calcular_versao_dataset(dados, FEATURES_MODELO) == calcular_versao_dataset(copia, FEATURES_MODELO)
+    
+    copia.loc[0, "Age"] += 1
+    assert calcular_versao_dataset(dados, FEATURES_MODELO) != calcular_versao_dataset(copia, FEATURES_MODELO)
+    
+    # Com versão registrada, as linhas não são lidas
+    marcar_versao(copia, "v1")
+    assert calcular_versao_dataset(copia, FEATURES_MODELO) != calcular_versao_dataset(dados, FEATURES_MODELO)
+    assert calcular_versao_dataset(copia, FEATURES_MODELO) == calcular_versao_dataset(
+        marcar_versao(dados.copy(), "v1"), FEATURES_MODELO
+    )
+
+def test_dataset_reaproveitado(dados, tmp_path):
+    diretorio = str(tmp_path)
+    base = construir_dataset_lgbm(dados, diretorio)
+    arquivos = sorted(os.listdir(diretorio))
+    assert arquivos == [f"{base['versao']}.bin", f"{base['versao']}.json"]
+    
+    lida = construir_dataset_lgbm(dados, diretorio)
+    assert lida['versao'] == base['versao']
+    assert lida['vocabulario'] == base['vocabulario']
+    assert lida['dataset'].num_data() == len(dados)
+    assert sorted(os.listdir(diretorio)) == arquivos
+
+def test_treinar_em_subconjunto(dados, tmp_path):
+    base = construir_dataset_lgbm(dados, str(tmp_path))
+    segmento = dados[dados["Season"] == "Winter"]
+    
+    treino = treinar_em_subconjunto(base, segmento, 80.0, 0.3, 42, 10, 3, 0.1)
+    assert treino['booster'].num_trees() == 10
+    assert list(treino['X_test'].columns) == FEATURES_MODELO
+    assert len(treino['X_test']) == len(treino['y_test']) == int(np.ceil(len(segmento) * 0.3))
+    
+    proba = treino['booster'].predict(treino['X_test'])
+    assert ((proba > 0) & (proba < 1)).all()
+
+def test_treinar_em_subconjunto_limites(dados, tmp_path):
+    base = construir_dataset_lgbm(dados.iloc[:1000], str(tmp_path))
+    
+    assert treinar_em_subconjunto(base, dados.iloc[:5], 80.0, 0.3, 42, 10, 3, 0.1) is None
+    with pytest.raises(ValueError):
+        treinar_em_subconjunto(base, dados.iloc[900:1100], 80.0, 0.3, 42, 10, 3, 0.1)
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from engine import ARQUIVO_MODELO_COMPILADO, pontuar_registros
+from prediction import (
+    FEATURES_MODELO,
+    codificar_features,
+    construir_dataset_lgbm,
+    exportar_modelo_compilado,
+    montar_matriz_features,
+    treinar_em_subconjunto,
+    treinar_modelo_big_spender
+)
+from tree_evaluator import AvaliadorArvores
+
+def test_paridade_one_hot(dados, tmp_path):
+    X = codificar_features(dados)
+    y = (dados["Purchase Amount (USD)"] > 80).astype(int)
+    model = treinar_modelo_big_spender(X, y, n_estimators=20, max_depth=4, learning_rate=0.1)
+    
+    caminho = str(tmp_path / "modelo.npz")
+    exportar_modelo_compilado(model, list(X.columns), caminho)
+    avaliador = AvaliadorArvores.carregar(caminho)
+    
+    registros = dados[FEATURES_MODELO].head(200).to_dict(orient="records")
+    obtido = avaliador.prever_proba(np.vstack([avaliador.vetorizar(r) for r in registros]))
+    esperado = model.predict_proba(X.head(200))[:, 1]
+    np.testing.assert_allclose(obtido, esperado, rtol=0, atol=1e-12)
+
+def test_paridade_categorica(dados, tmp_path):
+    base = construir_dataset_lgbm(dados, str(tmp_path))
+    booster = treinar_em_subconjunto(base, dados, 80.0, 0.3, 42, 20, 4, 0.1)['booster']
+    
+    caminho = str(tmp_path / "modelo.npz")
+    exportar_modelo_compilado(booster, FEATURES_MODELO, caminho, base['vocabulario'])
+    avaliador = AvaliadorArvores.carregar(caminho)
+    
+    # Inclui categoria fora do vocabulário e idade ausente
+    amostra = dados.head(200).copy()
+    amostra.loc[amostra.index[0], "Category"] = "Desconhecida"
+    amostra.loc[amostra.index[1], "Age"] = np.nan
+    
+    registros = [
+        {c: (None if isinstance(v, float) and np.isnan(v) else v) for c, v in r.items()}
+        for r in amostra[FEATURES_MODELO].to_dict(orient="records")
+    ]
+    obtido = avaliador.prever_proba(np.vstack([avaliador.vetorizar(r) for r in registros]))
+    esperado = booster.predict(montar_matriz_features(amostra, base['vocabulario']))
+    np.testing.assert_allclose(obtido, esperado, rtol=0, atol=1e-12)
+
+def test_pontuar_registros(dados, tmp_path):
+    diretorio = str(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        pontuar_registros([{}], diretorio)
+    
+    X = codificar_features(dados)
+    y = (dados["Purchase Amount (USD)"] > 80).astype(int)
+    model = treinar_modelo_big_spender(X, y, n_estimators=20, max_depth=4, learning_rate=0.1)
+    exportar_modelo_compilado(model, list(X.columns), os.path.join(diretorio, ARQUIVO_MODELO_COMPILADO))
+    
+    registros = dados[FEATURES_MODELO].head(5).to_dict(orient="records")
+    pontuacoes = pontuar_registros(registros, diretorio)
+    esperado = model.predict_proba(X.head(5))[:, 1]
+    
+    assert [p['big_spender'] for p in pontuacoes] == list(esperado > 0.5)
+    np.testing.assert_allclose([p['probabilidade'] for p in pontuacoes], esperado, atol=1e-12)
+    assert pontuar_registros([], diretorio) == []
@@ -0,0 +1,299 @@
+"""Avaliador de árvores em NumPy puro para scoring de baixa latência"""
+import json
+import numpy as np
+from typing import List, Optional
+
+# Tipos de missing do LightGBM
+MISSING_NONE = 0
+MISSING_ZERO = 1
+MISSING_NAN = 2
+
+_MISSING_TYPES = {'None': MISSING_NONE, 'Zero': MISSING_ZERO, 'NaN': MISSING_NAN}
+_K_ZERO_THRESHOLD = 1e-35
+_MAX_DECISOES_POR_BLOCO = 1 << 22
+
+def _especificar_features(
+    colunas: List[str],
+    features_categoricas: List[str],
+    vocabulario: Optional[dict]
+) -> list:
+    """
+    Descreve como montar cada feature a partir de um registro bruto.
+    
+    Args:
+        colunas: Nomes das colunas usadas no treino (na ordem do modelo)
+        features_categoricas: Colunas categóricas originais
+        vocabulario: Vocabulário para colunas codificadas como inteiros
+    
+    Returns:
+        Lista de especificações, uma por feature
+    """
+    vocabulario = vocabulario or {}
+    especificacao = []
+    
+    for nome in colunas:
+        if nome in vocabulario:
+            especificacao.append({'tipo': 'codigo', 'coluna': nome, 'valores': vocabulario[nome]})
+            continue
+        
+        base = next(
+            (cat for cat in features_categoricas if nome.startswith(f"{cat}_")),
+            None
+        )
+        if base is not None:
+            especificacao.append({'tipo': 'indicador', 'coluna': base, 'valor': nome[len(base) + 1:]})
+        else:
+            especificacao.append({'tipo': 'numerica', 'coluna': nome})
+    
+    return especificacao
+
+def compilar_arvores(
+    model,
+    colunas: List[str],
+    features_categoricas: List[str],
+    vocabulario: Optional[dict] = None
+) -> dict:
+    """
+    Achata o booster LightGBM em arrays NumPy.
+    
+    Nós internos recebem índices globais; filhos negativos apontam para
+    folhas (~indice_folha), seguindo a convenção do LightGBM.
+    
+    Args:
+        model: LGBMClassifier ou Booster binário treinado
+        colunas: Nomes das colunas usadas no treino
+        features_categoricas: Colunas categóricas originais
+        vocabulario: Vocabulário das features codificadas como inteiros
+    
+    Returns:
+        Dicionário de arrays com a representação compilada
+    
+    Raises:
+        ValueError: Se o objetivo do modelo não for binário
+    """
+    booster = getattr(model, 'booster_', model)
+    dump = booster.dump_model()
+    
+    objetivo = dump.get('objective', '').split()
+    if not objetivo or objetivo[0] != 'binary':
+        raise ValueError(f"❌ Objetivo não suportado: {dump.get('objective')}")
+    sigmoid = float(objetivo[1].split(':')[1]) if len(objetivo) > 1 else 1.0
+    
+    feature, threshold, left, right = [], [], [], []
+    default_left, missing_type, cat_index = [], [], []
+    leaf_value, roots, categorias = [], [], []
+    
+    def visitar(no: dict) -> int:
+        if 'leaf_value' in no:
+            leaf_value.append(no['leaf_value'])
+            return ~(len(leaf_value) - 1)
+        
+        idx = len(feature)
+        feature.append(no['split_feature'])
+        default_left.append(no['default_left'])
+        missing_type.append(_MISSING_TYPES[no['missing_type']])
+        left.append(0)
+        right.append(0)
+        
+        if no['decision_type'] == '==':
+            threshold.append(np.nan)
+            cat_index.append(len(categorias))
+            categorias.append([int(v) for v in str(no['threshold']).split('||')])
+        else:
+            threshold.append(no['threshold'])
+            cat_index.append(-1)
+        
+        left[idx] = visitar(no['left_child'])
+        right[idx] = visitar(no['right_child'])
+        return idx
+    
+    for arvore in dump['tree_info']:
+        roots.append(visitar(arvore['tree_structure']))
+    
+    # Conjuntos categóricos como matriz booleana (nó categórico × categoria)
+    max_cat = max((max(c) for c in categorias), default=-1)
+    cat_sets = np.zeros((len(categorias), max_cat + 1), dtype=bool)
+    for i, valores in enumerate(categorias):
+        cat_sets[i, valores] = True
+    
+    metadados = {
+        'feature_names': list(colunas),
+        'features': _especificar_features(colunas, features_categoricas, vocabulario),
+        'sigmoid': sigmoid,
+        'average_output': bool(dump.get('average_output', False))
+    }
+    
+    return {
+        'feature': np.array(feature, dtype=np.int32),
+        'threshold': np.array(threshold, dtype=np.float64),
+        'left': np.array(left, dtype=np.int32),
+        'right': np.array(right, dtype=np.int32),
+        'default_left': np.array(default_left, dtype=bool),
+        'missing_type': np.array(missing_type, dtype=np.int8),
+        'cat_index': np.array(cat_index, dtype=np.int32),
+        'cat_sets': cat_sets,
+        'leaf_value': np.array(leaf_value, dtype=np.float64),
+        'roots': np.array(roots, dtype=np.int32),
+        'metadados': np.array(json.dumps(metadados, ensure_ascii=False))
+    }
+
+def salvar_arvores(arrays: dict, caminho: str) -> None:
+    """
+    Salva a representação compilada em um arquivo .npz.
+    
+    Args:
+        arrays: Resultado de compilar_arvores
+        caminho: Caminho do arquivo de destino
+    """
+    with open(caminho, "wb") as f:
+        np.savez(f, **arrays)
+
+class AvaliadorArvores:
+    """Avalia o modelo compilado usando apenas NumPy"""
+    
+    def __init__(self, arrays: dict):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.default_left = arrays['default_left']
+        self.missing_type = arrays['missing_type']
+        self.cat_index = arrays['cat_index']
+        self.cat_sets = arrays['cat_sets']
+        self.leaf_value = arrays['leaf_value']
+        self.roots = arrays['roots']
+        
+        metadados = json.loads(str(arrays['metadados']))
+        self.feature_names = metadados['feature_names']
+        self.features = metadados['features']
+        self.sigmoid = metadados['sigmoid']
+        self.average_output = metadados['average_output']
+        
+        self._nos_categoricos = np.flatnonzero(self.cat_index >= 0)
+        self._profundidade = self._calcular_profundidade()
+    
+    def _calcular_profundidade(self) -> int:
+        """Calcula a profundidade máxima (em nós internos) entre as árvores"""
+        profundidade = 0
+        nivel = self.roots[self.roots >= 0]
+        while nivel.size:
+            profundidade += 1
+            filhos = np.concatenate([self.left[nivel], self.right[nivel]])
+            nivel = filhos[filhos >= 0]
+        return profundidade
+    
+    @classmethod
+    def carregar(cls, caminho: str) -> "AvaliadorArvores":
+        """
+        Carrega um modelo salvo com salvar_arvores.
+        
+        Args:
+            caminho: Caminho do arquivo .npz
+        
+        Returns:
+            Avaliador pronto para uso
+        """
+        with np.load(caminho, allow_pickle=False) as dados:
+            return cls({nome: dados[nome] for nome in dados.files})
+    
+    def vetorizar(self, registro: dict) -> np.ndarray:
+        """
+        Monta o vetor de features de um registro bruto (sem pandas).
+        
+        Args:
+            registro: Dicionário {coluna original: valor}
+        
+        Returns:
+            Array float64 na ordem de features do modelo
+        """
+        x = np.empty(len(self.features), dtype=np.float64)
+        
+        for j, spec in enumerate(self.features):
+            valor = registro.get(spec['coluna'])
+            if spec['tipo'] == 'numerica':
+                x[j] = np.nan if valor is None else float(valor)
+            elif spec['tipo'] == 'indicador':
+                x[j] = float(str(valor) == spec['valor'])
+            else:
+                valores = spec['valores']
+                x[j] = valores.index(str(valor)) if str(valor) in valores else np.nan
+        
+        return x
+    
+    def _decidir(self, X: np.ndarray) -> np.ndarray:
+        """
+        Avalia todos os splits de uma vez para um bloco de linhas.
+        
+        Args:
+            X: Matriz (linhas × features)
+        
+        Returns:
+            Matriz booleana (linhas × nós): True quando o caminho segue à esquerda
+        """
+        valor = X[:, self.feature]
+        nan = np.isnan(valor)
+        
+        # Decisão numérica (NaN vira 0 exceto quando missing_type é NaN)
+        valor_num = np.where(nan & (self.missing_type != MISSING_NAN), 0.0, valor)
+        faltante = (
+            ((self.missing_type == MISSING_ZERO) & (np.abs(valor_num) <= _K_ZERO_THRESHOLD)) |
+            ((self.missing_type == MISSING_NAN) & nan)
+        )
+        esquerda = np.where(faltante, self.default_left, valor_num <= self.threshold)
+        
+        # Decisão categórica (NaN e negativos vão para a direita)
+        if self._nos_categoricos.size:
+            codigo = np.where(nan[:, self._nos_categoricos], -1, valor[:, self._nos_categoricos])
+            codigo = codigo.astype(np.int64)
+            valido = (codigo >= 0) & (codigo < self.cat_sets.shape[1])
+            pertence = self.cat_sets[
+                self.cat_index[self._nos_categoricos], 
+                np.clip(codigo, 0, max(self.cat_sets.shape[1] - 1, 0))
+            ]
+            esquerda[:, self._nos_categoricos] = pertence & valido
+        
+        return esquerda
+    
+    def prever_bruto(self, X: np.ndarray) -> np.ndarray:
+        """
+        Calcula o score bruto (soma das folhas) para cada linha.
+        
+        Args:
+            X: Matriz (linhas × features) ou vetor de uma linha
+        
+        Returns:
+            Array com o score bruto de cada linha
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        bruto = np.empty(X.shape[0], dtype=np.float64)
+        
+        # Blocos limitam a matriz (linhas × nós) de decisões em memória
+        tamanho_bloco = max(1, _MAX_DECISOES_POR_BLOCO // max(len(self.feature), 1))
+        
+        for inicio in range(0, X.shape[0], tamanho_bloco):
+            bloco = X[inicio:inicio + tamanho_bloco]
+            proximo = np.where(self._decidir(bloco), self.left, self.right)
+            
+            # Nó atual de cada (linha, árvore); negativo = folha alcançada
+            no = np.repeat(self.roots[np.newaxis, :], bloco.shape[0], axis=0)
+            linhas = np.arange(bloco.shape[0])[:, np.newaxis]
+            for _ in range(self._profundidade):
+                no = np.where(no >= 0, proximo[linhas, np.maximum(no, 0)], no)
+            
+            bruto[inicio:inicio + tamanho_bloco] = self.leaf_value[~no].sum(axis=1)
+        
+        if self.average_output:
+            bruto /= len(self.roots)
+        return bruto
+    
+    def prever_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Calcula a probabilidade da classe positiva (Big Spender).
+        
+        Args:
+            X: Matriz (linhas × features) ou vetor de uma linha
+        
+        Returns:
+            Array com a probabilidade de cada linha
+        """
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * self.prever_bruto(X)))
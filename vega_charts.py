@@ -0,0 +1,326 @@
+"""Especificações Vega-Lite dos gráficos (renderizados no navegador)
+
+Cada função espelha a assinatura do gráfico equivalente em charts.py, mas
+devolve um dicionário Vega-Lite montado a partir de agregados (contagens,
+resumos, grades de densidade), nunca das linhas brutas.
+"""
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from settings import UI_CONFIG
+from data_processor import calcular_grade_densidade
+
+# Pixels por polegada usados para converter o figsize do matplotlib
+_PX_POR_POLEGADA = 60
+
+def _base(titulo: str, figsize: Tuple[int, int]) -> dict:
+    """Campos comuns a todas as especificações"""
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "title": titulo,
+        "height": figsize[1] * _PX_POR_POLEGADA
+    }
+
+def _registros_grade(grade: dict, nome_grupo: str) -> List[dict]:
+    """Converte uma grade de densidade em registros (células não vazias)"""
+    x_centros = (grade['x_edges'][:-1] + grade['x_edges'][1:]) / 2
+    y_centros = (grade['y_edges'][:-1] + grade['y_edges'][1:]) / 2
+    registros = []
+    
+    for g, grupo in enumerate(grade['grupos']):
+        ix, iy = np.nonzero(grade['contagens'][g])
+        for i, j in zip(ix, iy):
+            registros.append({
+                "x": float(x_centros[i]),
+                "y": float(y_centros[j]),
+                nome_grupo: str(grupo),
+                "n": int(grade['contagens'][g, i, j])
+            })
+    
+    return registros
+
+def _espec_densidade(
+    grade: dict,
+    nome_grupo: str,
+    titulo: str,
+    figsize: Tuple[int, int]
+) -> dict:
+    """Scatter ponderado a partir de uma grade de densidade"""
+    return {
+        **_base(titulo, figsize),
+        "data": {"values": _registros_grade(grade, nome_grupo)},
+        "mark": {"type": "circle", "opacity": 0.6},
+        "encoding": {
+            "x": {"field": "x", "type": "quantitative", "title": "Idade", "scale": {"zero": False}},
+            "y": {"field": "y", "type": "quantitative", "title": "Valor da Compra (USD)", "scale": {"zero": False}},
+            "color": {"field": nome_grupo, "type": "nominal"},
+            "size": {"field": "n", "type": "quantitative", "title": "Clientes"},
+            "tooltip": [
+                {"field": nome_grupo, "type": "nominal"},
+                {"field": "n", "type": "quantitative", "title": "Clientes"}
+            ]
+        }
+    }
+
+def _camadas_boxplot(eixo_x: dict, extras: dict = None) -> List[dict]:
+    """Camadas (bigode, caixa, mediana, outliers) de um boxplot pré-calculado"""
+    extras = extras or {}
+    eixo_y = {"type": "quantitative", "title": "Valor da Compra (USD)"}
+    
+    return [
+        {
+            "mark": {"type": "rule"},
+            "encoding": {"x": eixo_x, **extras, "y": {"field": "whislo", **eixo_y}, "y2": {"field": "whishi"}}
+        },
+        {
+            "mark": {"type": "bar", "size": 28, "stroke": "black"},
+            "encoding": {"x": eixo_x, **extras, "y": {"field": "q1", **eixo_y}, "y2": {"field": "q3"}}
+        },
+        {
+            "mark": {"type": "tick", "color": "#404040", "size": 28},
+            "encoding": {"x": eixo_x, **{k: v for k, v in extras.items() if k != "color"}, "y": {"field": "med", **eixo_y}}
+        },
+        {
+            "transform": [{"flatten": ["fliers"]}, {"filter": "isValid(datum.fliers)"}],
+            "mark": {"type": "point", "shape": "diamond", "color": "#404040"},
+            "encoding": {"x": eixo_x, **{k: v for k, v in extras.items() if k != "color"}, "y": {"field": "fliers", **eixo_y}}
+        }
+    ]
+
+def _registros_boxplot(resumo: List[dict], nomes: List[str]) -> List[dict]:
+    """Converte resumos de cinco números em registros serializáveis"""
+    registros = []
+    
+    for item in resumo:
+        grupo = item['grupo'] if isinstance(item['grupo'], tuple) else (item['grupo'],)
+        registro = {nome: str(valor) for nome, valor in zip(nomes, grupo)}
+        registro.update({
+            chave: float(item[chave])
+            for chave in ('q1', 'med', 'q3', 'whislo', 'whishi')
+        })
+        registro['fliers'] = [float(v) for v in item['fliers']]
+        registros.append(registro)
+    
+    return registros
+
+def espec_grafico_distribuicao(
+    histograma: dict,
+    threshold: float,
+    figsize: Tuple[int, int] = (10, 4)
+) -> dict:
+    """Equivalente de charts.criar_grafico_distribuicao"""
+    edges = histograma['edges']
+    valores = [
+        {"inicio": float(a), "fim": float(b), "n": int(n)}
+        for a, b, n in zip(edges[:-1], edges[1:], histograma['contagens'])
+    ]
+    
+    return {
+        **_base("Distribuição de Valores de Compra", figsize),
+        "layer": [
+            {
+                "data": {"values": valores},
+                "mark": {"type": "bar", "color": "skyblue", "stroke": "black", "opacity": 0.7},
+                "encoding": {
+                    "x": {"field": "inicio", "type": "quantitative", "bin": {"binned": True}, "title": "Valor da Compra (USD)"},
+                    "x2": {"field": "fim"},
+                    "y": {"field": "n", "type": "quantitative", "title": "Frequência"}
+                }
+            },
+            {
+                "data": {"values": [{"threshold": float(threshold)}]},
+                "mark": {"type": "rule", "color": "red", "strokeDash": [6, 4], "strokeWidth": 2},
+                "encoding": {
+                    "x": {"field": "threshold", "type": "quantitative"},
+                    "tooltip": [{"field": "threshold", "type": "quantitative", "format": "$.2f", "title": "Threshold"}]
+                }
+            }
+        ]
+    }
+
+def _grade(dispersao: dict) -> dict:
+    """Grade de densidade de calcular_pontos_dispersao (agrega os pontos se preciso)"""
+    if 'grade' in dispersao:
+        return dispersao['grade']
+    return calcular_grade_densidade(
+        dispersao['pontos'], dispersao['x'], dispersao['y'], dispersao['hue'],
+        bins=UI_CONFIG.DENSITY_GRID_BINS
+    )
+
+def espec_grafico_clusters(
+    dispersao: dict,
+    figsize: Tuple[int, int] = (10, 6)
+) -> dict:
+    """Equivalente de charts.criar_grafico_clusters (sempre agregado em grade)"""
+    titulo = "Segmentação de Clientes: Idade × Valor de Compra"
+    grade = _grade(dispersao)
+    
+    if grade['contagens'].sum() == 0:
+        return {**_base(titulo, figsize), "data": {"values": []}, "mark": "point"}
+    
+    return _espec_densidade(grade, "Cluster", titulo, figsize)
+
+def espec_grafico_barras_horizontal(
+    series: pd.Series,
+    titulo: str,
+    xlabel: str = 'Valor',
+    color: str = 'coral',
+    figsize: Tuple[int, int] = (8, 5)
+) -> dict:
+    """Equivalente de charts.criar_grafico_barras_horizontal"""
+    valores = [{"rotulo": str(k), "valor": float(v)} for k, v in series.items()]
+    ordem = [registro["rotulo"] for registro in reversed(valores)]
+    eixo_y = {"field": "rotulo", "type": "nominal", "sort": ordem, "title": series.index.name}
+    
+    return {
+        **_base(titulo, figsize),
+        "data": {"values": valores},
+        "layer": [
+            {
+                "mark": {"type": "bar", "color": color},
+                "encoding": {
+                    "y": eixo_y,
+                    "x": {"field": "valor", "type": "quantitative", "title": xlabel}
+                }
+            },
+            {
+                "mark": {"type": "text", "align": "left", "dx": 3},
+                "encoding": {
+                    "y": eixo_y,
+                    "x": {"field": "valor", "type": "quantitative"},
+                    "text": {"field": "valor", "type": "quantitative", "format": ",.0f"}
+                }
+            }
+        ]
+    }
+
+def espec_grafico_pizza(
+    series: pd.Series,
+    titulo: str,
+    colors: list = None,
+    figsize: Tuple[int, int] = (6, 4)
+) -> dict:
+    """Equivalente de charts.criar_grafico_pizza"""
+    if colors is None:
+        colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99']
+    
+    total = float(series.sum()) or 1.0
+    valores = [
+        {"rotulo": str(k), "valor": float(v), "pct": float(v) / total}
+        for k, v in series.items()
+    ]
+    
+    return {
+        **_base(titulo, figsize),
+        "data": {"values": valores},
+        "mark": {"type": "arc", "tooltip": True},
+        "encoding": {
+            "theta": {"field": "valor", "type": "quantitative", "stack": True},
+            "color": {
+                "field": "rotulo",
+                "type": "nominal",
+                "title": None,
+                "scale": {"range": colors}
+            },
+            "tooltip": [
+                {"field": "rotulo", "type": "nominal", "title": series.name},
+                {"field": "pct", "type": "quantitative", "format": ".1%"}
+            ]
+        }
+    }
+
+def espec_scatter_idade_valor(
+    dispersao: dict,
+    figsize: Tuple[int, int] = (8, 6)
+) -> dict:
+    """Equivalente de charts.criar_scatter_idade_valor (sempre agregado em grade)"""
+    hue = dispersao['hue']
+    return _espec_densidade(_grade(dispersao), hue, f"Idade × Valor × {hue}", figsize)
+
+def espec_boxplot_genero(
+    resumo: List[dict],
+    figsize: Tuple[int, int] = (8, 6)
+) -> dict:
+    """Equivalente de charts.criar_boxplot_genero"""
+    eixo_x = {"field": "Gender", "type": "nominal", "title": "Gênero"}
+    
+    return {
+        **_base("Distribuição de Valores por Gênero", figsize),
+        "data": {"values": _registros_boxplot(resumo, ["Gender"])},
+        "layer": _camadas_boxplot(
+            eixo_x,
+            {"color": {"field": "Gender", "type": "nominal", "scale": {"scheme": "set3"}, "legend": None}}
+        )
+    }
+
+def espec_histograma_idade(
+    histograma: dict,
+    figsize: Tuple[int, int] = (6, 4)
+) -> dict:
+    """Equivalente de charts.criar_histograma_idade"""
+    edges = histograma['edges']
+    valores = [
+        {"inicio": float(a), "fim": float(b), "n": int(n)}
+        for a, b, n in zip(edges[:-1], edges[1:], histograma['contagens'])
+    ]
+    
+    return {
+        **_base("Distribuição de Idade", figsize),
+        "data": {"values": valores},
+        "mark": {"type": "bar", "color": "lightgreen", "stroke": "black"},
+        "encoding": {
+            "x": {"field": "inicio", "type": "quantitative", "bin": {"binned": True}, "title": "Idade"},
+            "x2": {"field": "fim"},
+            "y": {"field": "n", "type": "quantitative", "title": "Frequência"}
+        }
+    }
+
+def espec_boxplot_categoria_genero(
+    resumo: List[dict],
+    figsize: Tuple[int, int] = (12, 6)
+) -> dict:
+    """Equivalente de charts.criar_boxplot_categoria_genero"""
+    eixo_x = {"field": "Category", "type": "nominal", "title": "Categoria", "axis": {"labelAngle": -45}}
+    extras = {
+        "xOffset": {"field": "Gender", "type": "nominal"},
+        "color": {"field": "Gender", "type": "nominal", "scale": {"scheme": "pastel1"}}
+    }
+    
+    return {
+        **_base("Valor de Compra por Categoria e Gênero", figsize),
+        "data": {"values": _registros_boxplot(resumo, ["Category", "Gender"])},
+        "layer": _camadas_boxplot(eixo_x, extras)
+    }
+
+# Nome da função em charts.py → especificação equivalente
+ESPECIFICACOES = {
+    'criar_grafico_distribuicao': espec_grafico_distribuicao,
+    'criar_grafico_clusters': espec_grafico_clusters,
+    'criar_grafico_barras_horizontal': espec_grafico_barras_horizontal,
+    'criar_grafico_pizza': espec_grafico_pizza,
+    'criar_scatter_idade_valor': espec_scatter_idade_valor,
+    'criar_boxplot_genero': espec_boxplot_genero,
+    'criar_histograma_idade': espec_histograma_idade,
+    'criar_boxplot_categoria_genero': espec_boxplot_categoria_genero
+}
+
+def especificar(grafico: str, *args, **kwargs) -> dict:
+    """
+    Gera a especificação Vega-Lite equivalente a um gráfico de charts.py.
+    
+    Args:
+        grafico: Nome da função em charts.py
+        *args: Argumentos da função
+        **kwargs: Argumentos nomeados da função
+    
+    Returns:
+        Dicionário Vega-Lite
+    
+    Raises:
+        ValueError: Se o gráfico não tiver equivalente Vega-Lite
+    """
+    if grafico not in ESPECIFICACOES:
+        raise ValueError(f"❌ Gráfico sem versão Vega-Lite: {grafico}")
+    return ESPECIFICACOES[grafico](*args, **kwargs)